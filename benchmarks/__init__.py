@@ -0,0 +1 @@
+"""Mediciones de rendimiento de los caminos más usados del cálculo (ver benchmarks.suite)."""
@@ -0,0 +1,249 @@
+"""
+Benchmarks reproducibles de los caminos más usados del cálculo.
+
+Cada benchmark prepara sus datos con una semilla fija, se mide varias veces (se toma la mejor)
+y reporta el rendimiento en unidades por segundo (combinaciones, firmas o filas calculadas) y el pico de
+memoria medido con tracemalloc en una corrida aparte. Los resultados se comparan con una
+referencia guardada en JSON: si el rendimiento baja o la memoria sube más que el umbral,
+termina con código 1.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.suite --guardar          # mide y guarda la referencia
+    python -m benchmarks.suite --umbral 0.2       # mide y compara con la referencia
+    python -m benchmarks.suite -k segunda tercera # solo los benchmarks cuyo nombre contiene el texto
+
+La referencia depende de la máquina: conviene generarla en la misma en la que se compara. La que
+está en el repositorio (benchmarks/referencia.json) sirve de punto de partida para la primera
+comparación.
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from truco.cache_probabilidades import CacheProbabilidades
+from truco.escritura import EscritorColumnar
+from truco.excel import escribir_libro_en_flujo
+from truco.firmas import firmas_por_pg, muestrear_manos_por_pg
+from truco.nucleo import calcular_puntos, cartas, formatear_combinacion
+from truco.rondas import COLUMNAS_SEGUNDA_RONDA, primera_ronda, segunda_ronda, tercera_ronda
+
+RUTA_REFERENCIA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'referencia.json')
+SEMILLA = 0
+# Por debajo de esta diferencia de memoria no se considera regresión (evita falsos positivos en picos chicos)
+MEMORIA_TOLERADA_MB = 1.0
+
+
+def _manos_de_prueba(cantidad, semilla=SEMILLA):
+    """Manos de 9 cartas al azar, siempre las mismas para la misma semilla."""
+    rng = random.Random(semilla)
+    mazo = list(cartas)
+    return [tuple(rng.sample(mazo, 9)) for _ in range(cantidad)]
+
+
+def _manos_representativas(max_por_pg=1, semilla=SEMILLA):
+    """Una muestra uniforme de manos de cada PG, como la de los scripts."""
+    manos_por_pg = muestrear_manos_por_pg(cartas, 9, max_por_pg, random.Random(semilla))
+    return [(pg, mano) for pg, manos in manos_por_pg.items() for mano in manos]
+
+
+# Cada benchmark es una función que prepara los datos y devuelve (correr, unidades):
+# correr() hace el trabajo medido y unidades es cuántas combinaciones, firmas o filas procesa.
+
+def benchmark_calcular_puntos():
+    manos = _manos_de_prueba(100_000)
+
+    def correr():
+        for mano in manos:
+            calcular_puntos(mano)
+    return correr, len(manos)
+
+
+def benchmark_recorrido_9_cartas():
+    # Lo que hace calcular_combinaciones_por_pg: cubre las C(40, 9) combinaciones a través de sus firmas
+    # y elige 10 manos uniformes por PG. Se cuentan las firmas recorridas, no las combinaciones que
+    # representan (eso inflaría el rendimiento en varios órdenes de magnitud)
+    _, firmas = firmas_por_pg(cartas, 9)
+
+    def correr():
+        firmas_por_pg(cartas, 9)
+        muestrear_manos_por_pg(cartas, 9, 10, random.Random(SEMILLA))
+    return correr, sum(len(firmas_pg) for firmas_pg in firmas.values())
+
+
+def benchmark_probabilidad_condicional():
+    # Caché nueva en cada corrida: mide el cálculo exacto y no solo la consulta
+    manos = _manos_representativas(3)
+
+    def correr():
+        cache_probabilidades = CacheProbabilidades(cartas)
+        for pg, mano in manos:
+            primera_ronda(pg, mano, cache_probabilidades)
+    return correr, len(manos)
+
+
+def _benchmark_mano(calcular):
+    # Una iteración del ciclo de una ronda: todas las filas de una mano de 9 cartas de PG medio
+    pg, mano = _manos_representativas()[40]
+    filas = calcular(pg, mano)
+    return lambda: calcular(pg, mano), len(filas['Probabilidad'])
+
+
+def benchmark_segunda_ronda_muestreo():
+    return _benchmark_mano(lambda pg, mano: segunda_ronda(pg, mano, 50, SEMILLA))
+
+
+def benchmark_segunda_ronda_adaptativa():
+    return _benchmark_mano(lambda pg, mano: segunda_ronda(pg, mano, 2_000, SEMILLA,
+                                                          semiancho=0.05))
+
+
+def benchmark_segunda_ronda_exacta():
+    return _benchmark_mano(lambda pg, mano: segunda_ronda(pg, mano, 50, None, CacheProbabilidades(cartas)))
+
+
+def benchmark_tercera_ronda():
+    return _benchmark_mano(lambda pg, mano: tercera_ronda(pg, mano, 50, SEMILLA))
+
+
+def benchmark_tercera_ronda_lote():
+    # Muchas manos de 6 cartas de la misma mano de 9 cartas, resueltas en un solo lote
+    return _benchmark_mano(lambda pg, mano: tercera_ronda(pg, mano, 20_000, SEMILLA))
+
+
+def _filas_de_prueba(cantidad, semilla=SEMILLA):
+    rng = np.random.default_rng(semilla)
+    return {
+        'PG_original': rng.integers(15, 100, cantidad),
+        'Combinacion_9': rng.integers(0, math.comb(40, 9), cantidad, dtype=np.uint32),
+        'Cartas_rival_3': rng.integers(0, math.comb(40, 3), cantidad, dtype=np.uint16),
+        'PG_reducido': rng.integers(-24, 97, cantidad),
+        'Probabilidad': rng.random(cantidad),
+        'IC_inferior': rng.random(cantidad),
+        'IC_superior': rng.random(cantidad),
+        'Muestras': rng.integers(0, 2_000, cantidad),
+    }
+
+
+def benchmark_exportar_detalles():
+    filas = _filas_de_prueba(500_000)
+
+    def correr():
+        with tempfile.TemporaryDirectory() as directorio:
+            with EscritorColumnar(os.path.join(directorio, 'detalles'), COLUMNAS_SEGUNDA_RONDA) as escritor:
+                escritor.agregar_lote(**filas)
+    return correr, len(filas['Probabilidad'])
+
+
+def benchmark_exportar_excel():
+    manos = _manos_de_prueba(20_000)
+    probabilidades = np.random.default_rng(SEMILLA).random(len(manos)).tolist()
+
+    def generar_filas():
+        for mano, probabilidad in zip(manos, probabilidades):
+            yield [calcular_puntos(mano), formatear_combinacion(mano), probabilidad]
+
+    def correr():
+        with tempfile.TemporaryDirectory() as directorio:
+            escribir_libro_en_flujo(os.path.join(directorio, 'libro.xlsx'),
+                                    [('Probabilidades_Individuales', ['PG', 'Combinación', 'Probabilidad'],
+                                      generar_filas)])
+    return correr, len(manos)
+
+
+BENCHMARKS = {
+    'calcular_puntos': benchmark_calcular_puntos,
+    'recorrido_9_cartas': benchmark_recorrido_9_cartas,
+    'probabilidad_condicional': benchmark_probabilidad_condicional,
+    'segunda_ronda_muestreo': benchmark_segunda_ronda_muestreo,
+    'segunda_ronda_adaptativa': benchmark_segunda_ronda_adaptativa,
+    'segunda_ronda_exacta': benchmark_segunda_ronda_exacta,
+    'tercera_ronda': benchmark_tercera_ronda,
+    'tercera_ronda_lote': benchmark_tercera_ronda_lote,
+    'exportar_detalles': benchmark_exportar_detalles,
+    'exportar_excel': benchmark_exportar_excel,
+}
+
+
+def medir(preparar, repeticiones=3):
+    """Devuelve {'por_segundo', 'segundos', 'memoria_pico_mb'} de un benchmark."""
+    correr, unidades = preparar()
+    correr()  # calentamiento: importaciones y cachés internas de NumPy
+    mejores = math.inf
+    for _ in range(repeticiones):
+        gc.collect()
+        inicio = time.perf_counter()
+        correr()
+        mejores = min(mejores, time.perf_counter() - inicio)
+    gc.collect()
+    tracemalloc.start()
+    correr()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'por_segundo': unidades / mejores, 'segundos': mejores, 'memoria_pico_mb': pico / 2 ** 20}
+
+
+def comparar(resultados, referencia, umbral):
+    """Lista de regresiones: rendimiento menor o memoria mayor que la referencia en más de umbral."""
+    regresiones = []
+    for nombre, actual in resultados.items():
+        anterior = referencia.get(nombre)
+        if anterior is None:
+            continue
+        if actual['por_segundo'] < anterior['por_segundo'] * (1 - umbral):
+            regresiones.append(f"{nombre}: {actual['por_segundo']:,.0f}/s contra {anterior['por_segundo']:,.0f}/s")
+        if actual['memoria_pico_mb'] > anterior['memoria_pico_mb'] * (1 + umbral) + MEMORIA_TOLERADA_MB:
+            regresiones.append(f"{nombre}: {actual['memoria_pico_mb']:.1f} MB contra {anterior['memoria_pico_mb']:.1f} MB")
+    return regresiones
+
+
+def principal(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de rendimiento con referencia en JSON.")
+    parser.add_argument('-k', nargs='+', default=[], dest='filtros',
+                        help="correr solo los benchmarks cuyo nombre contiene alguno de estos textos")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--umbral', type=float, default=0.2,
+                        help="regresión tolerada, como fracción de la referencia (default 0.2)")
+    parser.add_argument('--referencia', default=RUTA_REFERENCIA)
+    parser.add_argument('--guardar', action='store_true', help="guardar los resultados como nueva referencia")
+    args = parser.parse_args(argumentos)
+
+    resultados = {}
+    for nombre, preparar in BENCHMARKS.items():
+        if args.filtros and not any(filtro in nombre for filtro in args.filtros):
+            continue
+        resultados[nombre] = medir(preparar, args.repeticiones)
+        r = resultados[nombre]
+        print(f"{nombre:<26} {r['por_segundo']:>16,.1f}/s {r['segundos'] * 1000:>10.1f} ms {r['memoria_pico_mb']:>9.1f} MB")
+
+    referencia = {}
+    if os.path.exists(args.referencia):
+        with open(args.referencia, encoding='utf-8') as archivo:
+            referencia = json.load(archivo)
+    if args.guardar:
+        referencia.update(resultados)
+        with open(args.referencia, 'w', encoding='utf-8') as archivo:
+            json.dump(referencia, archivo, indent=2, sort_keys=True)
+        print(f"Referencia guardada en '{args.referencia}'")
+        return 0
+    if not referencia:
+        print(f"No hay referencia en '{args.referencia}': use --guardar para crearla.")
+        return 0
+    regresiones = comparar(resultados, referencia, args.umbral)
+    for regresion in regresiones:
+        print(f"REGRESIÓN {regresion}")
+    if not regresiones:
+        print(f"Sin regresiones mayores al {args.umbral:.0%} respecto de la referencia.")
+    return 1 if regresiones else 0
+
+
+if __name__ == '__main__':
+    sys.exit(principal())
@@ -0,0 +1,42 @@
+"""
+Configuración común de las pruebas.
+
+Las pruebas comparan con fuerza bruta sobre un mazo reducido (20 cartas, con ponderaciones
+repetidas y sin repetir), donde recorrer todas las combinaciones es instantáneo.
+"""
+import importlib.util
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Para correr con pytest desde cualquier directorio sin instalar el paquete
+sys.path.insert(0, RAIZ)
+
+from truco.nucleo import cartas  # noqa: E402
+
+CARTAS_REDUCIDAS = ('4E', '4O', '4B', '5E', '5O', '6E', '6O', '7B', '10E', '10O',
+                    '11E', '12E', '1C', '2E', '2O', '3E', '3O', '7O', '1B', '1E')
+
+
+@pytest.fixture(scope='session')
+def mazo_reducido():
+    """{carta: ponderación} con 20 cartas del mazo, en el orden del mazo completo."""
+    return {carta: peso for carta, peso in cartas.items() if carta in CARTAS_REDUCIDAS}
+
+
+@pytest.fixture
+def cargar_script():
+    """
+    Carga uno de los scripts de la raíz ('truco probs ... ronda.py') como módulo. Los scripts
+    guardan en 'E:\\TRUCO' relativo al directorio actual, así que conviene usarlo con
+    monkeypatch.chdir(tmp_path).
+    """
+    def cargar(nombre_archivo):
+        nombre = 'script_' + nombre_archivo.replace(' ', '_').removesuffix('.py')
+        spec = importlib.util.spec_from_file_location(nombre, os.path.join(RAIZ, nombre_archivo))
+        modulo = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(modulo)
+        return modulo
+    return cargar
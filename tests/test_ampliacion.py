@@ -0,0 +1,106 @@
+import os
+import random
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from truco.ampliacion import (acumular_detalles, filas_anteriores, manos_anteriores, manos_nuevas,
+                              reveladas_anteriores, validar_limites)
+from truco.colex import rango_de_combinacion
+from truco.escritura import leer_detalles
+from truco.estadisticas import tabla_resumen
+from truco.firmas import ampliar_manos_por_pg, histograma_pg, muestrear_manos_por_pg
+from truco.metricas import Metricas
+from truco.nucleo import calcular_puntos, cartas
+from truco.rondas import POSICIONES, segunda_ronda, tercera_ronda
+
+
+def test_validar_limites():
+    validar_limites((10, 50), (20, 50))
+    with pytest.raises(ValueError, match='menores'):
+        validar_limites((10, 50), (20, 40))
+    with pytest.raises(ValueError, match='iguales'):
+        validar_limites((10, 50), (10, 50))
+
+
+def test_ampliar_manos_por_pg_sin_repetidas(mazo_reducido):
+    anteriores = muestrear_manos_por_pg(mazo_reducido, 5, 3, random.Random(0))
+    nuevas = ampliar_manos_por_pg(mazo_reducido, anteriores, 8, random.Random(1), k=5)
+    for pg, cantidad in histograma_pg(mazo_reducido, 5).items():
+        todas = anteriores[pg] + nuevas[pg]
+        assert len(todas) == len(set(todas)) == min(cantidad, 8)
+        assert all(calcular_puntos(mano, mazo_reducido) == pg for mano in nuevas[pg])
+
+
+def test_manos_nuevas_dependen_de_la_semilla_y_los_limites(mazo_reducido):
+    anteriores = muestrear_manos_por_pg(mazo_reducido, 9, 1, random.Random(0))
+    nuevas = manos_nuevas(mazo_reducido, anteriores, 2, 0, 1)
+    assert manos_nuevas(mazo_reducido, anteriores, 2, 0, 1) == nuevas
+    assert manos_nuevas(mazo_reducido, anteriores, 2, 1, 1) != nuevas
+
+
+def test_detalles_anteriores_por_mano():
+    mazo = list(cartas)
+    manos = [tuple(mazo[:9]), tuple(mazo[9:18])]
+    rangos = [rango_de_combinacion(mano, POSICIONES) for mano in manos]
+    detalles = pd.DataFrame({'PG_original': [calcular_puntos(manos[0])] * 2 + [calcular_puntos(manos[1])],
+                             'Combinacion_9': [rangos[0], rangos[0], rangos[1]],
+                             'Cartas_rival_3': [7, 3, 5],
+                             'PG_reducido': [10, 12, 10],
+                             'Probabilidad': [0.25, 0.5, 0.75]})
+    assert manos_anteriores(detalles, mazo) == {calcular_puntos(mano): [mano] for mano in manos}
+    assert reveladas_anteriores(detalles, 'Cartas_rival_3')[rangos[0]].tolist() == [7, 3]
+    assert filas_anteriores(detalles, ['Cartas_rival_3', 'Probabilidad'])[rangos[1]]['Probabilidad'].tolist() == [0.75]
+    acumuladores = acumular_detalles(detalles, 'PG_reducido')
+    assert acumuladores[10].cantidad == 2 and acumuladores[10].promedio == pytest.approx(0.5)
+
+
+def _anteriores_de(filas):
+    return {columna: filas[columna] for columna in ('Cartas_rival_3', 'Muestras', 'Probabilidad')}
+
+
+@pytest.mark.parametrize('semiancho', [None, 0.05])
+def test_segunda_ronda_ampliada_igual_a_calcular_de_nuevo(semiancho):
+    mano = tuple(random.Random(1).sample(list(cartas), 9))
+    pg = calcular_puntos(mano)
+    anteriores = segunda_ronda(pg, mano, 20, semilla=2, semiancho=semiancho)
+    # Las filas anteriores llegan en otro orden, como si se hubieran leído de otra parte
+    orden = np.random.default_rng(0).permutation(len(anteriores['Probabilidad']))
+    ampliada = segunda_ronda(pg, mano, 60, semilla=2, semiancho=semiancho,
+                             anteriores={columna: valores[orden] for columna, valores in _anteriores_de(anteriores).items()})
+    de_nuevo = segunda_ronda(pg, mano, 60, semilla=2, semiancho=semiancho)
+    for columna, valores in de_nuevo.items():
+        np.testing.assert_array_equal(ampliada[columna], valores, err_msg=columna)
+
+
+def test_tercera_ronda_excluir_no_repite_manos_de_6_cartas():
+    mano = tuple(random.Random(2).sample(list(cartas), 9))
+    pg = calcular_puntos(mano)
+    anteriores = tercera_ronda(pg, mano, 30, semilla=1)
+    nuevas = tercera_ronda(pg, mano, 80, semilla=1, excluir=anteriores['Cartas_rival_6'])
+    todas = np.concatenate((anteriores['Cartas_rival_6'], nuevas['Cartas_rival_6']))
+    assert len(nuevas['Cartas_rival_6']) == 50
+    assert len(np.unique(todas)) == 80
+
+
+def test_script_tercera_ronda_ampliada(tmp_path, monkeypatch, cargar_script):
+    monkeypatch.chdir(tmp_path)
+    script = cargar_script('truco probs tercera ronda.py')
+    analizar = partial(script.analizar_probabilidades_tercera_ronda, semilla=3, formato_detalles='csv.gz',
+                       metricas=Metricas(silencioso=True))
+    nombre = os.path.join('E:\\TRUCO', 'probabilidades_tercera_ronda_{}_{}_{}')
+    analizar(1, 4)
+    anteriores = leer_detalles(nombre.format('detalles', 1, 4))
+    analizar(2, 6, ampliar_desde=(1, 4))
+    detalles = leer_detalles(nombre.format('detalles', 2, 6))
+    assert not detalles.duplicated(['Combinacion_9', 'Cartas_rival_6']).any()
+    # Las filas anteriores siguen y cada mano de 9 cartas tiene 6 manos de 6 cartas
+    pd.testing.assert_frame_equal(detalles.merge(anteriores).sort_values(list(anteriores.columns), ignore_index=True),
+                                  anteriores.sort_values(list(anteriores.columns), ignore_index=True))
+    assert (detalles.groupby('Combinacion_9').size() == 6).all()
+    assert detalles.groupby('PG_original')['Combinacion_9'].nunique().max() == 2
+    resumen = pd.read_csv(nombre.format('resumen', 2, 6) + '.csv')
+    esperado = pd.DataFrame(tabla_resumen(acumular_detalles(detalles, 'PG_super_reducido'), 'PG_super_reducido'))
+    pd.testing.assert_frame_equal(resumen, esperado, check_exact=False, rtol=1e-12)
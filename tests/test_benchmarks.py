@@ -0,0 +1,20 @@
+import json
+
+from benchmarks.suite import BENCHMARKS, RUTA_REFERENCIA, comparar
+
+
+def test_la_referencia_cubre_todos_los_benchmarks():
+    with open(RUTA_REFERENCIA, encoding='utf-8') as archivo:
+        referencia = json.load(archivo)
+    assert set(referencia) == set(BENCHMARKS)
+
+
+def test_comparar_detecta_regresiones():
+    referencia = {'a': {'por_segundo': 100.0, 'memoria_pico_mb': 10.0},
+                  'b': {'por_segundo': 100.0, 'memoria_pico_mb': 10.0}}
+    resultados = {'a': {'por_segundo': 85.0, 'memoria_pico_mb': 12.5},
+                  'b': {'por_segundo': 70.0, 'memoria_pico_mb': 14.0},
+                  'nuevo': {'por_segundo': 1.0, 'memoria_pico_mb': 100.0}}
+    regresiones = comparar(resultados, referencia, 0.2)
+    assert len(regresiones) == 2
+    assert all(regresion.startswith('b: ') for regresion in regresiones)
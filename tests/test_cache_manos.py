@@ -0,0 +1,31 @@
+import json
+import os
+
+from truco import cache_manos
+from truco.cache_manos import obtener_manos_por_pg
+from truco.metricas import Metricas
+
+
+def _obtener(mazo, ruta_cache, semilla=0):
+    return obtener_manos_por_pg(mazo, 3, semilla, ruta_cache=str(ruta_cache), metricas=Metricas(silencioso=True))
+
+
+def test_guarda_y_vuelve_a_cargar(mazo_reducido, tmp_path):
+    manos_por_pg = _obtener(mazo_reducido, tmp_path)
+    archivos = os.listdir(tmp_path)
+    assert archivos == [f'manos_por_pg_uniforme_v{cache_manos.VERSION_SELECCION}_3_0.json']
+    assert _obtener(mazo_reducido, tmp_path) == manos_por_pg
+    assert _obtener(mazo_reducido, tmp_path, semilla=1) != manos_por_pg
+
+
+def test_ignora_caches_de_otra_version_o_de_otro_mazo(mazo_reducido, tmp_path):
+    manos_por_pg = _obtener(mazo_reducido, tmp_path)
+    nombre_archivo = tmp_path / os.listdir(tmp_path)[0]
+    datos = json.loads(nombre_archivo.read_text(encoding='utf-8'))
+    falsas = {pg: [] for pg in datos['manos_por_pg']}
+    nombre_archivo.write_text(json.dumps({**datos, 'version': datos['version'] - 1, 'manos_por_pg': falsas}),
+                              encoding='utf-8')
+    assert _obtener(mazo_reducido, tmp_path) == manos_por_pg
+    otro_mazo = dict(mazo_reducido, **{'1E': 15})
+    nombre_archivo.write_text(json.dumps({**datos, 'cartas': otro_mazo, 'manos_por_pg': falsas}), encoding='utf-8')
+    assert _obtener(mazo_reducido, tmp_path) == manos_por_pg
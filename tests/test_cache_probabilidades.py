@@ -0,0 +1,44 @@
+import math
+from itertools import combinations
+
+import pytest
+
+from truco.cache_probabilidades import RONDAS, CacheProbabilidades
+
+
+def _fuerza_bruta(mazo, quitadas, ronda, umbral):
+    restantes = [peso for carta, peso in mazo.items() if carta not in quitadas]
+    k, comparacion = RONDAS[ronda]
+    sumas = [sum(combinacion) for combinacion in combinations(restantes, k)]
+    favorables = sum(1 for suma in sumas if (suma > umbral if comparacion == 'mayor' else suma < umbral))
+    return favorables / math.comb(len(restantes), k)
+
+
+@pytest.mark.parametrize('ronda, cantidad_quitadas', [(1, 9), (2, 12), (3, 15)])
+def test_probabilidad_igual_a_fuerza_bruta(mazo_reducido, ronda, cantidad_quitadas):
+    cache = CacheProbabilidades(mazo_reducido)
+    mazo = list(mazo_reducido)
+    for inicio in range(0, len(mazo) - cantidad_quitadas + 1, 2):
+        quitadas = mazo[inicio:inicio + cantidad_quitadas]
+        pesos = [mazo_reducido[carta] for carta in quitadas]
+        for umbral in (10, 30, 60):
+            assert cache.probabilidad(ronda, pesos, umbral) == pytest.approx(
+                _fuerza_bruta(mazo_reducido, quitadas, ronda, umbral), abs=1e-15)
+
+
+def test_reutiliza_por_firma(mazo_reducido):
+    cache = CacheProbabilidades(mazo_reducido)
+    # Mismo multiconjunto de ponderaciones en otro orden
+    primera = cache.probabilidad(3, [1, 2, 3, 5, 9, 9, 14, 1, 2, 3, 4, 5, 6, 7, 8], 12)
+    segunda = cache.probabilidad(3, [14, 9, 9, 8, 7, 6, 5, 5, 4, 3, 3, 2, 2, 1, 1], 12)
+    assert primera == segunda
+    assert (cache.aciertos, cache.fallos) == (1, 1)
+
+
+def test_sqlite_sobrevive_entre_instancias(mazo_reducido, tmp_path):
+    ruta = str(tmp_path / 'probabilidades.sqlite')
+    with CacheProbabilidades(mazo_reducido, ruta_sqlite=ruta) as cache:
+        probabilidad = cache.probabilidad(1, [1, 1, 2, 3, 4, 5, 9, 10, 14], 40)
+    with CacheProbabilidades(mazo_reducido, ruta_sqlite=ruta) as cache:
+        assert cache.buscar(1, (1, 1, 2, 3, 4, 5, 9, 10, 14), 40) == probabilidad
+        assert cache.buscar(1, (1, 1, 2, 3, 4, 5, 9, 10, 14), 41) is None
@@ -0,0 +1,81 @@
+import math
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from truco import colex
+from truco.colex import (GeneradorPorFila, SorteoSinReposicion, combinacion_de_rango, desrango, indices_de_rangos,
+                         muestrear_rangos, rango, rango_de_combinacion, rangos_de_indices, tipo_rango)
+
+
+def test_rango_recorre_todas_las_combinaciones_en_orden():
+    todas = sorted(combinations(range(9), 4), key=lambda posiciones: posiciones[::-1])
+    assert [rango(posiciones) for posiciones in todas] == list(range(math.comb(9, 4)))
+    assert all(desrango(valor, 4) == posiciones for valor, posiciones in enumerate(todas))
+
+
+def test_rango_de_combinacion_de_cartas(mazo_reducido):
+    mazo = list(mazo_reducido)
+    posiciones = {carta: i for i, carta in enumerate(mazo)}
+    for combinacion in combinations(mazo, 3):
+        valor = rango_de_combinacion(reversed(combinacion), posiciones)
+        assert combinacion_de_rango(valor, 3, mazo) == combinacion
+
+
+@pytest.mark.parametrize('n, k', [(20, 3), (20, 9), (40, 6)])
+def test_rangos_de_indices_ida_y_vuelta(n, k, monkeypatch):
+    rng = np.random.default_rng(0)
+    indices = np.array([rng.permutation(n)[:k] for _ in range(500)])
+    valores = rangos_de_indices(indices, n)
+    assert valores.dtype == tipo_rango(n, k)
+    assert valores.tolist() == [rango(fila) for fila in indices.tolist()]
+    assert np.array_equal(indices_de_rangos(valores, n, k), np.sort(indices, axis=1))
+    # El mismo resultado sin la tabla de todas las combinaciones
+    monkeypatch.setattr(colex, 'MAX_TABLA_COMBINACIONES', 0)
+    assert np.array_equal(indices_de_rangos(valores, n, k), np.sort(indices, axis=1))
+
+
+def test_tipo_rango():
+    assert tipo_rango(40, 3) == np.uint16
+    assert tipo_rango(40, 9) == np.uint32
+    assert tipo_rango(10, 2) == np.uint8
+
+
+def test_muestrear_rangos_distintos():
+    rangos = muestrear_rangos(20, 3, 500, np.random.default_rng(1))
+    assert len(set(rangos.tolist())) == 500 and rangos.max() < math.comb(20, 3)
+    assert sorted(muestrear_rangos(6, 2, 100, np.random.default_rng(1)).tolist()) == list(range(15))
+
+
+def test_sorteo_sin_reposicion_agota_sin_repetir():
+    sorteo = SorteoSinReposicion(300, np.random.default_rng(2), excluidos=[0, 5, 299])
+    tandas = [sorteo.siguientes(cantidad) for cantidad in (10, 100, 50, 1000)]
+    todos = np.concatenate(tandas).tolist()
+    assert [len(tanda) for tanda in tandas] == [10, 100, 50, 137]
+    assert sorted(todos) == sorted(set(range(300)) - {0, 5, 299})
+    assert len(sorteo.siguientes(5)) == 0
+
+
+def test_sorteo_sin_reposicion_no_depende_de_las_tandas():
+    de_una_vez = SorteoSinReposicion(10 ** 6, np.random.default_rng(3)).siguientes(5000)
+    sorteo = SorteoSinReposicion(10 ** 6, np.random.default_rng(3))
+    por_tandas = np.concatenate([sorteo.siguientes(cantidad) for cantidad in (1, 63, 64, 900, 3972)])
+    assert np.array_equal(de_una_vez, por_tandas)
+
+
+def test_sorteo_sin_reposicion_uniforme():
+    frecuencias = np.zeros(20, dtype=np.int64)
+    for semilla in range(4000):
+        np.add.at(frecuencias, SorteoSinReposicion(20, np.random.default_rng(semilla)).siguientes(5), 1)
+    esperada = 4000 * 5 / 20
+    assert (abs(frecuencias - esperada) < 0.1 * esperada).all()
+
+
+def test_generador_por_fila_no_depende_del_orden():
+    generadores = GeneradorPorFila(7)
+    en_orden = [generadores.fila(i).integers(1 << 30, size=4).tolist() for i in range(5)]
+    al_reves = {i: generadores.fila(i).integers(1 << 30, size=4).tolist() for i in reversed(range(5))}
+    assert en_orden == [al_reves[i] for i in range(5)]
+    assert len({tuple(numeros) for numeros in en_orden}) == 5
+    assert GeneradorPorFila(8).fila(0).integers(1 << 30, size=4).tolist() != en_orden[0]
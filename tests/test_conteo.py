@@ -0,0 +1,31 @@
+import math
+from collections import Counter
+from itertools import combinations
+
+import pytest
+
+from truco.conteo import contar_superiores, distribucion_sumas, probabilidad_superior
+
+
+@pytest.mark.parametrize('k', range(6))
+def test_distribucion_sumas_igual_a_fuerza_bruta(mazo_reducido, k):
+    pesos = list(mazo_reducido.values())
+    esperada = Counter(sum(combinacion) for combinacion in combinations(pesos, k))
+    assert distribucion_sumas(pesos, k) == dict(esperada)
+
+
+def test_distribucion_sumas_cuenta_todas_las_combinaciones(mazo_reducido):
+    pesos = list(mazo_reducido.values())
+    assert sum(distribucion_sumas(pesos, 9).values()) == math.comb(len(pesos), 9)
+
+
+@pytest.mark.parametrize('umbral', [-1, 0, 12, 25, 40, 100])
+def test_contar_superiores_igual_a_fuerza_bruta(mazo_reducido, umbral):
+    pesos = list(mazo_reducido.values())
+    esperados = sum(1 for combinacion in combinations(pesos, 4) if sum(combinacion) > umbral)
+    assert contar_superiores(pesos, 4, umbral) == esperados
+    assert probabilidad_superior(pesos, 4, umbral) == esperados / math.comb(len(pesos), 4)
+
+
+def test_probabilidad_superior_sin_combinaciones():
+    assert probabilidad_superior([1, 2], 3, 0) == 0
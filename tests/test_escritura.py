@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from truco.escritura import EscritorColumnar, leer_detalles, pa
+
+COLUMNAS = {'PG': 'int8', 'Combinacion': 'uint32', 'Probabilidad': 'float64'}
+FORMATOS = ['csv.gz', pytest.param('parquet', marks=pytest.mark.skipif(pa is None, reason="hace falta pyarrow"))]
+
+
+def _lote(inicio, cantidad):
+    filas = np.arange(inicio, inicio + cantidad)
+    return {'PG': filas % 100, 'Combinacion': filas * 1000, 'Probabilidad': filas / 1000}
+
+
+@pytest.mark.parametrize('formato', FORMATOS)
+def test_escribe_por_partes_y_lee_todo(tmp_path, formato):
+    ruta = str(tmp_path / 'detalles')
+    with EscritorColumnar(ruta, COLUMNAS, filas_por_lote=25, formato=formato) as escritor:
+        for inicio in range(0, 100, 10):
+            escritor.agregar_lote(**_lote(inicio, 10))
+        escritor.agregar(PG=1, Combinacion=2, Probabilidad=0.5)
+    assert escritor.partes == 4 and escritor.filas_escritas == 101
+    detalles = leer_detalles(ruta)
+    assert detalles['Combinacion'].tolist() == list(range(0, 100_000, 1000)) + [2]
+    assert detalles['Probabilidad'].iloc[:100].tolist() == pytest.approx(np.arange(100) / 1000)
+
+
+def test_columnas_de_distinto_largo(tmp_path):
+    escritor = EscritorColumnar(str(tmp_path / 'detalles'), COLUMNAS, formato='csv.gz')
+    with pytest.raises(ValueError):
+        escritor.agregar_lote(PG=[1, 2], Combinacion=[1], Probabilidad=[0.1, 0.2])
+
+
+def test_borra_partes_anteriores(tmp_path):
+    ruta = str(tmp_path / 'detalles')
+    with EscritorColumnar(ruta, COLUMNAS, formato='csv.gz') as escritor:
+        escritor.agregar_lote(**_lote(0, 10))
+    with EscritorColumnar(ruta, COLUMNAS, formato='csv.gz') as escritor:
+        escritor.agregar_lote(**_lote(50, 3))
+    assert leer_detalles(ruta)['Combinacion'].tolist() == [50_000, 51_000, 52_000]
+    assert leer_detalles(str(tmp_path / 'vacio')).empty
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from truco.cache_probabilidades import CacheProbabilidades
+from truco.esquemas import EvaluadorEsquemas, cargar_esquemas, completar_esquema, muestrear_lotes
+
+
+@pytest.fixture
+def esquemas(mazo_reducido):
+    return {'clasico': dict(mazo_reducido),
+            'siete_oro_alto': completar_esquema({'7O': 12, '1E': 11}, mazo_reducido),
+            'planos': dict.fromkeys(mazo_reducido, 3)}
+
+
+@pytest.mark.parametrize('ronda, reveladas', [(1, 0), (2, 3), (3, 6)])
+def test_igual_a_evaluar_cada_esquema_por_separado(mazo_reducido, esquemas, ronda, reveladas):
+    evaluador = EvaluadorEsquemas(esquemas)
+    rng = np.random.default_rng(ronda)
+    lotes = list(muestrear_lotes(ronda, 30, 2, rng, total_cartas=len(mazo_reducido), manos_por_lote=16))
+    assert sum(len(indices_mano) for indices_mano, _ in lotes) == 30 * (2 if reveladas else 1)
+    mazo = list(mazo_reducido)
+    for indices_mano, indices_reveladas in lotes:
+        claves, probabilidades = evaluador.probabilidades(ronda, indices_mano, indices_reveladas)
+        for e, (nombre, esquema) in enumerate(esquemas.items()):
+            cache = CacheProbabilidades(esquema)
+            for fila, indices in enumerate(indices_mano):
+                mano = [mazo[i] for i in indices]
+                cartas_reveladas = [mazo[i] for i in indices_reveladas[fila]] if reveladas else []
+                assert not set(mano) & set(cartas_reveladas)
+                clave = sum(esquema[carta] for carta in mano) - sum(esquema[carta] for carta in cartas_reveladas)
+                assert claves[fila, e] == clave
+                assert probabilidades[fila, e] == pytest.approx(cache.probabilidad(
+                    ronda, [esquema[carta] for carta in mano + cartas_reveladas], clave), abs=1e-15)
+
+
+def test_esquemas_invalidos(mazo_reducido, tmp_path):
+    with pytest.raises(ValueError):
+        completar_esquema({'XX': 3}, mazo_reducido)
+    with pytest.raises(ValueError):
+        completar_esquema({'1E': -1}, mazo_reducido)
+    with pytest.raises(ValueError):
+        EvaluadorEsquemas({'clasico': dict(mazo_reducido), 'corto': dict(list(mazo_reducido.items())[1:])})
+    ruta = tmp_path / 'variantes.json'
+    ruta.write_text('{"ases": {"1B": 14}}', encoding='utf-8')
+    assert list(cargar_esquemas(str(ruta), mazo_reducido)) == ['clasico', 'ases']
+    ruta.write_text('[1, 2]', encoding='utf-8')
+    with pytest.raises(ValueError):
+        cargar_esquemas(str(ruta), mazo_reducido)
@@ -0,0 +1,66 @@
+import math
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+from truco.estadisticas import Acumulador, agregar_por_clave, tabla_resumen, tabla_resumen_ronda
+
+
+def _acumulador(valores):
+    acumulador = Acumulador()
+    acumulador.agregar_lote(np.asarray(valores, dtype=float))
+    return acumulador
+
+
+def test_agregar_y_agregar_lote_coinciden():
+    valores = np.random.default_rng(0).random(100)
+    uno_a_uno = Acumulador()
+    for valor in valores:
+        uno_a_uno.agregar(valor)
+    por_lote = _acumulador(valores)
+    assert uno_a_uno.cantidad == por_lote.cantidad == 100
+    assert uno_a_uno.promedio == pytest.approx(np.mean(valores))
+    assert por_lote.desviacion_std == pytest.approx(np.std(valores))
+    assert (por_lote.minimo, por_lote.maximo) == (valores.min(), valores.max())
+
+
+def test_combinar_partes_da_lo_mismo_que_todo_junto():
+    valores = np.random.default_rng(1).random(1000)
+    partes = [_acumulador(parte) for parte in np.array_split(valores, 7)]
+    combinado = Acumulador()
+    for parte in partes:
+        combinado.combinar(Acumulador.desde_dict(parte.a_dict()))
+    todo = _acumulador(valores)
+    assert combinado.cantidad == todo.cantidad
+    assert (combinado.minimo, combinado.maximo) == (todo.minimo, todo.maximo)
+    assert combinado.promedio == pytest.approx(todo.promedio, rel=1e-12)
+    assert combinado.desviacion_std == pytest.approx(np.std(valores), rel=1e-9)
+
+
+def test_acumulador_vacio():
+    vacio = Acumulador()
+    vacio.agregar_lote(np.empty(0))
+    assert vacio.cantidad == 0
+    assert math.isnan(vacio.promedio) and math.isnan(vacio.desviacion_std)
+    assert Acumulador().combinar(vacio).a_dict() == vacio.a_dict()
+
+
+def test_agregar_por_clave_y_tabla_resumen():
+    claves = np.array([3, 1, 3, 2, 1, 3])
+    valores = np.array([0.1, 0.5, 0.3, 0.9, 0.7, 0.2])
+    acumuladores = defaultdict(Acumulador)
+    agregar_por_clave(acumuladores, claves, valores)
+    resumen = tabla_resumen(acumuladores, 'PG')
+    assert [fila['PG'] for fila in resumen] == [1, 2, 3]
+    assert [fila['Cantidad'] for fila in resumen] == [2, 1, 3]
+    assert resumen[2]['Probabilidad_promedio'] == pytest.approx(0.2)
+    assert resumen[0]['Probabilidad_min'] == 0.5 and resumen[0]['Probabilidad_max'] == 0.7
+
+
+def test_tabla_resumen_primera_ronda_con_fila_global():
+    acumuladores = {10: _acumulador([0.2, 0.4]), 11: _acumulador([0.6])}
+    df = tabla_resumen_ronda(1, acumuladores, 'PG_original')
+    assert list(df['Puntos']) == [10, 11, 'Estadísticas Globales']
+    assert df['Cantidad_Combinaciones'].iloc[-1] == 3
+    assert df['Probabilidad_Promedio'].iloc[-1] == pytest.approx((0.3 + 0.6) / 2)
@@ -0,0 +1,19 @@
+from openpyxl import load_workbook
+
+from truco.excel import escribir_libro_en_flujo
+
+
+def test_escribe_hojas_con_encabezados_y_anchos(tmp_path):
+    ruta = str(tmp_path / 'libro.xlsx')
+    filas = [(10, 'una mano larga', 0.25), (11, 'otra', 0.5)]
+    escribir_libro_en_flujo(ruta, [
+        ('Resumen', ['Puntos', 'Mano', 'Probabilidad'], lambda: iter(filas)),
+        ('Vacía', ['Puntos'], lambda: iter(())),
+    ])
+    libro = load_workbook(ruta)
+    assert libro.sheetnames == ['Resumen', 'Vacía']
+    hoja = libro['Resumen']
+    assert [tuple(fila) for fila in hoja.iter_rows(values_only=True)] == [('Puntos', 'Mano', 'Probabilidad')] + filas
+    assert hoja['A1'].font.bold
+    assert hoja.column_dimensions['B'].width == len('una mano larga') + 2
+    assert list(libro['Vacía'].iter_rows(values_only=True)) == [('Puntos',)]
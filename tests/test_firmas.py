@@ -0,0 +1,109 @@
+import math
+import random
+from collections import Counter
+from itertools import combinations
+
+import pytest
+
+from truco.firmas import (agrupar_por_peso, asignar_muestras, clave_estrato, enumerar_firmas, estratos_de_pg,
+                          firmas_por_pg, histograma_pg, manos_de_firma, muestrear_manos_de_firmas,
+                          muestrear_manos_estratificado, muestrear_manos_por_pg, pesos_estratificados)
+from truco.nucleo import calcular_puntos
+
+
+def test_enumerar_firmas_cubre_todas_las_manos(mazo_reducido):
+    clases = agrupar_por_peso(mazo_reducido)
+    firmas = list(enumerar_firmas(clases, 5))
+    assert len({firma for firma, _, _ in firmas}) == len(firmas)
+    assert sum(multiplicidad for _, multiplicidad, _ in firmas) == math.comb(len(mazo_reducido), 5)
+    for firma, _, suma in firmas:
+        assert sum(firma) == 5
+        assert suma == sum(peso * j for (peso, _), j in zip(clases, firma))
+
+
+def test_histograma_pg_igual_a_fuerza_bruta(mazo_reducido):
+    esperado = Counter(calcular_puntos(mano, mazo_reducido) for mano in combinations(mazo_reducido, 5))
+    assert histograma_pg(mazo_reducido, 5) == dict(esperado)
+
+
+def test_manos_de_firma_reparte_todas_las_manos(mazo_reducido):
+    clases, agrupadas = firmas_por_pg(mazo_reducido, 4)
+    manos = [mano for firmas in agrupadas.values() for firma, multiplicidad in firmas
+             for mano in manos_de_firma(mazo_reducido, clases, firma)]
+    assert Counter(manos) == Counter(combinations(mazo_reducido, 4))
+    for firma, multiplicidad in agrupadas[12]:
+        assert len(list(manos_de_firma(mazo_reducido, clases, firma))) == multiplicidad
+
+
+def test_muestrear_manos_de_firmas_distintas_y_del_pg(mazo_reducido):
+    clases, agrupadas = firmas_por_pg(mazo_reducido, 5)
+    manos = muestrear_manos_de_firmas(mazo_reducido, clases, agrupadas[30], 40, random.Random(3))
+    assert len(manos) == len(set(manos)) == 40
+    posiciones = {carta: i for i, carta in enumerate(mazo_reducido)}
+    for mano in manos:
+        assert calcular_puntos(mano, mazo_reducido) == 30
+        assert list(mano) == sorted(mano, key=posiciones.__getitem__)
+
+
+def test_muestrear_manos_de_firmas_respeta_excluir(mazo_reducido):
+    clases, agrupadas = firmas_por_pg(mazo_reducido, 5)
+    total = sum(multiplicidad for _, multiplicidad in agrupadas[30])
+    excluir = set(muestrear_manos_de_firmas(mazo_reducido, clases, agrupadas[30], 20, random.Random(1)))
+    manos = muestrear_manos_de_firmas(mazo_reducido, clases, agrupadas[30], total, random.Random(2), excluir)
+    assert len(manos) == total - 20
+    assert not excluir & set(manos)
+
+
+def test_muestrear_manos_de_firmas_uniforme(mazo_reducido):
+    # Todas las manos del PG deben salir con frecuencias parecidas
+    clases, agrupadas = firmas_por_pg(mazo_reducido, 3)
+    total = sum(multiplicidad for _, multiplicidad in agrupadas[10])
+    rng = random.Random(5)
+    repeticiones = 400 * total
+    frecuencias = Counter(mano for _ in range(repeticiones)
+                          for mano in muestrear_manos_de_firmas(mazo_reducido, clases, agrupadas[10], 1, rng))
+    assert len(frecuencias) == total
+    esperada = repeticiones / total
+    chi_cuadrado = sum((frecuencia - esperada) ** 2 / esperada for frecuencia in frecuencias.values())
+    # Muy por encima del percentil 99.9 de una chi cuadrado con total - 1 grados de libertad
+    assert chi_cuadrado < 3 * total + 30
+
+
+def test_muestrear_manos_por_pg_devuelve_todas_si_son_pocas(mazo_reducido):
+    manos_por_pg = muestrear_manos_por_pg(mazo_reducido, 3, 5, random.Random(0))
+    for pg, cantidad in histograma_pg(mazo_reducido, 3).items():
+        assert len(manos_por_pg[pg]) == min(cantidad, 5)
+
+
+def test_asignar_muestras_respeta_capacidades():
+    capacidades = {'a': 2, 'b': 50, 'c': 10}
+    asignadas = asignar_muestras({'a': 100, 'b': 1, 'c': 1}, capacidades, 20)
+    assert sum(asignadas.values()) == 20
+    assert all(asignadas[clave] <= capacidades[clave] for clave in capacidades)
+    assert asignadas['a'] == 2
+    assert asignar_muestras(capacidades, capacidades, 100) == capacidades
+    assert sum(asignar_muestras(capacidades, capacidades, 2).values()) == 2
+
+
+def test_estratos_de_pg_no_pasan_del_maximo(mazo_reducido):
+    clases, agrupadas = firmas_por_pg(mazo_reducido, 5)
+    for maximo in (1, 2, 5, 100):
+        estratos, estrato_de_clave = estratos_de_pg(clases, agrupadas[30], maximo, peso_minimo=9)
+        assert 1 <= len(estratos) <= maximo
+        assert sorted(firma for estrato in estratos for firma in estrato) == sorted(agrupadas[30])
+        for indice, estrato in enumerate(estratos):
+            assert all(estrato_de_clave[clave_estrato(clases, firma, 9)] == indice for firma, _ in estrato)
+
+
+@pytest.mark.parametrize('con_piloto', [False, True])
+def test_muestrear_manos_estratificado(mazo_reducido, con_piloto):
+    clases, agrupadas = firmas_por_pg(mazo_reducido, 5)
+    firmas = agrupadas[30]
+    total = sum(multiplicidad for _, multiplicidad in firmas)
+    evaluar = (lambda mano: sum(mazo_reducido[carta] >= 9 for carta in mano) / 5) if con_piloto else None
+    manos = muestrear_manos_estratificado(mazo_reducido, clases, firmas, 40, random.Random(4), evaluar, peso_minimo=9)
+    assert len(manos) == len(set(manos)) == 40
+    assert all(calcular_puntos(mano, mazo_reducido) == 30 for mano in manos)
+    pesos = pesos_estratificados(mazo_reducido, clases, firmas, manos, peso_minimo=9)
+    # Los pesos reconstruyen la cantidad de manos del PG
+    assert sum(pesos) == pytest.approx(total)
@@ -0,0 +1,84 @@
+import argparse
+import glob
+import os
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from truco.estadisticas import Acumulador, tabla_resumen_ronda
+from truco.fragmentos import combinar_parciales, guardar_parcial, leer_fragmento, repartir_pgs
+from truco.firmas import muestrear_manos_por_pg
+from truco.metricas import Metricas
+from truco.nucleo import calcular_puntos, cartas
+from truco.pipeline import ejecutar
+from truco.rondas import segunda_ronda
+
+
+def test_leer_fragmento():
+    assert leer_fragmento('2/4') == (2, 4)
+    for texto in ('0/4', '5/4', '2-4', 'a/b'):
+        with pytest.raises(argparse.ArgumentTypeError):
+            leer_fragmento(texto)
+
+
+def test_repartir_pgs_equilibra_y_cubre_todos():
+    manos_por_pg = {pg: [None] * cantidad for pg, cantidad in zip(range(20, 40), [9, 1, 5, 5, 3, 8, 2, 2, 7, 4] * 2)}
+    fragmentos = repartir_pgs(manos_por_pg, 3)
+    assert sorted(pg for pgs in fragmentos for pg in pgs) == sorted(manos_por_pg)
+    cargas = [sum(len(manos_por_pg[pg]) for pg in pgs) for pgs in fragmentos]
+    assert max(cargas) - min(cargas) <= max(len(manos) for manos in manos_por_pg.values())
+    assert repartir_pgs(manos_por_pg, 3) == fragmentos
+
+
+def _guardar(ruta, fragmento, parametros=None):
+    acumulador = Acumulador()
+    acumulador.agregar(fragmento[0] / 10)
+    guardar_parcial(str(ruta), parametros or {'max': 1}, fragmento, [fragmento[0]],
+                    {3: ('PG_super_reducido', 'resumen.csv', {fragmento[0]: acumulador})})
+    return str(ruta)
+
+
+def test_combinar_parciales_valida_los_fragmentos(tmp_path):
+    rutas = [_guardar(tmp_path / f'{i}.json', (i, 3)) for i in (1, 2, 3)]
+    parametros, rondas = combinar_parciales(rutas)
+    assert parametros == {'max': 1}
+    assert sorted(rondas[3][2]) == [1, 2, 3]
+    with pytest.raises(ValueError, match='Faltan'):
+        combinar_parciales(rutas[:2])
+    with pytest.raises(ValueError, match='está en'):
+        combinar_parciales(rutas + [_guardar(tmp_path / 'repetido.json', (2, 3))])
+    with pytest.raises(ValueError, match='otra ejecución'):
+        combinar_parciales(rutas[:2] + [_guardar(tmp_path / 'otra.json', (3, 3), {'max': 2})])
+
+
+def _con_claves_en_texto(df):
+    # El resumen de la ronda 1 mezcla PG con 'Estadísticas Globales': leído del CSV, todo es texto
+    return df.astype({df.columns[0]: str})
+
+
+def test_fragmentos_combinados_igual_a_una_sola_ejecucion(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    argumentos = dict(rondas=(1, 3), semilla=4, formato_detalles='csv.gz', metricas=Metricas(silencioso=True))
+    completa = ejecutar(1, 3, ruta_guardado=str(tmp_path / 'completa'), **argumentos)
+    for i in (1, 2, 3):
+        ejecutar(1, 3, ruta_guardado=str(tmp_path / 'fragmentos'), fragmento=(i, 3), **argumentos)
+    _, rondas = combinar_parciales(sorted(glob.glob(str(tmp_path / 'fragmentos' / '*parcial*.json'))))
+    assert sorted(rondas) == [1, 3]
+    for ronda, (clave, archivo_resumen, acumuladores) in rondas.items():
+        assert archivo_resumen == os.path.basename(completa[ronda][0])
+        pd.testing.assert_frame_equal(_con_claves_en_texto(tabla_resumen_ronda(ronda, acumuladores, clave)),
+                                      _con_claves_en_texto(pd.read_csv(completa[ronda][0])),
+                                      check_exact=False, rtol=1e-12)
+
+
+def test_segunda_ronda_no_depende_de_las_manos_anteriores():
+    # Lo que permite fragmentar la segunda ronda: cada mano sortea con su propio generador
+    manos = [mano for manos_pg in muestrear_manos_por_pg(cartas, 9, 1, random.Random(0)).values()
+             for mano in manos_pg][40:42]
+    sola = segunda_ronda(calcular_puntos(manos[1]), manos[1], 20, semilla=4)
+    segunda_ronda(calcular_puntos(manos[0]), manos[0], 20, semilla=4)
+    despues = segunda_ronda(calcular_puntos(manos[1]), manos[1], 20, semilla=4)
+    for columna, valores in sola.items():
+        assert np.array_equal(valores, despues[columna])
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from truco.intervalos import estimar_proporcion, intervalo_wilson, precision_alcanzada
+
+
+def test_intervalo_wilson():
+    assert intervalo_wilson(0, 0) == (0.0, 1.0)
+    inferior, superior = intervalo_wilson(5, 10)
+    assert (inferior, superior) == pytest.approx((0.2366, 0.7634), abs=1e-4)
+    assert intervalo_wilson(0, 50)[0] == 0.0 and intervalo_wilson(50, 50)[1] == 1.0
+    angosto = intervalo_wilson(500, 1000)
+    assert angosto[1] - angosto[0] < superior - inferior
+    ancho = intervalo_wilson(5, 10, confianza=0.99)
+    assert ancho[0] < inferior and ancho[1] > superior
+
+
+def test_precision_alcanzada():
+    assert precision_alcanzada(0.5, 0.46, 0.54, semiancho=0.05)
+    assert not precision_alcanzada(0.5, 0.46, 0.54, semiancho=0.03)
+    assert precision_alcanzada(0.02, 0.0195, 0.0205, error_relativo=0.05)
+    assert not precision_alcanzada(0.02, 0.01, 0.03, error_relativo=0.05)
+    assert not precision_alcanzada(0.5, 0.5, 0.5)
+
+
+def _sorteador(probabilidad, semilla=0):
+    """sortear_exitos sobre una secuencia fija de ensayos, consumida en orden."""
+    ensayos = np.random.default_rng(semilla).random(100_000) < probabilidad
+    usados = [0]
+
+    def sortear_exitos(cantidad):
+        inicio, usados[0] = usados[0], usados[0] + cantidad
+        return int(ensayos[inicio:usados[0]].sum())
+    return sortear_exitos
+
+
+def test_estimar_proporcion_se_detiene_al_alcanzar_la_precision():
+    probabilidad, inferior, superior, muestras = estimar_proporcion(_sorteador(0.0), 10_000, semiancho=0.01)
+    assert probabilidad == 0.0 and muestras < 1000
+    assert (superior - inferior) / 2 <= 0.01
+    probabilidad, inferior, superior, muestras = estimar_proporcion(_sorteador(0.5), 10_000, semiancho=0.01)
+    assert muestras == 10_000
+    assert inferior <= 0.5 <= superior
+
+
+def test_estimar_proporcion_sin_precision_usa_el_maximo():
+    assert estimar_proporcion(_sorteador(0.3), 777)[3] == 777
+
+
+def test_estimar_proporcion_sigue_una_estimacion_anterior():
+    directa = estimar_proporcion(_sorteador(0.4), 3000, semiancho=0.001)
+    sortear_exitos = _sorteador(0.4)
+    probabilidad, _, _, muestras = estimar_proporcion(sortear_exitos, 200, semiancho=0.001)
+    seguida = estimar_proporcion(sortear_exitos, 3000, semiancho=0.001, exitos=round(probabilidad * muestras),
+                                 muestras=muestras)
+    assert seguida == directa
+
+
+@pytest.mark.parametrize('maximo_anterior', [20, 50, 70, 100, 150])
+def test_estimar_proporcion_sigue_una_estimacion_cortada_por_su_maximo(maximo_anterior):
+    # Con una probabilidad cercana a 0 la precisión se alcanza temprano: seguir desde un máximo
+    # anterior no debe mirarla en totales en los que una estimación desde cero no la mira
+    for semilla in range(20):
+        directa = estimar_proporcion(_sorteador(0.02, semilla), 1000, semiancho=0.03)
+        sortear_exitos = _sorteador(0.02, semilla)
+        probabilidad, _, _, muestras = estimar_proporcion(sortear_exitos, maximo_anterior, semiancho=0.03)
+        seguida = estimar_proporcion(sortear_exitos, 1000, semiancho=0.03, exitos=round(probabilidad * muestras),
+                                     muestras=muestras)
+        assert seguida == directa
@@ -0,0 +1,27 @@
+from itertools import combinations
+
+from truco.mascaras import MazoBits, contar, indices, quitar
+
+
+def test_mascara_y_cartas_de_son_inversas(mazo_reducido):
+    mazo_bits = MazoBits(mazo_reducido)
+    for combinacion in combinations(mazo_reducido, 3):
+        mascara = mazo_bits.mascara(reversed(combinacion))
+        assert contar(mascara) == 3
+        assert mazo_bits.cartas_de(mascara) == combinacion
+        assert all(mazo_bits.contiene(mascara, carta) for carta in combinacion)
+
+
+def test_restantes_igual_a_quitar_cartas(mazo_reducido):
+    mazo_bits = MazoBits(mazo_reducido)
+    mazo = list(mazo_reducido)
+    mano, reveladas = mazo[::3], mazo[1:8:2]
+    esperadas = tuple(carta for carta in mazo if carta not in mano and carta not in reveladas)
+    assert mazo_bits.restantes(mano, reveladas) == esperadas
+    assert quitar(mazo_bits.completo, mazo_bits.mascara(mano)) == mazo_bits.mascara(mazo_bits.restantes(mano))
+
+
+def test_indices():
+    assert list(indices(0)) == []
+    assert list(indices(0b1010_0001)) == [0, 5, 7]
+    assert list(indices(1 << 39)) == [39]
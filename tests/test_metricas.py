@@ -0,0 +1,51 @@
+import json
+import math
+
+import pytest
+
+from truco.metricas import Latencias, Metricas
+
+
+def test_contadores_etapas_y_resumen(tmp_path):
+    metricas = Metricas(silencioso=True)
+    metricas.contar('manos')
+    metricas.contar('manos', 4)
+    with metricas.etapa('calculo'):
+        pass
+    with pytest.raises(ZeroDivisionError), metricas.etapa('calculo'):
+        1 / 0
+    resumen = metricas.resumen()
+    assert resumen['contadores'] == {'manos': 5}
+    assert set(resumen['segundos_por_etapa']) == {'calculo'}
+    ruta = tmp_path / 'metricas.json'
+    metricas.guardar_json(str(ruta))
+    assert json.loads(ruta.read_text(encoding='utf-8'))['contadores'] == {'manos': 5}
+
+
+def test_progreso_respeta_intervalo_y_silencioso(capsys):
+    mensajes = []
+    metricas = Metricas(intervalo=0, reportar=mensajes.append)
+    metricas.progreso(lambda: 'uno')
+    metricas.progreso(lambda: 'dos')
+    assert mensajes == ['uno', 'dos']
+    lenta = Metricas(intervalo=3600, reportar=mensajes.append)
+    lenta.progreso(lambda: 'tres')
+    silenciosa = Metricas(intervalo=0, silencioso=True, reportar=mensajes.append)
+    silenciosa.progreso(lambda: 'cuatro')
+    silenciosa.mostrar('cinco')
+    assert mensajes == ['uno', 'dos']
+    assert capsys.readouterr().out == ''
+
+
+def test_percentiles_de_latencias():
+    latencias = Latencias(capacidad=100)
+    assert math.isnan(latencias.percentil(50))
+    assert latencias.resumen()['cantidad'] == 0
+    for milisegundos in range(1, 201):
+        latencias.agregar(milisegundos / 1000)
+    # Solo quedan las últimas 100: de 101 a 200 ms
+    resumen = latencias.resumen()
+    assert resumen['cantidad'] == 100
+    assert resumen['p50_ms'] == pytest.approx(150)
+    assert resumen['p99_ms'] == pytest.approx(199)
+    assert resumen['maximo_ms'] == pytest.approx(200)
@@ -0,0 +1,36 @@
+import random
+from collections import Counter
+
+from truco.muestreo import ReservorioPorClave
+
+
+def test_muestra_todos_si_son_pocos():
+    reservorio = ReservorioPorClave(5, random.Random(0))
+    for elemento in range(3):
+        reservorio.agregar('a', elemento)
+    assert reservorio.muestras() == {'a': [0, 1, 2]}
+    assert reservorio.vistos() == {'a': 3}
+
+
+def test_muestra_distinta_por_clave():
+    reservorio = ReservorioPorClave(4, random.Random(1))
+    for elemento in range(1000):
+        reservorio.agregar(elemento % 3, elemento)
+    assert reservorio.vistos() == {0: 334, 1: 333, 2: 333}
+    for clave, muestra in reservorio.muestras().items():
+        assert len(muestra) == len(set(muestra)) == 4
+        assert all(elemento % 3 == clave for elemento in muestra)
+
+
+def test_muestra_uniforme():
+    # Cada uno de los 20 elementos del flujo debe quedar en la muestra con probabilidad 5 / 20
+    rng = random.Random(2)
+    repeticiones = 4000
+    frecuencias = Counter()
+    for _ in range(repeticiones):
+        reservorio = ReservorioPorClave(5, rng)
+        for elemento in range(20):
+            reservorio.agregar(None, elemento)
+        frecuencias.update(reservorio.muestras()[None])
+    esperada = repeticiones * 5 / 20
+    assert all(abs(frecuencias[elemento] - esperada) < 0.1 * esperada for elemento in range(20))
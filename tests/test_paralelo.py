@@ -0,0 +1,17 @@
+from truco.conteo import distribucion_sumas
+from truco.paralelo import derivar_semilla, mapear_tareas
+
+
+def test_derivar_semilla_depende_solo_de_la_semilla_y_la_clave():
+    assert derivar_semilla(0, 2, 123) == derivar_semilla(0, 2, 123)
+    semillas = {derivar_semilla(semilla, ronda, mano) for semilla in range(3) for ronda in (2, 3) for mano in range(50)}
+    assert len(semillas) == 300
+    assert all(0 <= semilla < 2 ** 64 for semilla in semillas)
+
+
+def test_procesos_dan_lo_mismo_que_en_serie(mazo_reducido):
+    pesos = list(mazo_reducido.values())
+    tareas = [(pesos[inicio:], k) for inicio in range(5) for k in (2, 4, 6)]
+    en_serie = list(mapear_tareas(distribucion_sumas, tareas))
+    assert en_serie == [distribucion_sumas(*argumentos) for argumentos in tareas]
+    assert list(mapear_tareas(distribucion_sumas, tareas, procesos=2)) == en_serie
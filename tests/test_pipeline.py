@@ -0,0 +1,28 @@
+import os
+
+import pandas as pd
+
+from truco.escritura import leer_detalles
+from truco.metricas import Metricas
+from truco.pipeline import ejecutar
+
+
+def test_igual_a_los_scripts(tmp_path, monkeypatch, cargar_script):
+    monkeypatch.chdir(tmp_path)
+    salidas = ejecutar(1, 4, rondas=(1, 3), semilla=3, ruta_guardado=str(tmp_path / 'pipeline'),
+                       formato_detalles='csv.gz', metricas=Metricas(silencioso=True))
+    cargar_script('truco probs tercera ronda.py').analizar_probabilidades_tercera_ronda(
+        1, 4, semilla=3, formato_detalles='csv.gz', metricas=Metricas(silencioso=True))
+    archivo_resumen, directorio_detalles = salidas[3]
+    nombre = os.path.join('E:\\TRUCO', 'probabilidades_tercera_ronda_{}_1_4')
+    pd.testing.assert_frame_equal(leer_detalles(directorio_detalles), leer_detalles(nombre.format('detalles')))
+    pd.testing.assert_frame_equal(pd.read_csv(archivo_resumen), pd.read_csv(nombre.format('resumen') + '.csv'))
+
+    # Ronda 1: columnas de la hoja Resumen y una fila por PG más la global
+    archivo_resumen, directorio_detalles = salidas[1]
+    resumen = pd.read_csv(archivo_resumen)
+    detalles = leer_detalles(directorio_detalles)
+    assert list(resumen.columns) == ['Puntos', 'Cantidad_Combinaciones', 'Probabilidad_Promedio', 'Probabilidad_Min',
+                                     'Probabilidad_Max', 'Desviacion_Estandar']
+    assert len(resumen) == detalles['PG_original'].nunique() + 1
+    assert resumen['Cantidad_Combinaciones'].iloc[-1] == len(detalles)
@@ -0,0 +1,34 @@
+from collections import defaultdict
+from itertools import combinations
+
+import pytest
+
+from truco import poblacion
+from truco.cache_probabilidades import CacheProbabilidades
+from truco.estadisticas import Acumulador
+from truco.metricas import Metricas
+from truco.poblacion import RONDAS_POBLACION, resumen_poblacion
+
+
+@pytest.mark.parametrize('ronda', [1, 2, 3])
+def test_igual_a_recorrer_todos_los_pares(mazo_reducido, monkeypatch, ronda):
+    # Manos de 3 cartas de un mazo de 14 para que recorrer todos los pares (mano, reveladas) sea rápido
+    monkeypatch.setattr(poblacion, 'CARTAS_MANO', 3)
+    mazo = dict(list(mazo_reducido.items())[:14])
+    reveladas, _, _ = RONDAS_POBLACION[ronda]
+    cache = CacheProbabilidades(mazo)
+    esperados = defaultdict(Acumulador)
+    for mano in combinations(mazo, 3):
+        resto = [carta for carta in mazo if carta not in mano]
+        for cartas_reveladas in combinations(resto, reveladas):
+            pesos = [mazo[carta] for carta in mano + cartas_reveladas]
+            clave = sum(mazo[carta] for carta in mano) - sum(mazo[carta] for carta in cartas_reveladas)
+            esperados[clave].agregar(cache.probabilidad(ronda, pesos, clave))
+    obtenidos = resumen_poblacion(ronda, mazo, firmas_por_bloque=7, metricas=Metricas(silencioso=True))
+    assert sorted(obtenidos) == sorted(esperados)
+    for clave, esperado in esperados.items():
+        obtenido = obtenidos[clave]
+        assert obtenido.cantidad == esperado.cantidad
+        assert (obtenido.minimo, obtenido.maximo) == (esperado.minimo, esperado.maximo)
+        assert obtenido.promedio == pytest.approx(esperado.promedio, abs=1e-12)
+        assert obtenido.desviacion_std == pytest.approx(esperado.desviacion_std, abs=1e-6)
@@ -0,0 +1,82 @@
+import os
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from truco.escritura import EscritorColumnar, leer_detalles
+from truco.metricas import Metricas
+from truco.puntos_control import (PuntosControlPeriodicos, cargar_punto_control, eliminar_punto_control,
+                                  guardar_punto_control)
+
+COLUMNAS = {'Fila': 'int64'}
+
+
+def test_guardar_y_cargar(tmp_path):
+    ruta = str(tmp_path / 'estado.punto_control')
+    assert cargar_punto_control(ruta, {'max': 1}) is None
+    guardar_punto_control(ruta, {'max': 1}, {'siguiente': (20, 3)})
+    assert cargar_punto_control(ruta, {'max': 1}) == {'siguiente': (20, 3)}
+    assert cargar_punto_control(ruta, {'max': 2}) is None
+    eliminar_punto_control(ruta)
+    assert not os.path.exists(ruta)
+
+
+def test_punto_control_corrupto(tmp_path):
+    ruta = tmp_path / 'estado.punto_control'
+    ruta.write_bytes(b'a medio escribir')
+    assert cargar_punto_control(str(ruta), {}) is None
+
+
+def test_reanudar_escritor_descarta_lo_escrito_despues_del_punto_control(tmp_path):
+    ruta_detalles = str(tmp_path / 'detalles')
+    ruta = str(tmp_path / 'estado.punto_control')
+    escritor = EscritorColumnar(ruta_detalles, COLUMNAS, filas_por_lote=4, formato='csv.gz')
+    puntos_control = PuntosControlPeriodicos(escritor, intervalo=3600)
+    for fila in range(10):
+        escritor.agregar(Fila=fila)
+        puntos_control.guardar_si_corresponde(ruta, {}, lambda: {'siguiente': fila + 1, 'escritor': escritor.estado()})
+    # Corte: las partes escritas después del último punto de control no deben contar
+    escritor.agregar_lote(Fila=np.arange(10, 13))
+    escritor.vaciar()
+
+    estado = cargar_punto_control(ruta, {})
+    assert estado['siguiente'] == 8
+    escritor = EscritorColumnar(ruta_detalles, COLUMNAS, filas_por_lote=4, formato='csv.gz', conservar_partes=True)
+    escritor.restaurar(estado['escritor'])
+    for fila in range(estado['siguiente'], 12):
+        escritor.agregar(Fila=fila)
+    escritor.cerrar()
+    assert leer_detalles(ruta_detalles)['Fila'].tolist() == list(range(12))
+
+
+def test_tercera_ronda_reanudada_igual_a_sin_interrupciones(tmp_path, monkeypatch, cargar_script):
+    monkeypatch.chdir(tmp_path)
+    script = cargar_script('truco probs tercera ronda.py')
+    analizar = partial(script.analizar_probabilidades_tercera_ronda, 1, 4, semilla=3, formato_detalles='csv.gz',
+                       metricas=Metricas(silencioso=True))
+    nombre = os.path.join('E:\\TRUCO', 'probabilidades_tercera_ronda_{}_1_4')
+    analizar()
+    detalles = leer_detalles(nombre.format('detalles'))
+    resumen = pd.read_csv(nombre.format('resumen') + '.csv')
+
+    # Un punto de control por mano y un corte en la mano 30
+    monkeypatch.setattr(script, 'PuntosControlPeriodicos', partial(PuntosControlPeriodicos, intervalo=0))
+    tercera_ronda = script.tercera_ronda
+    llamadas = []
+
+    def cortar_en_la_mano_30(*argumentos):
+        llamadas.append(argumentos)
+        if len(llamadas) == 30:
+            raise KeyboardInterrupt
+        return tercera_ronda(*argumentos)
+    monkeypatch.setattr(script, 'tercera_ronda', cortar_en_la_mano_30)
+    with pytest.raises(KeyboardInterrupt):
+        analizar()
+    assert os.path.exists(nombre.format('detalles') + '.punto_control')
+    analizar(reanudar=True)
+    assert len(llamadas) == 30 + len(detalles['Combinacion_9'].unique()) - 29
+    pd.testing.assert_frame_equal(leer_detalles(nombre.format('detalles')), detalles)
+    pd.testing.assert_frame_equal(pd.read_csv(nombre.format('resumen') + '.csv'), resumen)
+    assert not os.path.exists(nombre.format('detalles') + '.punto_control')
@@ -0,0 +1,64 @@
+import math
+import random
+from itertools import combinations
+
+import numpy as np
+
+from truco.cache_probabilidades import CacheProbabilidades
+from truco.colex import combinacion_de_rango
+from truco.nucleo import calcular_puntos, cartas
+from truco.rondas import segunda_ronda, tercera_ronda
+from truco.vectorizado import indices_combinaciones, pesos_de, puntuar_lote
+
+MAZO = list(cartas)
+
+
+def _mano(semilla):
+    mano = tuple(random.Random(semilla).sample(list(cartas), 9))
+    return calcular_puntos(mano), mano
+
+
+def test_segunda_ronda_secuencial_se_detiene_antes_y_sigue_el_mismo_sorteo():
+    pg, mano = _mano(0)
+    fija = segunda_ronda(pg, mano, 400, semilla=1)
+    secuencial = segunda_ronda(pg, mano, 400, semilla=1, semiancho=0.05)
+    assert (fija['Muestras'] == 400).all()
+    assert secuencial['Muestras'].max() <= 400 and secuencial['Muestras'].sum() < fija['Muestras'].sum()
+    detenidas = secuencial['Muestras'] < 400
+    assert ((secuencial['IC_superior'] - secuencial['IC_inferior'])[detenidas] / 2 <= 0.05).all()
+    # Las filas que llegaron al máximo sortearon las mismas manos que con el límite fijo
+    completas = ~detenidas
+    assert completas.any()
+    assert np.array_equal(secuencial['Probabilidad'][completas], fija['Probabilidad'][completas])
+    assert ((secuencial['IC_inferior'] <= secuencial['Probabilidad'])
+            & (secuencial['Probabilidad'] <= secuencial['IC_superior'])).all()
+    assert math.isclose(secuencial['Probabilidad'].mean(), fija['Probabilidad'].mean(), abs_tol=0.02)
+
+
+def test_tercera_ronda_igual_a_fuerza_bruta():
+    pg, mano = _mano(2)
+    filas = tercera_ronda(pg, mano, 40, semilla=5)
+    assert len(filas['Probabilidad']) == len(set(filas['Cartas_rival_6'].tolist())) == 40
+    for rango_6, pg_super_reducido, probabilidad in zip(
+            filas['Cartas_rival_6'], filas['PG_super_reducido'], filas['Probabilidad']):
+        reveladas = combinacion_de_rango(rango_6, 6, MAZO)
+        assert not set(reveladas) & set(mano)
+        assert pg_super_reducido == pg - calcular_puntos(reveladas)
+        restantes = [cartas[carta] for carta in MAZO if carta not in mano and carta not in reveladas]
+        menores = sum(1 for combinacion in combinations(restantes, 3) if sum(combinacion) < pg_super_reducido)
+        assert probabilidad == menores / math.comb(25, 3)
+
+
+def test_segunda_ronda_exacta_igual_a_fuerza_bruta():
+    pg, mano = _mano(3)
+    filas = segunda_ronda(pg, mano, 0, cache_probabilidades=CacheProbabilidades(cartas))
+    assert len(filas['Probabilidad']) == math.comb(31, 3)
+    assert (filas['Muestras'] == 0).all()
+    assert np.array_equal(filas['IC_inferior'], filas['Probabilidad'])
+    indices_6 = indices_combinaciones(28, 6)
+    for fila in range(0, len(filas['Probabilidad']), 997):
+        reveladas = combinacion_de_rango(filas['Cartas_rival_3'][fila], 3, MAZO)
+        restantes = [carta for carta in MAZO if carta not in mano and carta not in reveladas]
+        puntos_6 = puntuar_lote(indices_6, pesos_de(restantes, cartas))
+        assert filas['PG_reducido'][fila] == pg - calcular_puntos(reveladas)
+        assert filas['Probabilidad'][fila] == (puntos_6 < filas['PG_reducido'][fila]).sum() / len(indices_6)
@@ -0,0 +1,98 @@
+import json
+import math
+import random
+import threading
+import urllib.error
+import urllib.request
+from itertools import combinations
+
+import pytest
+
+from truco.cache_probabilidades import CacheProbabilidades
+from truco.nucleo import calcular_puntos
+from truco.servidor import EvaluadorConsultas, crear_servidor
+
+
+def _fuerza_bruta(mazo, mano, reveladas):
+    restantes = [peso for carta, peso in mazo.items() if carta not in mano and carta not in reveladas]
+    umbral = calcular_puntos(mano, mazo) - calcular_puntos(reveladas, mazo)
+    k = 9 - len(reveladas)
+    if not reveladas:
+        favorables = sum(1 for combinacion in combinations(restantes, k) if sum(combinacion) > umbral)
+    else:
+        favorables = sum(1 for combinacion in combinations(restantes, k) if sum(combinacion) < umbral)
+    return favorables / math.comb(len(restantes), k)
+
+
+def _consultas(mazo, cantidad, semilla=0):
+    rng = random.Random(semilla)
+    consultas = []
+    for _ in range(cantidad):
+        cartas = rng.sample(list(mazo), 15)
+        consultas.append({'mano': cartas[:9], 'reveladas': cartas[9:9 + rng.choice((0, 3, 6))]})
+    return consultas
+
+
+def test_lote_igual_a_fuerza_bruta(mazo_reducido):
+    consultas = _consultas(mazo_reducido, 60)
+    consultas += consultas[:10]
+    cache = CacheProbabilidades(mazo_reducido)
+    resultados = EvaluadorConsultas(mazo_reducido, cache).evaluar(consultas)
+    for consulta, resultado in zip(consultas, resultados):
+        assert resultado['ronda'] == {0: 1, 3: 2, 6: 3}[len(consulta['reveladas'])]
+        assert resultado['probabilidad'] == pytest.approx(
+            _fuerza_bruta(mazo_reducido, consulta['mano'], consulta['reveladas']), abs=1e-15)
+    # Las consultas repetidas de las rondas 1 y 2 se resuelven una sola vez por lote
+    claves = {(len(consulta['reveladas']), tuple(sorted(consulta['mano'])), tuple(sorted(consulta['reveladas'])))
+              for consulta in consultas if len(consulta['reveladas']) < 6}
+    assert cache.aciertos == 0 and cache.fallos <= len(claves)
+
+
+def test_segundo_lote_sale_de_la_cache(mazo_reducido):
+    consultas = [consulta for consulta in _consultas(mazo_reducido, 30, semilla=1) if len(consulta['reveladas']) < 6]
+    cache = CacheProbabilidades(mazo_reducido)
+    evaluador = EvaluadorConsultas(mazo_reducido, cache)
+    primeros = evaluador.evaluar(consultas)
+    fallos = cache.fallos
+    assert evaluador.evaluar(consultas) == primeros
+    assert cache.fallos == fallos and cache.aciertos > 0
+
+
+@pytest.mark.parametrize('consulta', [
+    {'reveladas': []},
+    {'mano': ['1E'] * 9},
+    {'mano': ['4E', '4O', '4B', '5E', '5O', '6E', '6O', '7B']},
+    {'mano': ['4E', '4O', '4B', '5E', '5O', '6E', '6O', '7B', '10E'], 'reveladas': ['1E', '1B']},
+    {'mano': ['4E', '4O', '4B', '5E', '5O', '6E', '6O', '7B', 'XX']},
+    {'mano': ['4E', '4O', '4B', '5E', '5O', '6E', '6O', '7B', '10E'], 'reveladas': ['10E', '1B', '1E']},
+    'no es un objeto',
+])
+def test_consultas_invalidas(mazo_reducido, consulta):
+    with pytest.raises(ValueError):
+        EvaluadorConsultas(mazo_reducido, CacheProbabilidades(mazo_reducido)).evaluar([consulta])
+
+
+def test_servidor_http():
+    servidor = crear_servidor(puerto=0)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    url = f'http://127.0.0.1:{servidor.server_address[1]}'
+    try:
+        cuerpo = json.dumps({'consultas': [
+            {'mano': ['1E', '1B', '7E', '7O', '3E', '3O', '3B', '3C', '2E']},
+            {'mano': ['4E', '4O', '4B', '4C', '5E', '5O', '5B', '5C', '6E'], 'reveladas': ['1E', '1B', '7E']},
+        ]}).encode('utf-8')
+        with urllib.request.urlopen(urllib.request.Request(url + '/probabilidades', data=cuerpo)) as respuesta:
+            resultados = json.load(respuesta)['resultados']
+        assert [resultado['ronda'] for resultado in resultados] == [1, 2]
+        assert resultados[0]['probabilidad'] == 0.0
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(urllib.request.Request(url + '/probabilidades', data=b'{"consultas": 3}'))
+        assert error.value.code == 400
+        with urllib.request.urlopen(url + '/metricas') as respuesta:
+            metricas = json.load(respuesta)
+        assert metricas['contadores'] == {'lotes': 1, 'consultas': 2, 'lotes_rechazados': 1}
+        assert metricas['latencias_lote']['cantidad'] == 2
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
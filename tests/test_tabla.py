@@ -0,0 +1,35 @@
+import pytest
+
+from truco.cache_probabilidades import CacheProbabilidades
+from truco.tabla import TablaProbabilidades, construir_tabla
+
+
+@pytest.fixture(scope='module')
+def tabla(mazo_reducido, tmp_path_factory):
+    ruta = str(tmp_path_factory.mktemp('tabla') / 'tabla.bin')
+    construir_tabla(mazo_reducido, ruta)
+    with TablaProbabilidades(ruta) as tabla:
+        yield tabla
+
+
+@pytest.mark.parametrize('ronda, cantidad_quitadas', [(1, 9), (2, 12), (3, 15)])
+def test_igual_a_la_cache_exacta(mazo_reducido, tabla, ronda, cantidad_quitadas):
+    cache = CacheProbabilidades(mazo_reducido)
+    mazo = list(mazo_reducido)
+    for inicio in range(0, len(mazo) - cantidad_quitadas + 1):
+        pesos = [mazo_reducido[carta] for carta in mazo[inicio:inicio + cantidad_quitadas]]
+        for umbral in (-5, 0, 10, 30, 60, 200):
+            assert tabla.probabilidad_por_pesos(ronda, umbral, pesos) == pytest.approx(
+                cache.probabilidad(ronda, pesos, umbral), abs=1e-15)
+
+
+def test_rechaza_firmas_de_otra_ronda(mazo_reducido, tabla):
+    with pytest.raises(ValueError):
+        tabla.probabilidad_por_pesos(2, 30, [mazo_reducido[carta] for carta in list(mazo_reducido)[:9]])
+
+
+def test_rechaza_archivos_que_no_son_tablas(tmp_path):
+    ruta = tmp_path / 'otra.bin'
+    ruta.write_bytes(b'no es una tabla')
+    with pytest.raises(ValueError):
+        TablaProbabilidades(str(ruta))
@@ -0,0 +1,59 @@
+import math
+from collections import Counter
+from itertools import combinations
+
+import numpy as np
+
+from truco.vectorizado import (codificar, contar_menores_por_clases, conteos_por_clase, decodificar,
+                               distribuciones_sumas, indices_combinaciones, pesos_de, puntuar_lote)
+
+
+def _clases(mazo):
+    return np.array(sorted(set(mazo.values())), dtype=np.int16)
+
+
+def test_puntuar_lote_igual_a_sumar_cartas(mazo_reducido):
+    mazo = list(mazo_reducido)
+    combinaciones = list(combinations(mazo, 3))
+    indices = codificar(combinaciones, mazo)
+    assert decodificar(indices[7], mazo) == combinaciones[7]
+    puntos = puntuar_lote(indices, pesos_de(mazo, mazo_reducido))
+    assert puntos.tolist() == [sum(mazo_reducido[carta] for carta in combinacion) for combinacion in combinaciones]
+    assert indices_combinaciones(len(mazo), 3).tolist() == [list(c) for c in combinations(range(len(mazo)), 3)]
+
+
+def test_conteos_por_clase(mazo_reducido):
+    clases = _clases(mazo_reducido)
+    pesos = np.array([[1, 1, 14], [2, 3, 3]], dtype=np.int16)
+    conteos = conteos_por_clase(pesos, clases)
+    assert conteos.shape == (2, len(clases))
+    assert dict(zip(clases.tolist(), conteos[0].tolist())) == {**dict.fromkeys(clases.tolist(), 0), 1: 2, 14: 1}
+
+
+def _manos_quitadas(mazo_reducido, cantidad):
+    """Algunas manos de cantidad cartas quitadas del mazo reducido, con el conteo por clase de lo que queda."""
+    mazo = list(mazo_reducido)
+    manos = [mazo[inicio:inicio + cantidad] for inicio in range(0, len(mazo) - cantidad + 1, 3)]
+    clases = _clases(mazo_reducido)
+    quitadas = np.array([pesos_de(mano, mazo_reducido) for mano in manos])
+    conteos = conteos_por_clase(pesos_de(mazo, mazo_reducido)[None, :], clases) - conteos_por_clase(quitadas, clases)
+    restantes = [[mazo_reducido[carta] for carta in mazo if carta not in mano] for mano in manos]
+    return clases, conteos, restantes
+
+
+def test_contar_menores_por_clases_igual_a_fuerza_bruta(mazo_reducido):
+    clases, conteos, restantes = _manos_quitadas(mazo_reducido, 6)
+    umbrales = np.arange(len(restantes)) * 3 + 10
+    menores = contar_menores_por_clases(conteos, clases, 3, umbrales, filas_por_bloque=2)
+    esperados = [sum(1 for combinacion in combinations(pesos, 3) if sum(combinacion) < umbral)
+                 for pesos, umbral in zip(restantes, umbrales)]
+    assert menores.tolist() == esperados
+
+
+def test_distribuciones_sumas_igual_a_fuerza_bruta(mazo_reducido):
+    clases, conteos, restantes = _manos_quitadas(mazo_reducido, 9)
+    distribuciones = distribuciones_sumas(conteos, clases, 4)
+    for distribucion, pesos in zip(distribuciones, restantes):
+        esperada = Counter(sum(combinacion) for combinacion in combinations(pesos, 4))
+        assert {suma: cantidad for suma, cantidad in enumerate(distribucion.tolist()) if cantidad} == dict(esperada)
+        assert distribucion.sum() == math.comb(len(pesos), 4)
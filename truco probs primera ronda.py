@@ -9,39 +9,36 @@ import random
 import os
 import tempfile
 import shutil
+import sys
+from functools import partial
 
-# Definición de las cartas y sus ponderaciones
-cartas = {
-    '4E': 1, '4O': 1, '4B': 1, '4C': 1,
-    '5E': 2, '5O': 2, '5B': 2, '5C': 2,
-    '6E': 3, '6O': 3, '6B': 3, '6C': 3,
-    '7B': 4, '7C': 4,
-    '10E': 5, '10O': 5, '10B': 5, '10C': 5,
-    '11E': 6, '11O': 6, '11B': 6, '11C': 6,
-    '12E': 7, '12O': 7, '12B': 7, '12C': 7,
-    '1C': 8, '1O': 8,
-    '2E': 9, '2O': 9, '2B': 9, '2C': 9,
-    '3E': 10, '3O': 10, '3B': 10, '3C': 10,
-    '7O': 11,
-    '7E': 12,
-    '1B': 13,
-    '1E': 14
-}
+from truco.ampliacion import manos_nuevas, validar_limites
+from truco.cache_manos import obtener_manos_por_pg
+from truco.cache_probabilidades import CacheProbabilidades
+from truco.colex import combinacion_de_rango, rango_de_combinacion
+from truco.estadisticas import resumen_primera_ronda
+from truco.excel import escribir_libro_en_flujo
+from truco.firmas import (firmas_por_pg, histograma_pg, muestrear_manos_de_firmas, muestrear_manos_estratificado,
+                          pesos_estratificados)
+from truco.mascaras import MazoBits, quitar
+from truco.metricas import Metricas
+from truco.nucleo import calcular_puntos, cartas, formatear_combinacion
+from truco.muestreo import ReservorioPorClave
+from truco.paralelo import mapear_tareas
 
-def calcular_puntos(combinacion):
-    return sum(cartas[carta] for carta in combinacion)
+# Máscaras de bits sobre el mismo orden de cartas
+mazo_bits = MazoBits(cartas)
 
-def formatear_combinacion(combinacion):
-    """Formatea una combinación de cartas para mostrarla de manera legible"""
-    return ' '.join(sorted(combinacion))
+# Probabilidades exactas ya calculadas, por firma de ponderaciones
+cache_probabilidades = CacheProbabilidades(cartas)
 
 def obtener_letra_combinacion(indice):
-    """Convierte un índice en una letra o serie de letras (A, B, C, ..., Z, AA, AB, ...)"""
-    if indice <= 26:
-        return string.ascii_uppercase[indice - 1]
-    else:
-        q, r = divmod(indice - 1, 26)
-        return string.ascii_uppercase[q - 1] + string.ascii_uppercase[r]
+    """Convierte un índice en una letra o serie de letras (A, B, C, ..., Z, AA, AB, ..., ZZ, AAA, ...)"""
+    letras = ''
+    while indice > 0:
+        indice, resto = divmod(indice - 1, 26)
+        letras = string.ascii_uppercase[resto] + letras
+    return letras
 
 def obtener_numero_combinaciones():
     """
@@ -58,160 +55,212 @@ def obtener_numero_combinaciones():
         except ValueError:
             print("Por favor, ingrese un número válido.")
 
-def encontrar_combinaciones_representativas(combinaciones, maximo_representantes):
+def encontrar_combinaciones_representativas(mazo, clases, firmas, maximo_representantes, rng=random):
     """
-    Selecciona aleatoriamente combinaciones hasta maximo_representantes.
+    Selecciona aleatoriamente combinaciones distintas hasta maximo_representantes entre
+    todas las manos que representan las firmas de un PG.
     Si hay menos combinaciones que maximo_representantes, devuelve todas.
     """
-    if len(combinaciones) <= maximo_representantes:
-        return combinaciones
-    return random.sample(combinaciones, maximo_representantes)
+    return muestrear_manos_de_firmas(mazo, clases, firmas, maximo_representantes, rng)
 
-def calcular_combinaciones_por_pg(max_combinaciones):
+def agrupar_combinaciones_en_flujo(max_combinaciones, semilla=0, metricas=None):
     """
-    Calcula combinaciones posibles y las agrupa por PG.
-    Para PG con menos combinaciones que max_combinaciones, analiza todas.
-    Para PG con más combinaciones, selecciona las más representativas.
+    Recorre una sola vez todas las combinaciones de 9 cartas y conserva, para cada PG,
+    una muestra uniforme de hasta max_combinaciones combinaciones (muestreo de reservorio).
+    La memoria queda acotada por la cantidad de PG por max_combinaciones.
+    Devuelve las combinaciones elegidas y el total de combinaciones por PG.
     """
+    if metricas is None:
+        metricas = Metricas()
     todas_las_cartas = list(cartas.keys())
-    combinaciones_por_pg = defaultdict(list)
+    reservorio = ReservorioPorClave(max_combinaciones, random.Random(semilla))
     total_combinaciones = math.comb(len(todas_las_cartas), 9)
     procesadas = 0
     
-    print(f"Calculando combinaciones iniciales...")
-    inicio = time.time()
-    
-    # Primera pasada: recolectar todas las combinaciones por PG
     for combinacion in combinations(todas_las_cartas, 9):
-        pg = calcular_puntos(combinacion)
-        combinaciones_por_pg[pg].append(combinacion)
+        reservorio.agregar(calcular_puntos(combinacion), combinacion)
         
         procesadas += 1
+        # Se consulta el reloj cada 10000 combinaciones; el progreso se muestra según el intervalo de metricas
         if procesadas % 10000 == 0:
-            porcentaje = (procesadas / total_combinaciones) * 100
-            print(f"\rAgrupando combinaciones: {porcentaje:.1f}% - Combinaciones procesadas: {procesadas:,}", end="")
-    
-    print("\nSeleccionando combinaciones para análisis...")
+            metricas.progreso(lambda: (
+                f"Agrupando combinaciones: {procesadas / total_combinaciones * 100:.1f}% - "
+                f"Combinaciones procesadas: {procesadas:,} ({procesadas / metricas.transcurrido:,.0f}/s)"))
+    metricas.contar('combinaciones_9_cartas_recorridas', procesadas)
     
-    # Segunda pasada: seleccionar las combinaciones para análisis
-    representativas_por_pg = {}
-    for pg, combinaciones in combinaciones_por_pg.items():
-        total_combinaciones_pg = len(combinaciones)
-        if total_combinaciones_pg <= max_combinaciones:
-            print(f"\rPG {pg}: Analizando todas las {total_combinaciones_pg} combinaciones...", end="")
-            representativas_por_pg[pg] = combinaciones
+    return reservorio.muestras(), reservorio.vistos()
+
+def calcular_combinaciones_por_pg(max_combinaciones, recorrido_completo=False, semilla=0, metricas=None,
+                                  estratificacion=None):
+    """
+    Calcula combinaciones posibles y las agrupa por PG.
+    Para PG con menos combinaciones que max_combinaciones, analiza todas.
+    Para PG con más combinaciones, selecciona las más representativas.
+    Por defecto recorre firmas de ponderaciones en lugar de las 273 millones de combinaciones
+    y reutiliza la selección guardada en la caché para (max_combinaciones, semilla);
+    con recorrido_completo=True recorre todas las combinaciones en una sola pasada con memoria acotada.
+    Con estratificacion='proporcional' o 'neyman' la selección es estratificada por cartas altas
+    (ver truco.firmas.muestrear_manos_estratificado).
+    """
+    if metricas is None:
+        metricas = Metricas()
+    metricas.mostrar(f"Calculando combinaciones iniciales...")
+    if recorrido_completo:
+        if estratificacion is not None:
+            raise ValueError("La selección estratificada no se puede usar con recorrido_completo")
+        representativas_por_pg, total_por_pg = agrupar_combinaciones_en_flujo(max_combinaciones, semilla, metricas)
+        representativas_por_pg = {pg: representativas_por_pg[pg] for pg in sorted(representativas_por_pg)}
+    else:
+        if estratificacion is None:
+            seleccionar, metodo = encontrar_combinaciones_representativas, 'uniforme'
+        elif estratificacion == 'proporcional':
+            seleccionar, metodo = muestrear_manos_estratificado, 'estratificado'
+        elif estratificacion == 'neyman':
+            todas_las_cartas = list(cartas.keys())
+            seleccionar = partial(muestrear_manos_estratificado,
+                                  evaluar=lambda mano: calcular_probabilidad_condicional(mano, todas_las_cartas))
+            metodo = 'neyman'
         else:
-            print(f"\rPG {pg}: Seleccionando {max_combinaciones} combinaciones representativas de {total_combinaciones_pg}...", end="")
-            representativas = encontrar_combinaciones_representativas(combinaciones, maximo_representantes=max_combinaciones)
-            representativas_por_pg[pg] = representativas
+            raise ValueError(f"Estratificación desconocida: {estratificacion}")
+        representativas_por_pg = obtener_manos_por_pg(cartas, max_combinaciones, semilla, seleccionar=seleccionar,
+                                                      metodo=metodo, metricas=metricas)
+        total_por_pg = histograma_pg(cartas, 9)
     
-    print("\n\nResumen de combinaciones por PG:")
+    metricas.mostrar("\nResumen de combinaciones por PG:")
     for pg in sorted(representativas_por_pg.keys()):
-        num_original = len(combinaciones_por_pg[pg])
+        num_original = total_por_pg[pg]
         num_final = len(representativas_por_pg[pg])
         if num_original <= max_combinaciones:
-            print(f"PG {pg}: Analizando todas las {num_final} combinaciones disponibles.")
+            metricas.mostrar(f"PG {pg}: Analizando todas las {num_final} combinaciones disponibles.")
         else:
-            print(f"PG {pg}: Analizando {max_combinaciones} combinaciones representativas de {num_original} totales.")
+            metricas.mostrar(f"PG {pg}: Analizando {max_combinaciones} combinaciones representativas de {num_original:,} totales.")
     
-    print(f"\nSe procesarán combinaciones para {len(representativas_por_pg)} valores de PG diferentes")
+    metricas.mostrar(f"\nSe procesarán combinaciones para {len(representativas_por_pg)} valores de PG diferentes")
     return representativas_por_pg
 
-def calcular_probabilidad_condicional(combinacion_base, todas_las_cartas, max_muestras=10000):
+def calcular_probabilidad_condicional(combinacion_base, todas_las_cartas):
     """
-    Calcula la probabilidad de que una combinación del mazo restante sume más puntos
-    que la combinación base, usando muestreo aleatorio para grandes conjuntos.
+    Calcula la probabilidad exacta de que una combinación de 9 cartas del mazo restante
+    sume más puntos que la combinación base. Como solo importa la suma de las ponderaciones,
+    cuenta cuántas combinaciones alcanzan cada suma en lugar de recorrerlas o muestrearlas,
+    y reutiliza el resultado para todas las manos con las mismas ponderaciones.
     """
     puntos_base = calcular_puntos(combinacion_base)
-    cartas_restantes = list(set(todas_las_cartas) - set(combinacion_base))
-    total_posibles = math.comb(len(cartas_restantes), 9)  # 31C9
-    
-    # Si hay demasiadas combinaciones posibles, usar muestreo aleatorio
-    if total_posibles > max_muestras:
-        print(f"Usando muestreo aleatorio ({max_muestras:,} muestras de {total_posibles:,} posibles)...")
-        combinaciones_superiores = 0
-        muestras_procesadas = 0
-        
-        for _ in range(max_muestras):
-            combinacion = tuple(random.sample(cartas_restantes, 9))
-            if calcular_puntos(combinacion) > puntos_base:
-                combinaciones_superiores += 1
-            
-            muestras_procesadas += 1
-            if muestras_procesadas % 1000 == 0:
-                porcentaje = (muestras_procesadas / max_muestras) * 100
-                print(f"\rProcesando: {muestras_procesadas:,}/{max_muestras:,} ({porcentaje:.1f}%) - Superiores encontradas: {combinaciones_superiores:,}", end="")
-        
-        probabilidad = combinaciones_superiores / max_muestras
-    else:
-        print(f"Analizando todas las {total_posibles:,} combinaciones posibles...")
-        combinaciones_superiores = 0
-        procesadas = 0
-        
-        for combinacion in combinations(cartas_restantes, 9):
-            if calcular_puntos(combinacion) > puntos_base:
-                combinaciones_superiores += 1
-            
-            procesadas += 1
-            if procesadas % 1000 == 0:
-                porcentaje = (procesadas / total_posibles) * 100
-                print(f"\rProcesando: {procesadas:,}/{total_posibles:,} ({porcentaje:.1f}%) - Superiores encontradas: {combinaciones_superiores:,}", end="")
-        
-        probabilidad = combinaciones_superiores / total_posibles
+    mascara_restantes = quitar(mazo_bits.mascara(todas_las_cartas), mazo_bits.mascara(combinacion_base))
     
-    print(f"\nCombinaciones superiores encontradas: {combinaciones_superiores:,}")
-    return probabilidad
+    # Solo importan las ponderaciones que faltan en el mazo: manos con la misma firma comparten el resultado
+    cartas_quitadas = mazo_bits.cartas_de(quitar(mazo_bits.completo, mascara_restantes))
+    return cache_probabilidades.probabilidad(1, [cartas[carta] for carta in cartas_quitadas], puntos_base)
 
-def analizar_probabilidades(num_combinaciones):
-    print("Iniciando análisis de probabilidades...")
+def procesar_pg(pg, combinaciones, todas_las_cartas, metricas=None):
+    """
+    Calcula la probabilidad de cada combinación de un PG.
+    Es la unidad de trabajo que se reparte entre procesos en el modo paralelo
+    (allí sin metricas: el progreso se informa por PG en el proceso principal).
+    """
+    probabilidades_individuales = []
+    for indice, combinacion in enumerate(combinaciones, 1):
+        probabilidad = calcular_probabilidad_condicional(combinacion, todas_las_cartas)
+        probabilidades_individuales.append(probabilidad)
+        if metricas is not None:
+            metricas.progreso(lambda: (
+                f"PG {pg} {obtener_letra_combinacion(indice)} ({formatear_combinacion(combinacion)}): "
+                f"{probabilidad:.4f}"))
+    return probabilidades_individuales
+
+def analizar_probabilidades(num_combinaciones, recorrido_completo=False, semilla=0, procesos=1, metricas=None,
+                            estratificacion=None, ampliar_desde=None):
+    """
+    Calcula la probabilidad de cada combinación elegida para cada PG y sus estadísticas.
+    Con procesos > 1 reparte los PG en un pool de procesos; el resultado es idéntico
+    al de una ejecución en serie con la misma semilla.
+    El progreso y los tiempos de cada etapa se registran en metricas (ver truco.metricas).
+    Con estratificacion ('proporcional' o 'neyman') las manos se eligen por estratos y el promedio
+    y el desvío de cada PG se ponderan por estrato; los pesos quedan en resultados[pg]['pesos'].
+    Con ampliar_desde (el num_combinaciones de una ejecución anterior con la misma semilla) parte de
+    su Excel: solo calcula las manos nuevas, distintas de las anteriores, y las estadísticas de cada
+    PG incluyen las probabilidades anteriores y las nuevas (ver truco.ampliacion).
+    """
+    if ampliar_desde is not None and (recorrido_completo or estratificacion is not None):
+        raise ValueError("Solo se pueden ampliar resultados de la selección uniforme por firmas")
+    if metricas is None:
+        metricas = Metricas()
+    metricas.mostrar("Iniciando análisis de probabilidades...")
     inicio_total = time.time()
     
     # Primero calculamos todas las combinaciones posibles y las agrupamos por PG
-    combinaciones_por_pg = calcular_combinaciones_por_pg(num_combinaciones)
+    anteriores = {}  # {pg: (manos, probabilidades)} de la ejecución que se amplía
+    with metricas.etapa('muestra_9_cartas'):
+        if ampliar_desde is None:
+            combinaciones_por_pg = calcular_combinaciones_por_pg(num_combinaciones,
+                                                                 recorrido_completo=recorrido_completo,
+                                                                 semilla=semilla, metricas=metricas,
+                                                                 estratificacion=estratificacion)
+        else:
+            validar_limites((ampliar_desde,), (num_combinaciones,))
+            anteriores = cargar_resultados_anteriores(ampliar_desde)
+            combinaciones_por_pg = manos_nuevas(cartas, {pg: manos for pg, (manos, _) in anteriores.items()},
+                                                num_combinaciones, semilla, ampliar_desde)
     todas_las_cartas = list(cartas.keys())
+    if estratificacion is not None:
+        clases, firmas = firmas_por_pg(cartas, 9)
     
     # Ahora procesamos cada PG
     resultados = defaultdict(dict)
-    combinaciones_analizadas = {}  # Guardamos las combinaciones analizadas
+    combinaciones_analizadas = {}  # Guardamos las combinaciones analizadas, cada una como su rango (un entero)
+    posiciones = {carta: i for i, carta in enumerate(todas_las_cartas)}
     
-    for pg in sorted(combinaciones_por_pg.keys()):
-        inicio_pg = time.time()
-        combinaciones = combinaciones_por_pg[pg]
-        print(f"\nProcesando PG {pg} ({len(combinaciones)} combinaciones)...")
-        
-        # Para cada combinación de este PG
-        probabilidades_individuales = []
-        combinaciones_analizadas[pg] = []  # Lista para guardar las combinaciones de este PG
-        
-        for indice, combinacion in enumerate(combinaciones, 1):
-            letra = obtener_letra_combinacion(indice)
-            print(f"\nProcesando PG {pg} {letra}:")
-            print(f"Cartas: {formatear_combinacion(combinacion)}")
-            
-            probabilidad = calcular_probabilidad_condicional(combinacion, todas_las_cartas)
-            probabilidades_individuales.append(probabilidad)
-            combinaciones_analizadas[pg].append(combinacion)  # Guardamos la combinación
-            print(f"Probabilidad para esta combinación: {probabilidad:.4f}")
+    # Cada PG es una tarea independiente; en modo paralelo se reparten entre procesos
+    # y los resultados llegan en el mismo orden que en una ejecución en serie
+    pgs = sorted(combinaciones_por_pg.keys())
+    metricas_tarea = metricas if procesos <= 1 else None
+    tareas = [(pg, combinaciones_por_pg[pg], todas_las_cartas, metricas_tarea) for pg in pgs]
+    if procesos > 1:
+        metricas.mostrar(f"\nProcesando {len(pgs)} valores de PG en {procesos} procesos...")
+    
+    inicio_pg = time.time()
+    with metricas.etapa('probabilidades'):
+        for pg, probabilidades_individuales in zip(pgs, mapear_tareas(procesar_pg, tareas, procesos)):
+            combinaciones = combinaciones_por_pg[pg]
+            if pg in anteriores:
+                # Las manos de la ejecución anterior van primero, como en su Excel
+                manos_anteriores, probabilidades_anteriores = anteriores[pg]
+                combinaciones = manos_anteriores + combinaciones
+                probabilidades_individuales = probabilidades_anteriores + probabilidades_individuales
+            combinaciones_analizadas[pg] = np.fromiter(  # Guardamos las combinaciones analizadas de este PG
+                (rango_de_combinacion(combinacion, posiciones) for combinacion in combinaciones),
+                dtype=np.uint32, count=len(combinaciones))
         
-        # Calcular estadísticas para este PG
-        resultados[pg] = {
-            'probabilidades': probabilidades_individuales,
-            'promedio': np.mean(probabilidades_individuales),
-            'minimo': np.min(probabilidades_individuales),
-            'maximo': np.max(probabilidades_individuales),
-            'desviacion_std': np.std(probabilidades_individuales)
-        }
+            # Calcular estadísticas para este PG
+            resultados[pg] = {
+                'probabilidades': probabilidades_individuales,
+                'promedio': np.mean(probabilidades_individuales),
+                'minimo': np.min(probabilidades_individuales),
+                'maximo': np.max(probabilidades_individuales),
+                'desviacion_std': np.std(probabilidades_individuales)
+            }
+            if estratificacion is not None:
+                # Cada mano pesa lo que su estrato en el PG sobre lo que está en la muestra
+                pesos = pesos_estratificados(cartas, clases, firmas[pg], combinaciones)
+                promedio = np.average(probabilidades_individuales, weights=pesos)
+                resultados[pg].update({
+                    'pesos': pesos,
+                    'promedio': promedio,
+                    'desviacion_std': np.sqrt(np.average((np.asarray(probabilidades_individuales) - promedio) ** 2,
+                                                         weights=pesos))
+                })
         
-        tiempo_pg = time.time() - inicio_pg
-        print(f"\nCompletado PG {pg}:")
-        print(f"  Combinaciones analizadas: {len(combinaciones)}")
-        print(f"  Tiempo procesamiento: {tiempo_pg:.2f}s")
-        print(f"  Probabilidad promedio: {resultados[pg]['promedio']:.4f}")
-        print(f"  Rango de probabilidades: {resultados[pg]['minimo']:.4f} - {resultados[pg]['maximo']:.4f}")
-        print(f"  Desviación estándar: {resultados[pg]['desviacion_std']:.4f}")
+            tiempo_pg = time.time() - inicio_pg
+            metricas.contar('pg_procesados')
+            metricas.contar('manos_9_cartas', len(combinaciones_por_pg[pg]))
+            metricas.progreso(lambda: (
+                f"Completado PG {pg} ({len(combinaciones)} combinaciones en {tiempo_pg:.2f}s, "
+                f"promedio {resultados[pg]['promedio']:.4f}) - "
+                f"{metricas.contadores['pg_procesados']}/{len(pgs)} PG"))
+            inicio_pg = time.time()
     
     tiempo_total = time.time() - inicio_total
-    print(f"\nTiempo total de cálculo: {tiempo_total:.2f} segundos")
+    metricas.mostrar(f"\nTiempo total de cálculo: {tiempo_total:.2f} segundos")
     return resultados, combinaciones_analizadas
 
 def verificar_espacio_disponible(ruta_guardado='.'): 
@@ -233,7 +282,23 @@ def verificar_espacio_disponible(ruta_guardado='.'):
         print(f"Error al verificar espacio en disco: {e}")
         return False
 
-def guardar_resultados_excel(resultados, num_combinaciones, combinaciones_analizadas):
+def cargar_resultados_anteriores(num_combinaciones):
+    """
+    Lee la hoja Probabilidades_Individuales del Excel de una ejecución anterior con num_combinaciones
+    y devuelve {pg: (manos de 9 cartas en el orden del mazo, probabilidades)}.
+    """
+    nombre_archivo = os.path.join('E:\\TRUCO', f'probabilidades_resumen_{num_combinaciones}.xlsx')
+    detalles = pd.read_excel(nombre_archivo, sheet_name='Probabilidades_Individuales')
+    posiciones = {carta: i for i, carta in enumerate(cartas)}
+    anteriores = defaultdict(lambda: ([], []))
+    for pg, texto, probabilidad in zip(detalles['PG'].tolist(), detalles['Combinación'].tolist(),
+                                       detalles['Probabilidad'].tolist()):
+        manos, probabilidades = anteriores[pg]
+        manos.append(tuple(sorted(texto.split(), key=posiciones.__getitem__)))
+        probabilidades.append(probabilidad)
+    return dict(anteriores)
+
+def guardar_resultados_excel(resultados, num_combinaciones, combinaciones_analizadas, sufijo=''):
     # Definir la ruta de guardado
     ruta_guardado = 'E:\\TRUCO'
     
@@ -252,79 +317,46 @@ def guardar_resultados_excel(resultados, num_combinaciones, combinaciones_analiz
         return False
 
     try:
-        # Crear datos para el resumen
-        resumen_datos = []
-        
-        for puntos in sorted(resultados.keys()):
-            estadisticas = resultados[puntos]
-            resumen_datos.append({
-                'Puntos': puntos,
-                'Cantidad_Combinaciones': len(estadisticas['probabilidades']),
-                'Probabilidad_Promedio': estadisticas['promedio'],
-                'Probabilidad_Min': estadisticas['minimo'],
-                'Probabilidad_Max': estadisticas['maximo'],
-                'Desviacion_Estandar': estadisticas['desviacion_std']
-            })
+        # Hoja Resumen: una fila por PG y la de estadísticas globales
+        df_final = resumen_primera_ronda({
+            puntos: (len(estadisticas['probabilidades']), estadisticas['promedio'], estadisticas['minimo'],
+                     estadisticas['maximo'], estadisticas['desviacion_std'])
+            for puntos, estadisticas in resultados.items()})
         
-        # Crear DataFrame
-        df_resumen = pd.DataFrame(resumen_datos)
+        def filas_resumen():
+            for fila in df_final.itertuples(index=False):
+                yield [valor.item() if isinstance(valor, np.generic) else valor for valor in fila]
         
-        # Agregar estadísticas globales
-        estadisticas_globales = pd.DataFrame({
-            'Puntos': ['Estadísticas Globales'],
-            'Cantidad_Combinaciones': [df_resumen['Cantidad_Combinaciones'].sum()],
-            'Probabilidad_Promedio': [df_resumen['Probabilidad_Promedio'].mean()],
-            'Probabilidad_Min': [df_resumen['Probabilidad_Min'].min()],
-            'Probabilidad_Max': [df_resumen['Probabilidad_Max'].max()],
-            'Desviacion_Estandar': [df_resumen['Desviacion_Estandar'].mean()]
-        })
-        
-        df_final = pd.concat([df_resumen, estadisticas_globales], ignore_index=True)
-        
-        # Preparar datos de detalles
-        detalles_datos = []
-        for pg, estadisticas in resultados.items():
-            for indice, probabilidad in enumerate(estadisticas['probabilidades']):
-                combinacion = combinaciones_analizadas[pg][indice]
-                detalles_datos.append({
-                    'PG': pg,
-                    'Combinación': formatear_combinacion(combinacion),
-                    'Probabilidad': probabilidad
-                })
+        # Los detalles se generan fila por fila directamente desde los resultados;
+        # las cartas de cada combinación se recuperan de su rango recién al escribirla
+        mazo = list(cartas.keys())
+        # Con selección estratificada cada mano lleva el peso de su estrato
+        ponderado = any('pesos' in estadisticas for estadisticas in resultados.values())
+
+        def filas_detalles():
+            for pg in sorted(resultados.keys()):
+                pesos = resultados[pg].get('pesos')
+                for i, (rango, probabilidad) in enumerate(zip(combinaciones_analizadas[pg].tolist(),
+                                                              resultados[pg]['probabilidades'])):
+                    fila = [pg, formatear_combinacion(combinacion_de_rango(rango, 9, mazo)), float(probabilidad)]
+                    yield fila + [float(pesos[i])] if ponderado else fila
         
-        df_detalles = pd.DataFrame(detalles_datos) if detalles_datos else None
+        hojas = [('Resumen', list(df_final.columns), filas_resumen)]
+        if any(estadisticas['probabilidades'] for estadisticas in resultados.values()):
+            columnas = ['PG', 'Combinación', 'Probabilidad'] + (['Peso'] if ponderado else [])
+            hojas.append(('Probabilidades_Individuales', columnas, filas_detalles))
         
         # Guardar en Excel con manejo de errores
-        nombre_archivo = os.path.join(ruta_guardado, f'probabilidades_resumen_{num_combinaciones}.xlsx')
+        nombre_archivo = os.path.join(ruta_guardado, f'probabilidades_resumen_{num_combinaciones}{sufijo}.xlsx')
         temp_archivo = None
         
         try:
-            # Primero guardar en un archivo temporal en la misma unidad
+            # Primero guardar en un archivo temporal en la misma unidad; el libro se escribe
+            # en modo de solo escritura, con los anchos de columna calculados a partir de los datos
             temp_dir = os.path.dirname(nombre_archivo)
             with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx', dir=temp_dir) as tmp:
                 temp_archivo = tmp.name
-                with pd.ExcelWriter(temp_archivo, engine='openpyxl') as writer:
-                    # Hoja de resumen
-                    df_final.to_excel(writer, sheet_name='Resumen', index=False)
-                    
-                    # Hoja de detalles
-                    if df_detalles is not None:
-                        df_detalles.to_excel(writer, sheet_name='Probabilidades_Individuales', index=False)
-                    
-                    # Ajustar columnas en ambas hojas
-                    for nombre_hoja in writer.sheets:
-                        hoja = writer.sheets[nombre_hoja]
-                        for columna in hoja.columns:
-                            max_longitud = 0
-                            columna = [celda for celda in columna]
-                            for celda in columna:
-                                try:
-                                    if len(str(celda.value)) > max_longitud:
-                                        max_longitud = len(str(celda.value))
-                                except:
-                                    pass
-                            ancho_ajustado = (max_longitud + 2)
-                            hoja.column_dimensions[columna[0].column_letter].width = ancho_ajustado
+            escribir_libro_en_flujo(temp_archivo, hojas)
             
             # Si se guardó correctamente el temporal, moverlo al archivo final
             if os.path.exists(nombre_archivo):
@@ -350,11 +382,48 @@ def guardar_resultados_excel(resultados, num_combinaciones, combinaciones_analiz
         print(f"\nError al procesar los datos: {e}")
         return False
 
+def valor_opcion(nombre, valor_default):
+    """Entero que sigue a la opción nombre en la línea de comandos (valor_default si no está)."""
+    argumentos = sys.argv[1:]
+    if nombre not in argumentos:
+        return valor_default
+    posicion = argumentos.index(nombre) + 1
+    if posicion >= len(argumentos) or not argumentos[posicion].isdigit():
+        raise SystemExit(f"{nombre} necesita un número entero")
+    return int(argumentos[posicion])
+
 def principal():
     print("Iniciando análisis...")
+    # --procesos N reparte los PG entre N procesos (1, el default, calcula en serie)
+    procesos = valor_opcion('--procesos', 1)
     num_combinaciones = obtener_numero_combinaciones()
-    resultados, combinaciones_analizadas = analizar_probabilidades(num_combinaciones)
-    guardar_resultados_excel(resultados, num_combinaciones, combinaciones_analizadas)
+    # Con --silencioso no se muestra el progreso ni los mensajes del análisis
+    metricas = Metricas(silencioso='--silencioso' in sys.argv[1:])
+    # --estratificado o --neyman eligen las manos por estratos de cartas altas
+    estratificacion = None
+    if '--estratificado' in sys.argv[1:]:
+        estratificacion = 'proporcional'
+    if '--neyman' in sys.argv[1:]:
+        estratificacion = 'neyman'
+    sufijo = f'_{estratificacion}' if estratificacion else ''
+    # --recorrido-completo elige las manos recorriendo las 273 millones de combinaciones con memoria
+    # acotada (mucho más lento que recorrer firmas, sin caché); el Excel lleva otro nombre
+    recorrido_completo = '--recorrido-completo' in sys.argv[1:]
+    if recorrido_completo:
+        sufijo += '_recorrido_completo'
+    # --ampliar parte del Excel de una ejecución anterior con menos combinaciones por PG
+    ampliar_desde = None
+    if '--ampliar' in sys.argv[1:]:
+        ampliar_desde = int(input("Ingrese el número de combinaciones por PG de la ejecución anterior: "))
+    resultados, combinaciones_analizadas = analizar_probabilidades(num_combinaciones,
+                                                                   recorrido_completo=recorrido_completo,
+                                                                   procesos=procesos, metricas=metricas,
+                                                                   estratificacion=estratificacion,
+                                                                   ampliar_desde=ampliar_desde)
+    with metricas.etapa('exportacion_excel'):
+        guardado = guardar_resultados_excel(resultados, num_combinaciones, combinaciones_analizadas, sufijo)
+    if guardado:
+        metricas.guardar_json(os.path.join('E:\\TRUCO', f'probabilidades_metricas_{num_combinaciones}{sufijo}.json'))
     print("¡Análisis completado!")
 
 if __name__ == "__main__":
@@ -1,128 +1,180 @@
-from itertools import combinations
 from collections import defaultdict
 import time
 import pandas as pd
-import numpy as np
-import math
-import random
 import os
+import sys
 
-# Definición de las cartas y sus ponderaciones
-cartas = {
-    '4E': 1, '4O': 1, '4B': 1, '4C': 1,
-    '5E': 2, '5O': 2, '5B': 2, '5C': 2,
-    '6E': 3, '6O': 3, '6B': 3, '6C': 3,
-    '7B': 4, '7C': 4,
-    '10E': 5, '10O': 5, '10B': 5, '10C': 5,
-    '11E': 6, '11O': 6, '11B': 6, '11C': 6,
-    '12E': 7, '12O': 7, '12B': 7, '12C': 7,
-    '1C': 8, '1O': 8,
-    '2E': 9, '2O': 9, '2B': 9, '2C': 9,
-    '3E': 10, '3O': 10, '3B': 10, '3C': 10,
-    '7O': 11,
-    '7E': 12,
-    '1B': 13,
-    '1E': 14
-}
+from truco.ampliacion import (acumular_detalles, cargar_detalles_anteriores, copiar_detalles, filas_anteriores,
+                               manos_anteriores, manos_nuevas, validar_limites)
+from truco.cache_manos import obtener_manos_por_pg
+from truco.cache_probabilidades import CacheProbabilidades
+from truco.colex import rango_de_combinacion
+from truco.escritura import EscritorColumnar
+from truco.estadisticas import Acumulador, agregar_por_clave, tabla_resumen
+from truco.metricas import Metricas
+from truco.nucleo import cartas
+from truco.puntos_control import PuntosControlPeriodicos, cargar_punto_control, eliminar_punto_control
+from truco.rondas import COLUMNAS_SEGUNDA_RONDA, POSICIONES, segunda_ronda, sufijo_segunda_ronda
 
-def calcular_puntos(combinacion):
-    return sum(cartas[carta] for carta in combinacion)
-
-def formatear_combinacion(combinacion):
-    """Formatea una combinación de cartas para mostrarla de manera legible"""
-    return ' '.join(sorted(combinacion))
-
-def calcular_combinaciones_por_pg(max_combinaciones):
+def calcular_combinaciones_por_pg(max_combinaciones, semilla=0, metricas=None):
     """
-    Calcula hasta max_combinaciones combinaciones de 9 cartas por cada PG, de forma eficiente y sin consumir mucha memoria.
+    Calcula hasta max_combinaciones combinaciones de 9 cartas por cada PG, elegidas de manera uniforme.
+    Recorre firmas de ponderaciones en lugar de las 273 millones de combinaciones, así que no consume
+    casi memoria ni tiempo, y reutiliza la selección guardada en la caché para (max_combinaciones, semilla).
     """
-    todas_las_cartas = list(cartas.keys())
-    representativas_por_pg = defaultdict(list)
-    for combinacion in combinations(todas_las_cartas, 9):
-        pg = calcular_puntos(combinacion)
-        if len(representativas_por_pg[pg]) < max_combinaciones:
-            representativas_por_pg[pg].append(combinacion)
-    return representativas_por_pg
+    return obtener_manos_por_pg(cartas, max_combinaciones, semilla, metricas=metricas)
 
-def analizar_probabilidades_segunda_ronda(max_combinaciones_9=10, max_combinaciones_6=50):
+def analizar_probabilidades_segunda_ronda(max_combinaciones_9=10, max_combinaciones_6=50, semilla=0,
+                                          exacto=False, ruta_cache_probabilidades=None, formato_detalles=None,
+                                          reanudar=False, metricas=None, semiancho=None, error_relativo=None,
+                                          confianza=0.95, ampliar_desde=None):
     """
     Calcula las probabilidades ajustadas de que el rival tenga un PG mayor al propio en la segunda ronda,
-    conociendo 3 de las 9 cartas del rival. Guarda los resultados en un archivo Excel.
+    conociendo 3 de las 9 cartas del rival. Guarda el resumen en CSV y los detalles por lotes en un
+    directorio de partes Parquet o CSV comprimido (formato_detalles), con las cartas codificadas como enteros.
+    Con exacto=True no muestrea las 6 cartas restantes del rival: usa la probabilidad exacta, que se
+    comparte entre todas las revelaciones con la misma firma de ponderaciones (y opcionalmente se guarda
+    en la base SQLite ruta_cache_probabilidades).
+    Sin exacto, cada probabilidad se informa con su intervalo de Wilson (confianza). Con semiancho o
+    error_relativo las muestras se sortean de a lotes hasta que el intervalo alcanza esa precisión,
+    con max_combinaciones_6 como máximo, en lugar de usar siempre max_combinaciones_6.
+    Cada cierto tiempo guarda un punto de control (ver truco.puntos_control.PuntosControlPeriodicos);
+    con reanudar=True continúa desde el último y las filas y el resumen finales son idénticos a los de
+    una ejecución sin interrupciones.
+    Las manos de 6 cartas de cada fila se sortean con un generador derivado de la semilla, de la mano
+    y de las 3 cartas reveladas (ver truco.rondas.segunda_ronda).
+    Con ampliar_desde=(max_combinaciones_9, max_combinaciones_6) de una ejecución anterior con los
+    demás parámetros iguales parte de sus detalles: calcula las manos de 9 cartas nuevas y, si subió
+    max_combinaciones_6 (sin exacto), sigue la estimación de cada fila anterior sorteando solo las
+    manos de 6 cartas que faltan, distintas de las ya usadas, que se vuelven a generar a partir de
+    la semilla (ver truco.ampliacion).
+    El progreso se informa a intervalos de tiempo a través de metricas (ver truco.metricas) y al
+    terminar se guarda el resumen de métricas en JSON junto a los resultados.
     """
-    print("Iniciando análisis de probabilidades para la segunda ronda...")
+    if metricas is None:
+        metricas = Metricas()
+    metricas.mostrar("Iniciando análisis de probabilidades para la segunda ronda...")
     inicio_total = time.time()
-    todas_las_cartas = list(cartas.keys())
-    resultados_por_pg_reducido = defaultdict(list)  # {pg_reducido: [probabilidades]}
-    detalles = []
+    resultados_por_pg_reducido = defaultdict(Acumulador)  # {pg_reducido: estadísticas de probabilidades}
+    ruta_guardado = 'E:\\TRUCO'
+    if not os.path.exists(ruta_guardado):
+        os.makedirs(ruta_guardado)
+    sufijo = sufijo_segunda_ronda(max_combinaciones_6, exacto, semiancho, error_relativo)
+    ampliar_reveladas = False
+    if ampliar_desde is None:
+        # La muestra de 9 cartas no depende del PG que se procesa: se calcula (o carga) una sola vez
+        with metricas.etapa('muestra_9_cartas'):
+            combinaciones_por_pg = calcular_combinaciones_por_pg(max_combinaciones_9, semilla, metricas)
+        # (mano de 9 cartas, filas anteriores de esa mano) por PG
+        tareas_por_pg = {pg: [(combinacion_9, None) for combinacion_9 in combinaciones]
+                         for pg, combinaciones in combinaciones_por_pg.items()}
+    else:
+        max_9_anterior, max_6_anterior = ampliar_desde
+        if exacto:
+            # Sin sorteo de manos de 6 cartas solo se pueden agregar manos de 9 cartas
+            validar_limites((max_9_anterior,), (max_combinaciones_9,))
+        else:
+            validar_limites(ampliar_desde, (max_combinaciones_9, max_combinaciones_6))
+            ampliar_reveladas = max_combinaciones_6 > max_6_anterior
+        sufijo_anterior = sufijo_segunda_ronda(max_6_anterior, exacto, semiancho, error_relativo)
+        with metricas.etapa('muestra_9_cartas'):
+            detalles_anteriores = cargar_detalles_anteriores(os.path.join(
+                ruta_guardado, f'probabilidades_segunda_ronda_detalles_{max_9_anterior}_{sufijo_anterior}'))
+            anteriores = manos_anteriores(detalles_anteriores, list(cartas))
+            nuevas = manos_nuevas(cartas, anteriores, max_combinaciones_9, semilla, max_9_anterior)
+        tareas_por_pg = defaultdict(list)
+        if ampliar_reveladas:
+            # Las manos anteriores se vuelven a calcular siguiendo la estimación de cada fila
+            filas = filas_anteriores(detalles_anteriores, ['Cartas_rival_3', 'Muestras', 'Probabilidad'])
+            for pg, combinaciones in anteriores.items():
+                for combinacion_9 in combinaciones:
+                    tareas_por_pg[pg].append((combinacion_9, filas[rango_de_combinacion(combinacion_9, POSICIONES)]))
+        for pg, combinaciones in nuevas.items():
+            tareas_por_pg[pg].extend((combinacion_9, None) for combinacion_9 in combinaciones)
+    cache_probabilidades = CacheProbabilidades(cartas, ruta_sqlite=ruta_cache_probabilidades) if exacto else None
+    
+    # Los detalles se escriben por lotes mientras avanza el cálculo
+    nombre_archivo_detalles = os.path.join(ruta_guardado, f'probabilidades_segunda_ronda_detalles_{max_combinaciones_9}_{sufijo}')
+    ruta_punto_control = nombre_archivo_detalles + '.punto_control'
+    parametros = {'max_combinaciones_9': max_combinaciones_9, 'max_combinaciones_6': max_combinaciones_6,
+                  'semilla': semilla, 'exacto': exacto, 'formato_detalles': formato_detalles,
+                  'semiancho': semiancho, 'error_relativo': error_relativo, 'confianza': confianza,
+                  'ampliar_desde': ampliar_desde}
+    estado = cargar_punto_control(ruta_punto_control, parametros) if reanudar else None
+    escritor_detalles = EscritorColumnar(nombre_archivo_detalles, COLUMNAS_SEGUNDA_RONDA, formato=formato_detalles,
+                                         conservar_partes=estado is not None)
+    siguiente = (0, 0)  # (PG, índice de la combinación de 9 cartas) por donde seguir
+    if estado is not None:
+        siguiente = estado['siguiente']
+        for pg_reducido, datos in estado['resultados'].items():
+            resultados_por_pg_reducido[pg_reducido] = Acumulador.desde_dict(datos)
+        escritor_detalles.restaurar(estado['escritor'])
+        metricas.mostrar(f"Reanudando desde el PG {siguiente[0]}, combinación {siguiente[1]}...")
+    elif ampliar_reveladas:
+        metricas.mostrar(f"Ampliando de {ampliar_desde[1]} a {max_combinaciones_6} manos de 6 cartas las "
+                         f"{len(detalles_anteriores):,} filas de la ejecución {ampliar_desde[0]}_{sufijo_anterior}...")
+    elif ampliar_desde is not None:
+        # Las filas anteriores pasan tal cual a los detalles nuevos y sus estadísticas al resumen
+        with metricas.etapa('escritura_detalles'):
+            copiar_detalles(detalles_anteriores, escritor_detalles)
+        resultados_por_pg_reducido = acumular_detalles(detalles_anteriores, 'PG_reducido')
+        metricas.mostrar(f"Ampliando {len(detalles_anteriores):,} filas de la ejecución con {ampliar_desde[0]} "
+                         f"combinaciones de 9 cartas...")
 
+    # Puntos de control cada INTERVALO_PUNTO_CONTROL segundos y en cada parte nueva de los detalles
+    puntos_control = PuntosControlPeriodicos(escritor_detalles)
+    total_manos = sum(len(tareas) for tareas in tareas_por_pg.values())
     # Para cada PG posible (15 a 99)
     for pg in range(15, 100):
-        print(f"\nProcesando PG original {pg}...")
-        combinaciones_por_pg = calcular_combinaciones_por_pg(max_combinaciones_9)
-        if pg not in combinaciones_por_pg:
+        if pg not in tareas_por_pg:
             continue
-        combinaciones_9 = combinaciones_por_pg[pg]
-        for idx_9, combinacion_9 in enumerate(combinaciones_9, 1):
-            print(f"  Combinación {idx_9}/{len(combinaciones_9)}: {formatear_combinacion(combinacion_9)}")
-            mazo_rival = list(set(todas_las_cartas) - set(combinacion_9))
-            total_combinaciones_3 = math.comb(len(mazo_rival), 3)
-            for idx_3, comb_3 in enumerate(combinations(mazo_rival, 3), 1):
-                if idx_3 == 1 or idx_3 % 500 == 0 or idx_3 == total_combinaciones_3:
-                    print(f"    Procesando combinación rival 3 cartas {idx_3:,}/{total_combinaciones_3:,}...", end='\r')
-                suma_3 = calcular_puntos(comb_3)
-                pg_reducido = pg - suma_3
-                mazo_super_reducido = list(set(mazo_rival) - set(comb_3))
-                total_posibles_6 = math.comb(len(mazo_super_reducido), 6)
-                if total_posibles_6 <= max_combinaciones_6:
-                    combinaciones_6 = list(combinations(mazo_super_reducido, 6))
-                else:
-                    combinaciones_6 = [tuple(random.sample(mazo_super_reducido, 6)) for _ in range(max_combinaciones_6)]
-                cuenta_mayores = 0
-                for comb_6 in combinaciones_6:
-                    pg_rival = calcular_puntos(comb_6)
-                    if pg_rival < pg_reducido:
-                        cuenta_mayores += 1
-                probabilidad = cuenta_mayores / len(combinaciones_6) if combinaciones_6 else 0
-                resultados_por_pg_reducido[pg_reducido].append(probabilidad)
-                detalles.append({
-                    'PG_original': pg,
-                    'Combinacion_9': formatear_combinacion(combinacion_9),
-                    'Cartas_rival_3': formatear_combinacion(comb_3),
-                    'PG_reducido': pg_reducido,
-                    'Probabilidad': probabilidad
+        combinaciones_9 = tareas_por_pg[pg]
+        for idx_9, (combinacion_9, anteriores_mano) in enumerate(combinaciones_9, 1):
+            if (pg, idx_9) < siguiente:
+                continue
+            with metricas.etapa('segunda_ronda'):
+                filas = segunda_ronda(pg, combinacion_9, max_combinaciones_6, semilla, cache_probabilidades,
+                                      semiancho, error_relativo, confianza, anteriores_mano)
+                agregar_por_clave(resultados_por_pg_reducido, filas['PG_reducido'], filas['Probabilidad'])
+            with metricas.etapa('escritura_detalles'):
+                escritor_detalles.agregar_lote(**filas)
+            with metricas.etapa('punto_control'):
+                puntos_control.guardar_si_corresponde(ruta_punto_control, parametros, lambda: {
+                    'siguiente': (pg, idx_9 + 1),
+                    'resultados': {pg_reducido: estadisticas.a_dict()
+                                   for pg_reducido, estadisticas in resultados_por_pg_reducido.items()},
+                    'escritor': escritor_detalles.estado(),
                 })
-            print(f"    Completadas todas las combinaciones de 3 cartas del rival para esta combinación de 9 cartas.")
-        print(f"  Completado PG {pg}.")
-    resumen = []
-    for pg_red in range(-24, 97):
-        probs = resultados_por_pg_reducido.get(pg_red, [])
-        if probs:
-            resumen.append({
-                'PG_reducido': pg_red,
-                'Cantidad': len(probs),
-                'Probabilidad_promedio': np.mean(probs),
-                'Probabilidad_min': np.min(probs),
-                'Probabilidad_max': np.max(probs),
-                'Desviacion_std': np.std(probs)
-            })
+            metricas.contar('manos_9_cartas')
+            metricas.contar('combinaciones_3_cartas', len(filas['Probabilidad']))
+            metricas.contar('muestras_6_cartas', int(filas['Muestras'].sum()))
+            metricas.progreso(lambda: (
+                f"PG {pg} combinación {idx_9}/{len(combinaciones_9)} - "
+                f"manos: {metricas.contadores['manos_9_cartas']:,}/{total_manos:,} - "
+                f"{metricas.por_segundo('combinaciones_3_cartas'):,.0f} combinaciones de 3 cartas/s"))
+    with metricas.etapa('escritura_detalles'):
+        escritor_detalles.cerrar()
+    if cache_probabilidades is not None:
+        cache_probabilidades.cerrar()
+        metricas.contar('cache_aciertos', cache_probabilidades.aciertos)
+        metricas.contar('cache_fallos', cache_probabilidades.fallos)
+        consultas = cache_probabilidades.aciertos + cache_probabilidades.fallos
+        metricas.mostrar(f"\nCaché de probabilidades: {cache_probabilidades.aciertos:,} aciertos de {consultas:,} consultas")
+    resumen = tabla_resumen(resultados_por_pg_reducido, 'PG_reducido')
     df_resumen = pd.DataFrame(resumen)
-    df_detalles = pd.DataFrame(detalles)
-    ruta_guardado = 'E:\\TRUCO'
-    if not os.path.exists(ruta_guardado):
-        os.makedirs(ruta_guardado)
     
     # Guardar resumen en CSV
-    nombre_archivo_resumen = os.path.join(ruta_guardado, f'probabilidades_segunda_ronda_resumen_{max_combinaciones_9}_{max_combinaciones_6}.csv')
+    nombre_archivo_resumen = os.path.join(ruta_guardado, f'probabilidades_segunda_ronda_resumen_{max_combinaciones_9}_{sufijo}.csv')
     df_resumen.to_csv(nombre_archivo_resumen, index=False, encoding='utf-8')
+    eliminar_punto_control(ruta_punto_control)
+    nombre_archivo_metricas = os.path.join(ruta_guardado, f'probabilidades_segunda_ronda_metricas_{max_combinaciones_9}_{sufijo}.json')
+    metricas.guardar_json(nombre_archivo_metricas)
     
-    # Guardar detalles en CSV
-    nombre_archivo_detalles = os.path.join(ruta_guardado, f'probabilidades_segunda_ronda_detalles_{max_combinaciones_9}_{max_combinaciones_6}.csv')
-    df_detalles.to_csv(nombre_archivo_detalles, index=False, encoding='utf-8')
-    
-    print(f"\nResultados de la segunda ronda guardados en:")
-    print(f"  Resumen: '{nombre_archivo_resumen}'")
-    print(f"  Detalles: '{nombre_archivo_detalles}'")
-    print(f"Tiempo total de cálculo: {time.time() - inicio_total:.2f} segundos")
+    metricas.mostrar(f"\nResultados de la segunda ronda guardados en:")
+    metricas.mostrar(f"  Resumen: '{nombre_archivo_resumen}'")
+    metricas.mostrar(f"  Detalles: '{nombre_archivo_detalles}' ({escritor_detalles.filas_escritas:,} filas en {escritor_detalles.partes} partes {escritor_detalles.formato})")
+    metricas.mostrar(f"  Métricas: '{nombre_archivo_metricas}'")
+    metricas.mostrar(f"Tiempo total de cálculo: {time.time() - inicio_total:.2f} segundos")
 
 def pedir_limite(mensaje, minimo=1, maximo=1000, valor_default=10):
     while True:
@@ -145,5 +197,17 @@ if __name__ == "__main__":
         minimo=1, maximo=1000, valor_default=10)
     max_combinaciones_6 = pedir_limite(
         "Ingrese el límite de combinaciones de 6 cartas para la SEGUNDA ronda",
-        minimo=1, maximo=1000, valor_default=50)
-    analizar_probabilidades_segunda_ronda(max_combinaciones_9=max_combinaciones_9, max_combinaciones_6=max_combinaciones_6)
+        minimo=1, maximo=1000000, valor_default=50)
+    entrada = input("Ingrese el semiancho objetivo del intervalo de confianza, p. ej. 0.01 (vacío = siempre el límite de combinaciones): ")
+    semiancho = float(entrada) if entrada.strip() else None
+    # Con --ampliar se parte de los resultados de una ejecución anterior con límites menores
+    ampliar_desde = None
+    if '--ampliar' in sys.argv[1:]:
+        ampliar_desde = (int(input("Límite de combinaciones de 9 cartas de la ejecución anterior: ")),
+                         int(input("Límite de combinaciones de 6 cartas de la ejecución anterior: ")))
+    # Con --reanudar se continúa desde el último punto de control de un análisis interrumpido;
+    # con --silencioso no se muestra el progreso (el resumen de métricas se guarda igual)
+    analizar_probabilidades_segunda_ronda(max_combinaciones_9=max_combinaciones_9, max_combinaciones_6=max_combinaciones_6,
+                                          semiancho=semiancho, reanudar='--reanudar' in sys.argv[1:],
+                                          ampliar_desde=ampliar_desde,
+                                          metricas=Metricas(silencioso='--silencioso' in sys.argv[1:]))
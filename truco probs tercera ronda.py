@@ -1,108 +1,144 @@
-from itertools import combinations
 from collections import defaultdict
 import time
 import pandas as pd
-import numpy as np
-import math
-import random
 import os
+import sys
 
-# Definición de las cartas y sus ponderaciones
-cartas = {
-    '4E': 1, '4O': 1, '4B': 1, '4C': 1,
-    '5E': 2, '5O': 2, '5B': 2, '5C': 2,
-    '6E': 3, '6O': 3, '6B': 3, '6C': 3,
-    '7B': 4, '7C': 4,
-    '10E': 5, '10O': 5, '10B': 5, '10C': 5,
-    '11E': 6, '11O': 6, '11B': 6, '11C': 6,
-    '12E': 7, '12O': 7, '12B': 7, '12C': 7,
-    '1C': 8, '1O': 8,
-    '2E': 9, '2O': 9, '2B': 9, '2C': 9,
-    '3E': 10, '3O': 10, '3B': 10, '3C': 10,
-    '7O': 11,
-    '7E': 12,
-    '1B': 13,
-    '1E': 14
-}
+from truco.ampliacion import (acumular_detalles, cargar_detalles_anteriores, copiar_detalles, manos_anteriores,
+                               manos_nuevas, reveladas_anteriores, validar_limites)
+from truco.cache_manos import obtener_manos_por_pg
+from truco.colex import rango_de_combinacion
+from truco.escritura import EscritorColumnar
+from truco.estadisticas import Acumulador, agregar_por_clave, tabla_resumen
+from truco.metricas import Metricas
+from truco.nucleo import cartas
+from truco.puntos_control import PuntosControlPeriodicos, cargar_punto_control, eliminar_punto_control
+from truco.rondas import COLUMNAS_TERCERA_RONDA, POSICIONES, tercera_ronda
 
-def calcular_puntos(combinacion):
-    return sum(cartas[carta] for carta in combinacion)
-
-def formatear_combinacion(combinacion):
-    return ' '.join(sorted(combinacion))
-
-def analizar_probabilidades_tercera_ronda(max_combinaciones_9=10, max_combinaciones_6=50):
-    print("Iniciando análisis de probabilidades para la tercera ronda...")
+def analizar_probabilidades_tercera_ronda(max_combinaciones_9=10, max_combinaciones_6=50, semilla=0,
+                                          formato_detalles=None, reanudar=False,
+                                          metricas=None, ampliar_desde=None):
+    """
+    Calcula la probabilidad de ganar en la tercera ronda conociendo 6 de las 9 cartas del rival.
+    Las manos de 6 cartas de cada mano de 9 se sortean con un generador derivado de la semilla y
+    de la mano (ver truco.rondas.tercera_ronda).
+    Cada cierto tiempo guarda un punto de control (ver truco.puntos_control.PuntosControlPeriodicos);
+    con reanudar=True continúa desde el último y las filas y el resumen finales son idénticos a los de
+    una ejecución sin interrupciones.
+    Con ampliar_desde=(max_combinaciones_9, max_combinaciones_6) de una ejecución anterior con la
+    misma semilla parte de sus detalles: calcula solo las manos de 9 cartas nuevas y, para las
+    anteriores, las manos de 6 cartas que faltan (distintas de las ya calculadas), y actualiza el
+    resumen combinando las estadísticas anteriores con las nuevas (ver truco.ampliacion).
+    El progreso se informa a intervalos de tiempo a través de metricas (ver truco.metricas) y al
+    terminar se guarda el resumen de métricas en JSON junto a los resultados.
+    """
+    if metricas is None:
+        metricas = Metricas()
+    metricas.mostrar("Iniciando análisis de probabilidades para la tercera ronda...")
     inicio_total = time.time()
-    todas_las_cartas = list(cartas.keys())
-    resultados_por_pg_super_reducido = defaultdict(list)
-    detalles = []
+    resultados_por_pg_super_reducido = defaultdict(Acumulador)
+    ruta_guardado = 'E:\\TRUCO'
+    if not os.path.exists(ruta_guardado):
+        os.makedirs(ruta_guardado)
+    if ampliar_desde is None:
+        # Misma muestra de 9 cartas por PG que las otras rondas, calculada una sola vez
+        with metricas.etapa('muestra_9_cartas'):
+            combinaciones_por_pg = obtener_manos_por_pg(cartas, max_combinaciones_9, semilla, metricas=metricas)
+        # (mano de 9 cartas, rangos de manos de 6 cartas ya calculadas) por PG
+        tareas_por_pg = {pg: [(combinacion_9, None) for combinacion_9 in combinaciones]
+                         for pg, combinaciones in combinaciones_por_pg.items()}
+    else:
+        validar_limites(ampliar_desde, (max_combinaciones_9, max_combinaciones_6))
+        with metricas.etapa('muestra_9_cartas'):
+            detalles_anteriores = cargar_detalles_anteriores(os.path.join(
+                ruta_guardado, f'probabilidades_tercera_ronda_detalles_{ampliar_desde[0]}_{ampliar_desde[1]}'))
+            anteriores = manos_anteriores(detalles_anteriores, list(cartas))
+            nuevas = manos_nuevas(cartas, anteriores, max_combinaciones_9, semilla, ampliar_desde[0])
+        tareas_por_pg = defaultdict(list)
+        if max_combinaciones_6 > ampliar_desde[1]:
+            reveladas = reveladas_anteriores(detalles_anteriores, 'Cartas_rival_6')
+            for pg, combinaciones in anteriores.items():
+                for combinacion_9 in combinaciones:
+                    tareas_por_pg[pg].append((combinacion_9, reveladas[rango_de_combinacion(combinacion_9, POSICIONES)]))
+        for pg, combinaciones in nuevas.items():
+            tareas_por_pg[pg].extend((combinacion_9, None) for combinacion_9 in combinaciones)
+    # Los detalles se escriben por lotes (Parquet o CSV comprimido) mientras avanza el cálculo
+    nombre_archivo_detalles = os.path.join(ruta_guardado, f'probabilidades_tercera_ronda_detalles_{max_combinaciones_9}_{max_combinaciones_6}')
+    ruta_punto_control = nombre_archivo_detalles + '.punto_control'
+    parametros = {'max_combinaciones_9': max_combinaciones_9, 'max_combinaciones_6': max_combinaciones_6,
+                  'semilla': semilla, 'formato_detalles': formato_detalles, 'ampliar_desde': ampliar_desde}
+    estado = cargar_punto_control(ruta_punto_control, parametros) if reanudar else None
+    escritor_detalles = EscritorColumnar(nombre_archivo_detalles, COLUMNAS_TERCERA_RONDA, formato=formato_detalles,
+                                         conservar_partes=estado is not None)
+    siguiente = (0, 0)  # (PG, índice de la combinación de 9 cartas) por donde seguir
+    if estado is not None:
+        siguiente = estado['siguiente']
+        for pg_super_reducido, datos in estado['resultados'].items():
+            resultados_por_pg_super_reducido[pg_super_reducido] = Acumulador.desde_dict(datos)
+        escritor_detalles.restaurar(estado['escritor'])
+        metricas.mostrar(f"Reanudando desde el PG {siguiente[0]}, combinación {siguiente[1]}...")
+    elif ampliar_desde is not None:
+        # Las filas anteriores pasan tal cual a los detalles nuevos y sus estadísticas al resumen
+        with metricas.etapa('escritura_detalles'):
+            copiar_detalles(detalles_anteriores, escritor_detalles)
+        resultados_por_pg_super_reducido = acumular_detalles(detalles_anteriores, 'PG_super_reducido')
+        metricas.mostrar(f"Ampliando {len(detalles_anteriores):,} filas de la ejecución "
+                         f"{ampliar_desde[0]}_{ampliar_desde[1]}...")
 
+    # Puntos de control cada INTERVALO_PUNTO_CONTROL segundos y en cada parte nueva de los detalles
+    puntos_control = PuntosControlPeriodicos(escritor_detalles)
+    total_manos = sum(len(tareas) for tareas in tareas_por_pg.values())
     for pg in range(15, 100):
-        print(f"\nProcesando PG original {pg}...")
-        combinaciones_9 = []
-        for combinacion in combinations(todas_las_cartas, 9):
-            if len(combinaciones_9) < max_combinaciones_9:
-                combinaciones_9.append(combinacion)
-            else:
-                break
-        for idx_9, combinacion_9 in enumerate(combinaciones_9, 1):
-            print(f"  Combinación 9 cartas {idx_9}/{len(combinaciones_9)}: {formatear_combinacion(combinacion_9)}")
-            mazo_reducido = list(set(todas_las_cartas) - set(combinacion_9))  # 31 cartas
-            total_combinaciones_6 = math.comb(len(mazo_reducido), 6)
-            if total_combinaciones_6 <= max_combinaciones_6:
-                combinaciones_6 = list(combinations(mazo_reducido, 6))
-            else:
-                combinaciones_6 = [tuple(random.sample(mazo_reducido, 6)) for _ in range(max_combinaciones_6)]
-            for idx_6, combinacion_6 in enumerate(combinaciones_6, 1):
-                pg_6 = calcular_puntos(combinacion_6)
-                pg_super_reducido = pg - pg_6
-                mazo_hiper_reducido = list(set(mazo_reducido) - set(combinacion_6))  # 25 cartas
-                combinaciones_3 = list(combinations(mazo_hiper_reducido, 3))  # 2300
-                cuenta_ganar = 0
-                for comb_3 in combinaciones_3:
-                    pg_3 = calcular_puntos(comb_3)
-                    if pg_super_reducido > pg_3:
-                        cuenta_ganar += 1
-                probabilidad = cuenta_ganar / len(combinaciones_3) if combinaciones_3 else 0
-                resultados_por_pg_super_reducido[pg_super_reducido].append(probabilidad)
-                detalles.append({
-                    'PG_original': pg,
-                    'Combinacion_9': formatear_combinacion(combinacion_9),
-                    'Cartas_rival_6': formatear_combinacion(combinacion_6),
-                    'PG_super_reducido': pg_super_reducido,
-                    'Probabilidad': probabilidad
+        if pg not in tareas_por_pg:
+            continue
+        combinaciones_9 = tareas_por_pg[pg]
+        for idx_9, (combinacion_9, excluir) in enumerate(combinaciones_9, 1):
+            if (pg, idx_9) < siguiente:
+                continue
+            with metricas.etapa('tercera_ronda'):
+                filas = tercera_ronda(pg, combinacion_9, max_combinaciones_6, semilla, excluir)
+                agregar_por_clave(resultados_por_pg_super_reducido, filas['PG_super_reducido'], filas['Probabilidad'])
+            with metricas.etapa('escritura_detalles'):
+                escritor_detalles.agregar_lote(**filas)
+            with metricas.etapa('punto_control'):
+                puntos_control.guardar_si_corresponde(ruta_punto_control, parametros, lambda: {
+                    'siguiente': (pg, idx_9 + 1),
+                    'resultados': {pg_super_reducido: estadisticas.a_dict()
+                                   for pg_super_reducido, estadisticas in resultados_por_pg_super_reducido.items()},
+                    'escritor': escritor_detalles.estado(),
                 })
-            print(f"    Completadas todas las combinaciones de 6 cartas del rival para esta combinación de 9 cartas.")
-        print(f"  Completado PG {pg}.")
-    resumen = []
-    for pg_sup_red in sorted(resultados_por_pg_super_reducido.keys()):
-        probs = resultados_por_pg_super_reducido.get(pg_sup_red, [])
-        if probs:
-            resumen.append({
-                'PG_super_reducido': pg_sup_red,
-                'Cantidad': len(probs),
-                'Probabilidad_promedio': np.mean(probs),
-                'Probabilidad_min': np.min(probs),
-                'Probabilidad_max': np.max(probs),
-                'Desviacion_std': np.std(probs)
-            })
+            metricas.contar('manos_9_cartas')
+            metricas.contar('combinaciones_6_cartas', len(filas['Probabilidad']))
+            metricas.progreso(lambda: (
+                f"PG {pg} combinación {idx_9}/{len(combinaciones_9)} - "
+                f"manos: {metricas.contadores['manos_9_cartas']:,}/{total_manos:,} - "
+                f"{metricas.por_segundo('combinaciones_6_cartas'):,.0f} combinaciones de 6 cartas/s"))
+    with metricas.etapa('escritura_detalles'):
+        escritor_detalles.cerrar()
+    resumen = tabla_resumen(resultados_por_pg_super_reducido, 'PG_super_reducido')
     df_resumen = pd.DataFrame(resumen)
-    df_detalles = pd.DataFrame(detalles)
-    ruta_guardado = 'E:\\TRUCO'
-    if not os.path.exists(ruta_guardado):
-        os.makedirs(ruta_guardado)
     nombre_archivo_resumen = os.path.join(ruta_guardado, f'probabilidades_tercera_ronda_resumen_{max_combinaciones_9}_{max_combinaciones_6}.csv')
     df_resumen.to_csv(nombre_archivo_resumen, index=False, encoding='utf-8')
-    nombre_archivo_detalles = os.path.join(ruta_guardado, f'probabilidades_tercera_ronda_detalles_{max_combinaciones_9}_{max_combinaciones_6}.csv')
-    df_detalles.to_csv(nombre_archivo_detalles, index=False, encoding='utf-8')
-    print(f"\nResultados de la tercera ronda guardados en:")
-    print(f"  Resumen: '{nombre_archivo_resumen}'")
-    print(f"  Detalles: '{nombre_archivo_detalles}'")
-    print(f"Tiempo total de cálculo: {time.time() - inicio_total:.2f} segundos")
+    eliminar_punto_control(ruta_punto_control)
+    nombre_archivo_metricas = os.path.join(ruta_guardado, f'probabilidades_tercera_ronda_metricas_{max_combinaciones_9}_{max_combinaciones_6}.json')
+    metricas.guardar_json(nombre_archivo_metricas)
+    metricas.mostrar(f"\nResultados de la tercera ronda guardados en:")
+    metricas.mostrar(f"  Resumen: '{nombre_archivo_resumen}'")
+    metricas.mostrar(f"  Detalles: '{nombre_archivo_detalles}' ({escritor_detalles.filas_escritas:,} filas en {escritor_detalles.partes} partes {escritor_detalles.formato})")
+    metricas.mostrar(f"  Métricas: '{nombre_archivo_metricas}'")
+    metricas.mostrar(f"Tiempo total de cálculo: {time.time() - inicio_total:.2f} segundos")
 
 if __name__ == "__main__":
     print("\n--- Parámetros para el cálculo de probabilidades de la tercera ronda ---")
     max_combinaciones_9 = int(input("Ingrese el límite de combinaciones de 9 cartas por PG para la PRIMERA ronda (default 10): ") or 10)
     max_combinaciones_6 = int(input("Ingrese el límite de combinaciones de 6 cartas para la SEGUNDA ronda (default 50): ") or 50)
-    analizar_probabilidades_tercera_ronda(max_combinaciones_9=max_combinaciones_9, max_combinaciones_6=max_combinaciones_6) 
+    # Con --ampliar se parte de los resultados de una ejecución anterior con límites menores
+    ampliar_desde = None
+    if '--ampliar' in sys.argv[1:]:
+        ampliar_desde = (int(input("Límite de combinaciones de 9 cartas de la ejecución anterior: ")),
+                         int(input("Límite de combinaciones de 6 cartas de la ejecución anterior: ")))
+    # Con --reanudar se continúa desde el último punto de control de un análisis interrumpido;
+    # con --silencioso no se muestra el progreso (el resumen de métricas se guarda igual)
+    analizar_probabilidades_tercera_ronda(max_combinaciones_9=max_combinaciones_9, max_combinaciones_6=max_combinaciones_6,
+                                          reanudar='--reanudar' in sys.argv[1:], ampliar_desde=ampliar_desde,
+                                          metricas=Metricas(silencioso='--silencioso' in sys.argv[1:])) 
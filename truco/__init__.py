@@ -0,0 +1 @@
+"""Utilidades compartidas para el cálculo de probabilidades del truco."""
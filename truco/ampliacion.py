@@ -0,0 +1,78 @@
+"""
+Ampliación de resultados anteriores cuando se suben los límites de muestreo.
+
+En lugar de recalcular todo, se cargan los detalles por mano de una ejecución anterior, se
+muestrean solo las manos de 9 cartas (y las cartas reveladas) que faltan para llegar a los
+límites nuevos, distintas de las ya calculadas, y el resumen se actualiza combinando
+acumuladores (cantidad, suma, suma de cuadrados, mínimo y máximo). En la segunda ronda, donde
+cada fila es una estimación por sorteo, subir el límite de manos de 6 cartas sigue la estimación
+de cada fila con las manos que faltan (ver truco.rondas.segunda_ronda). Las manos anteriores más
+las nuevas forman una muestra uniforme de manos distintas, como la de una ejecución desde
+cero con los límites nuevos, aunque no son las mismas manos.
+"""
+import random
+from collections import defaultdict
+
+from truco.colex import combinacion_de_rango
+from truco.escritura import leer_detalles
+from truco.estadisticas import Acumulador, agregar_por_clave
+from truco.firmas import ampliar_manos_por_pg
+from truco.paralelo import derivar_semilla
+
+
+def validar_limites(anteriores, nuevos):
+    """ValueError si algún límite nuevo es menor que el anterior o si son todos iguales."""
+    if any(nuevo < anterior for anterior, nuevo in zip(anteriores, nuevos)):
+        raise ValueError(f"Los límites nuevos {tuple(nuevos)} no pueden ser menores que los anteriores {tuple(anteriores)}")
+    if tuple(anteriores) == tuple(nuevos):
+        raise ValueError(f"Los límites nuevos son iguales a los anteriores {tuple(anteriores)}: no hay nada que ampliar")
+
+
+def cargar_detalles_anteriores(ruta):
+    """Detalles de la ejecución anterior; FileNotFoundError si no hay ninguno en ruta."""
+    detalles = leer_detalles(ruta)
+    if detalles.empty:
+        raise FileNotFoundError(f"No hay detalles de una ejecución anterior en '{ruta}'")
+    return detalles
+
+
+def manos_anteriores(detalles, mazo):
+    """{pg: [manos de 9 cartas]} de los detalles, en el orden en que aparecen."""
+    manos = defaultdict(list)
+    primeras = detalles.drop_duplicates('Combinacion_9')
+    for pg, rango in zip(primeras['PG_original'].tolist(), primeras['Combinacion_9'].tolist()):
+        manos[pg].append(combinacion_de_rango(rango, 9, mazo))
+    return dict(manos)
+
+
+def reveladas_anteriores(detalles, columna):
+    """{rango de la mano de 9 cartas: arreglo con los rangos de columna ya calculados para esa mano}."""
+    return {rango: grupo.to_numpy() for rango, grupo in detalles.groupby('Combinacion_9', sort=False)[columna]}
+
+
+def filas_anteriores(detalles, columnas):
+    """{rango de la mano de 9 cartas: {columna: arreglo}} con las columnas pedidas de las filas de cada mano."""
+    return {rango: {columna: grupo[columna].to_numpy() for columna in columnas}
+            for rango, grupo in detalles.groupby('Combinacion_9', sort=False)}
+
+
+def acumular_detalles(detalles, clave):
+    """defaultdict(Acumulador) con las probabilidades de los detalles agregadas por clave."""
+    acumuladores = defaultdict(Acumulador)
+    agregar_por_clave(acumuladores, detalles[clave].to_numpy(), detalles['Probabilidad'].to_numpy())
+    return acumuladores
+
+
+def copiar_detalles(detalles, escritor):
+    """Agrega al escritor las filas de detalles, con sus columnas y tipos."""
+    escritor.agregar_lote(**{columna: detalles[columna].to_numpy() for columna in escritor.columnas})
+
+
+def manos_nuevas(cartas, anteriores, max_combinaciones, semilla, limite_anterior):
+    """
+    {pg: [manos de 9 cartas nuevas]} para completar max_combinaciones por PG (ver
+    truco.firmas.ampliar_manos_por_pg). El generador se deriva de la semilla y de los dos límites,
+    así que las rondas que se amplían desde la misma muestra anterior eligen las mismas manos nuevas.
+    """
+    rng = random.Random(derivar_semilla(semilla, 'ampliacion', limite_anterior, max_combinaciones))
+    return ampliar_manos_por_pg(cartas, anteriores, max_combinaciones, rng)
@@ -0,0 +1,76 @@
+"""
+Caché en disco de las manos de 9 cartas elegidas por PG.
+
+La muestra depende solo del mazo, de max_combinaciones, de la semilla y del método de
+selección (y de la versión de su algoritmo, truco.firmas.VERSION_SELECCION), así que se
+calcula una vez y se reutiliza entre ejecuciones y entre los scripts de las tres rondas.
+"""
+import json
+import os
+import random
+import tempfile
+
+from truco.firmas import VERSION_SELECCION, muestrear_manos_de_firmas, muestrear_manos_por_pg
+from truco.metricas import Metricas
+
+RUTA_CACHE = os.path.join('E:\\TRUCO', 'cache')
+
+
+def _nombre_archivo(ruta_cache, metodo, max_combinaciones, semilla):
+    return os.path.join(ruta_cache, f'manos_por_pg_{metodo}_v{VERSION_SELECCION}_{max_combinaciones}_{semilla}.json')
+
+
+def _cargar(nombre_archivo, cartas):
+    try:
+        with open(nombre_archivo, encoding='utf-8') as archivo:
+            datos = json.load(archivo)
+    except (OSError, ValueError):
+        return None
+    if datos.get('cartas') != cartas or datos.get('version') != VERSION_SELECCION:
+        return None
+    return {int(pg): [tuple(mano) for mano in manos] for pg, manos in datos['manos_por_pg'].items()}
+
+
+def _guardar(nombre_archivo, cartas, manos_por_pg, mostrar=print):
+    """
+    Escribe primero a un archivo temporal y luego lo reemplaza, para no dejar cachés a medio escribir.
+    Si no se puede, avisa con mostrar y sigue sin caché.
+    """
+    temp_archivo = None
+    try:
+        os.makedirs(os.path.dirname(nombre_archivo), exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', delete=False, suffix='.json', encoding='utf-8',
+                                         dir=os.path.dirname(nombre_archivo)) as tmp:
+            temp_archivo = tmp.name
+            json.dump({'cartas': cartas, 'version': VERSION_SELECCION,
+                       'manos_por_pg': {str(pg): manos for pg, manos in manos_por_pg.items()}}, tmp)
+        os.replace(temp_archivo, nombre_archivo)
+    except OSError as e:
+        mostrar(f"No se pudo guardar la caché de combinaciones en '{nombre_archivo}': {e}")
+        if temp_archivo and os.path.exists(temp_archivo):
+            try:
+                os.remove(temp_archivo)
+            except OSError:
+                pass
+
+
+def obtener_manos_por_pg(cartas, max_combinaciones, semilla=0, seleccionar=muestrear_manos_de_firmas,
+                         metodo='uniforme', ruta_cache=RUTA_CACHE, metricas=None):
+    """
+    Devuelve {pg: [manos de 9 cartas]} con hasta max_combinaciones manos por PG.
+    Si ya existe una caché para (metodo, max_combinaciones, semilla), la versión actual de los
+    algoritmos de selección y el mismo mazo la carga;
+    si no, elige las manos con seleccionar usando un generador con esa semilla y la guarda.
+    metodo identifica a seleccionar dentro del nombre de la caché. Los mensajes se muestran
+    a través de metricas, así que no aparecen en modo silencioso.
+    """
+    if metricas is None:
+        metricas = Metricas()
+    nombre_archivo = _nombre_archivo(ruta_cache, metodo, max_combinaciones, semilla)
+    manos_por_pg = _cargar(nombre_archivo, cartas)
+    if manos_por_pg is not None:
+        metricas.mostrar(f"Combinaciones por PG cargadas desde la caché '{nombre_archivo}'")
+        return manos_por_pg
+    manos_por_pg = muestrear_manos_por_pg(cartas, 9, max_combinaciones, random.Random(semilla), seleccionar)
+    _guardar(nombre_archivo, cartas, manos_por_pg, metricas.mostrar)
+    return manos_por_pg
@@ -0,0 +1,144 @@
+"""
+Caché de probabilidades por firma de ponderaciones.
+
+La probabilidad de que el rival supere (o no alcance) un umbral depende solo de la
+ronda, del multiconjunto de ponderaciones de las cartas que ya salieron del mazo y del
+umbral, no de los palos. Muchas manos distintas comparten esa firma, así que se calcula
+una vez de manera exacta y se reutiliza: primero en un LRU en memoria y, opcionalmente,
+en una base SQLite en disco que sobrevive entre ejecuciones.
+"""
+import math
+import sqlite3
+from collections import Counter, OrderedDict
+
+from truco.conteo import distribucion_sumas
+
+# ronda -> (cartas que elige el rival del mazo restante, comparación contra el umbral)
+# Ronda 1: el rival supera mi PG. Rondas 2 y 3: las cartas que faltan del rival suman menos que mi PG reducido.
+RONDAS = {
+    1: (9, 'mayor'),
+    2: (6, 'menor'),
+    3: (3, 'menor'),
+}
+
+
+class _LRU:
+    def __init__(self, capacidad):
+        self.capacidad = capacidad
+        self._datos = OrderedDict()
+
+    def obtener(self, clave):
+        valor = self._datos.get(clave)
+        if valor is not None:
+            self._datos.move_to_end(clave)
+        return valor
+
+    def guardar(self, clave, valor):
+        self._datos[clave] = valor
+        self._datos.move_to_end(clave)
+        if len(self._datos) > self.capacidad:
+            self._datos.popitem(last=False)
+
+
+class CacheProbabilidades:
+    """
+    Devuelve probabilidades exactas por (ronda, firma de ponderaciones quitadas, umbral).
+    capacidad limita las entradas del LRU en memoria; ruta_sqlite activa la caché en disco.
+    """
+
+    def __init__(self, cartas, capacidad=200_000, ruta_sqlite=None, lote_escritura=1000):
+        self.mazo = Counter(cartas.values())
+        self._probabilidades = _LRU(capacidad)
+        self._distribuciones = _LRU(max(1, capacidad // 10))
+        self.aciertos = 0
+        self.fallos = 0
+        self._conexion = None
+        self._pendientes = []
+        self.lote_escritura = lote_escritura
+        if ruta_sqlite:
+            self._conexion = sqlite3.connect(ruta_sqlite)
+            self._conexion.execute(
+                "CREATE TABLE IF NOT EXISTS probabilidades ("
+                "ronda INTEGER, firma TEXT, umbral INTEGER, probabilidad REAL, "
+                "PRIMARY KEY (ronda, firma, umbral))")
+
+    @staticmethod
+    def firma(pesos_quitados):
+        """Forma canónica del multiconjunto de ponderaciones quitadas del mazo."""
+        return tuple(sorted(int(peso) for peso in pesos_quitados))
+
+    def _distribucion(self, ronda, firma):
+        clave = (ronda, firma)
+        distribucion = self._distribuciones.obtener(clave)
+        if distribucion is None:
+            restantes = self.mazo - Counter(firma)
+            pesos = [peso for peso, cantidad in restantes.items() for _ in range(cantidad)]
+            k = RONDAS[ronda][0]
+            distribucion = (math.comb(len(pesos), k), distribucion_sumas(pesos, k))
+            self._distribuciones.guardar(clave, distribucion)
+        return distribucion
+
+    def _calcular(self, ronda, firma, umbral):
+        total, distribucion = self._distribucion(ronda, firma)
+        if total == 0:
+            return 0
+        if RONDAS[ronda][1] == 'mayor':
+            favorables = sum(cantidad for suma, cantidad in distribucion.items() if suma > umbral)
+        else:
+            favorables = sum(cantidad for suma, cantidad in distribucion.items() if suma < umbral)
+        return favorables / total
+
+    def buscar(self, ronda, firma, umbral):
+        """Probabilidad ya calculada (en memoria o en SQLite) para la clave, o None si falta calcularla."""
+        clave = (ronda, firma, umbral)
+        probabilidad = self._probabilidades.obtener(clave)
+        if probabilidad is not None:
+            self.aciertos += 1
+            return probabilidad
+        self.fallos += 1
+        if self._conexion is not None:
+            fila = self._conexion.execute(
+                "SELECT probabilidad FROM probabilidades WHERE ronda = ? AND firma = ? AND umbral = ?",
+                (ronda, ','.join(map(str, firma)), umbral)).fetchone()
+            if fila is not None:
+                self._probabilidades.guardar(clave, fila[0])
+                return fila[0]
+        return None
+
+    def guardar(self, ronda, firma, umbral, probabilidad):
+        """Guarda una probabilidad calculada afuera (por ejemplo, por lotes) en memoria y en SQLite."""
+        self._probabilidades.guardar((ronda, firma, umbral), probabilidad)
+        if self._conexion is not None:
+            self._pendientes.append((ronda, ','.join(map(str, firma)), umbral, probabilidad))
+            if len(self._pendientes) >= self.lote_escritura:
+                self.vaciar()
+
+    def probabilidad(self, ronda, pesos_quitados, umbral):
+        """Probabilidad exacta para la ronda dada las ponderaciones ya quitadas del mazo y el umbral."""
+        firma = self.firma(pesos_quitados)
+        umbral = int(umbral)
+        probabilidad = self.buscar(ronda, firma, umbral)
+        if probabilidad is None:
+            probabilidad = self._calcular(ronda, firma, umbral)
+            self.guardar(ronda, firma, umbral, probabilidad)
+        return probabilidad
+
+    def vaciar(self):
+        """Escribe en SQLite las probabilidades calculadas desde la última escritura."""
+        if self._conexion is not None and self._pendientes:
+            with self._conexion:
+                self._conexion.executemany(
+                    "INSERT OR REPLACE INTO probabilidades VALUES (?, ?, ?, ?)", self._pendientes)
+            self._pendientes = []
+
+    def cerrar(self):
+        self.vaciar()
+        if self._conexion is not None:
+            self._conexion.close()
+            self._conexion = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
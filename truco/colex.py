@@ -0,0 +1,183 @@
+"""
+Sistema combinatorio de números: cada combinación de k posiciones entre n se representa con un
+solo entero, su rango en orden colexicográfico.
+
+El rango de las posiciones c1 < c2 < ... < ck es C(c1, 1) + C(c2, 2) + ... + C(ck, k), un número
+entre 0 y C(n, k) - 1. Una mano de 9 cartas del mazo de 40 entra en 32 bits (C(40, 9) < 2**32)
+y una de 3 cartas en 16. Sortear rangos distintos y recién después convertirlos en posiciones
+da combinaciones uniformes sin repetidas.
+"""
+import math
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=None)
+def tabla_binomiales(n, k):
+    """
+    Arreglo de forma (k + 1, n + 1) con C(i, j) en la fila j, columna i (cada fila, contigua en
+    memoria, es creciente desde i = j - 1); se comparte entre llamadas (solo lectura).
+    """
+    tabla = np.array([[math.comb(i, j) for i in range(n + 1)] for j in range(k + 1)], dtype=np.int64)
+    tabla.setflags(write=False)
+    return tabla
+
+
+def tipo_rango(n, k):
+    """El tipo entero sin signo más chico que alcanza para los rangos de k posiciones entre n."""
+    total = math.comb(n, k)
+    for tipo in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if total - 1 <= np.iinfo(tipo).max:
+            return tipo
+    raise ValueError(f"C({n}, {k}) no entra en 64 bits")
+
+
+def rango(posiciones):
+    """Rango de una combinación dada por sus posiciones (en cualquier orden)."""
+    return sum(math.comb(posicion, i) for i, posicion in enumerate(sorted(posiciones), 1))
+
+
+def desrango(valor, k):
+    """Posiciones (en orden creciente) de la combinación de k elementos con el rango dado."""
+    posiciones = []
+    for i in range(k, 0, -1):
+        # La mayor posición c con C(c, i) <= valor
+        posicion = i - 1
+        while math.comb(posicion + 1, i) <= valor:
+            posicion += 1
+        posiciones.append(posicion)
+        valor -= math.comb(posicion, i)
+    return tuple(reversed(posiciones))
+
+
+def rangos_de_indices(indices, n):
+    """Rango de cada fila de un arreglo 2-D de posiciones entre n (las filas no hace falta ordenarlas)."""
+    indices = np.sort(indices, axis=1)
+    k = indices.shape[1]
+    tabla = tabla_binomiales(n, k)
+    valores = np.zeros(len(indices), dtype=np.int64)
+    for i in range(k):
+        valores += tabla[i + 1, indices[:, i]]
+    return valores.astype(tipo_rango(n, k))
+
+
+def indices_de_rangos(valores, n, k):
+    """Operación inversa de rangos_de_indices: arreglo (len(valores), k) de posiciones crecientes."""
+    if math.comb(n, k) <= MAX_TABLA_COMBINACIONES:
+        return tabla_combinaciones(n, k)[valores]
+    return _calcular_indices_de_rangos(valores, n, k)
+
+
+# Hasta esta cantidad de combinaciones, indices_de_rangos busca en una tabla con todas (unos MB)
+MAX_TABLA_COMBINACIONES = 1 << 20
+
+
+@lru_cache(maxsize=None)
+def tabla_combinaciones(n, k):
+    """Todas las combinaciones de k posiciones entre n, en orden de rango (solo lectura)."""
+    indices = _calcular_indices_de_rangos(np.arange(math.comb(n, k)), n, k)
+    indices.setflags(write=False)
+    return indices
+
+
+def _calcular_indices_de_rangos(valores, n, k):
+    tabla = tabla_binomiales(n, k)
+    restantes = np.asarray(valores, dtype=np.int64).copy()
+    indices = np.empty((len(restantes), k), dtype=np.int8 if n <= 127 else np.int64)
+    for i in range(k, 0, -1):
+        # La mayor posición c con C(c, i) <= rango restante
+        posiciones = tabla[i].searchsorted(restantes, side='right') - 1
+        indices[:, i - 1] = posiciones
+        restantes -= tabla[i, posiciones]
+    return indices
+
+
+def muestrear_rangos(n, k, cantidad, rng):
+    """
+    cantidad rangos distintos elegidos de manera uniforme entre las C(n, k) combinaciones
+    (todas, si son menos que cantidad).
+    """
+    total = math.comb(n, k)
+    return rng.choice(total, size=min(cantidad, total), replace=False)
+
+
+class SorteoSinReposicion:
+    """
+    Rangos distintos entre 0 y total - 1 sorteados por tandas: cada llamada a siguientes()
+    devuelve rangos que no salieron en ninguna tanda anterior, uniformes entre los que quedan.
+    Sirve para un muestreo secuencial en el que no se sabe de antemano cuántas muestras hacen falta.
+    Los candidatos salen de rng en bloques de tamaños fijos (cada uno el doble del anterior) y se
+    toman en el orden en que aparecen por primera vez, así que el resultado no depende de cómo se
+    repartan los pedidos: siguientes(a) y luego siguientes(b) dan los mismos rangos que siguientes(a + b).
+    Los rangos de excluidos (por ejemplo, los de una ejecución anterior) cuentan como ya sorteados.
+    """
+
+    BLOQUE_INICIAL = 64
+    BLOQUE_MAXIMO = 1 << 20
+
+    def __init__(self, total, rng, excluidos=()):
+        self.total = total
+        self.rng = rng
+        # Ordenados, con los pendientes
+        self.sorteados = np.unique(np.asarray(excluidos, dtype=np.int64)) if len(excluidos) else np.empty(0, np.int64)
+        self.pendientes = np.empty(0, dtype=np.int64)  # sorteados y todavía no devueltos, en orden
+        self.bloque = self.BLOQUE_INICIAL
+
+    def siguientes(self, cantidad):
+        """Hasta cantidad rangos nuevos (menos si ya no quedan)."""
+        cantidad = min(cantidad, len(self.pendientes) + self.total - len(self.sorteados))
+        while len(self.pendientes) < cantidad:
+            self._sortear_bloque()
+        nuevos, self.pendientes = self.pendientes[:cantidad], self.pendientes[cantidad:]
+        return nuevos
+
+    def _sortear_bloque(self):
+        # Candidatos con reposición; se descartan los repetidos y los que ya salieron. Se toman de los
+        # 64 bits crudos módulo total (sesgo menor que total / 2**64), mucho más barato que rng.integers
+        candidatos = (self.rng.bit_generator.random_raw(self.bloque) % np.uint64(self.total)).astype(np.int64)
+        self.bloque = min(2 * self.bloque, self.BLOQUE_MAXIMO)
+        orden = candidatos.argsort(kind='stable')
+        ordenados = candidatos[orden]
+        nuevos = np.empty(len(ordenados), dtype=bool)
+        nuevos[0] = True
+        np.not_equal(ordenados[1:], ordenados[:-1], out=nuevos[1:])
+        if not len(self.sorteados) and nuevos.all():
+            # Caso común del primer bloque: sin repetidos
+            self.sorteados, self.pendientes = ordenados, candidatos
+            return
+        if len(self.sorteados):
+            posiciones = np.minimum(self.sorteados.searchsorted(ordenados), len(self.sorteados) - 1)
+            nuevos &= self.sorteados[posiciones] != ordenados
+        self.sorteados = np.sort(np.concatenate((self.sorteados, ordenados[nuevos])))
+        # Los nuevos, en el orden en que salieron
+        self.pendientes = np.concatenate((self.pendientes, candidatos[np.sort(orden[nuevos])]))
+
+
+class GeneradorPorFila:
+    """
+    Un generador de NumPy por fila sin crear uno nuevo cada vez: fila(i) lleva un mismo PCG64 al
+    estado de la semilla avanzado i * 2**64 pasos, así que el flujo de cada fila depende solo de la
+    semilla y de i (no de cuántos números consumieron las otras filas). El generador devuelto se
+    reutiliza, por lo que sirve hasta la siguiente llamada a fila().
+    """
+
+    def __init__(self, semilla):
+        self.bits = np.random.PCG64(semilla)
+        self.inicial = self.bits.state
+        self.generador = np.random.Generator(self.bits)
+
+    def fila(self, i):
+        self.bits.state = self.inicial
+        self.bits.advance(i << 64)
+        return self.generador
+
+
+def combinacion_de_rango(valor, k, mazo):
+    """Cartas de mazo que corresponden al rango de una combinación de k cartas."""
+    return tuple(mazo[posicion] for posicion in desrango(int(valor), k))
+
+
+def rango_de_combinacion(combinacion, posiciones):
+    """Rango de una combinación de cartas; posiciones traduce cada carta a su posición en el mazo."""
+    return rango(posiciones[carta] for carta in combinacion)
@@ -0,0 +1,39 @@
+"""Conteo exacto de combinaciones de cartas según la suma de sus ponderaciones."""
+import math
+from collections import Counter
+
+
+def distribucion_sumas(pesos, k):
+    """
+    Cuenta cuántos subconjuntos de k cartas alcanzan cada suma posible.
+    Recibe las ponderaciones de las cartas disponibles y devuelve {suma: cantidad}.
+    Como solo importa la suma, agrupa las cartas por ponderación y multiplica
+    coeficientes binomiales en lugar de recorrer las combinaciones.
+    """
+    # tabla[j] = {suma: formas de elegir j cartas que suman eso}
+    tabla = [dict() for _ in range(k + 1)]
+    tabla[0][0] = 1
+    for peso, multiplicidad in Counter(pesos).items():
+        nueva = [dict(fila) for fila in tabla]
+        for j in range(1, min(multiplicidad, k) + 1):
+            formas = math.comb(multiplicidad, j)
+            for usadas in range(k - j + 1):
+                destino = nueva[usadas + j]
+                for suma, cantidad in tabla[usadas].items():
+                    clave = suma + j * peso
+                    destino[clave] = destino.get(clave, 0) + cantidad * formas
+        tabla = nueva
+    return tabla[k]
+
+
+def contar_superiores(pesos, k, umbral):
+    """Cuenta los subconjuntos de k cartas cuya suma es estrictamente mayor que umbral."""
+    return sum(cantidad for suma, cantidad in distribucion_sumas(pesos, k).items() if suma > umbral)
+
+
+def probabilidad_superior(pesos, k, umbral):
+    """Probabilidad exacta de que k cartas elegidas al azar sumen más que umbral."""
+    total = math.comb(len(pesos), k)
+    if total == 0:
+        return 0
+    return contar_superiores(pesos, k, umbral) / total
@@ -0,0 +1,132 @@
+"""
+Escritura por lotes de tablas de detalle grandes.
+
+En lugar de acumular un diccionario por fila y escribir todo al final, EscritorColumnar
+guarda columnas tipadas y, cada filas_por_lote filas, las escribe como una parte nueva
+dentro de un directorio. La memoria queda acotada por el tamaño del lote y los datos
+llegan a disco mientras avanza el cálculo. Usa Parquet si pyarrow está instalado y, si
+no, CSV comprimido con gzip.
+"""
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+EXTENSIONES = {'parquet': '.parquet', 'csv.gz': '.csv.gz'}
+
+
+class EscritorColumnar:
+    """
+    columnas es un diccionario {nombre: dtype de NumPy}. Las filas se agregan por lotes de
+    arreglos con agregar_lote o de a una con agregar; vaciar escribe lo pendiente como
+    una parte nueva y cerrar termina de escribir.
+    Al crearse borra las partes que hubiera en ruta, salvo con conservar_partes=True
+    (para reanudar con restaurar a partir de un estado guardado).
+    """
+
+    def __init__(self, ruta, columnas, filas_por_lote=200_000, formato=None, conservar_partes=False):
+        if formato is None:
+            formato = 'parquet' if pa is not None else 'csv.gz'
+        if formato == 'parquet' and pa is None:
+            raise ImportError("Para escribir Parquet hace falta instalar pyarrow")
+        if formato not in EXTENSIONES:
+            raise ValueError(f"Formato desconocido: {formato}")
+        self.ruta = ruta
+        self.columnas = {nombre: np.dtype(dtype) for nombre, dtype in columnas.items()}
+        self.filas_por_lote = filas_por_lote
+        self.formato = formato
+        self.partes = 0
+        self.filas_escritas = 0
+        self._pendientes = {nombre: [] for nombre in self.columnas}
+        self._filas_pendientes = 0
+        os.makedirs(ruta, exist_ok=True)
+        if not conservar_partes:
+            self._borrar_partes_desde(0)
+
+    def _borrar_partes_desde(self, primera):
+        for parte in glob.glob(os.path.join(self.ruta, 'parte-*')):
+            numero = os.path.basename(parte)[len('parte-'):].split('.')[0]
+            if numero.isdigit() and int(numero) >= primera:
+                os.remove(parte)
+
+    def agregar_lote(self, **valores):
+        """Agrega varias filas: un arreglo (o lista) del mismo largo por columna."""
+        largo = None
+        for nombre, dtype in self.columnas.items():
+            arreglo = np.asarray(valores[nombre], dtype=dtype)
+            if largo is None:
+                largo = len(arreglo)
+            elif len(arreglo) != largo:
+                raise ValueError(f"La columna '{nombre}' tiene {len(arreglo)} filas en lugar de {largo}")
+            self._pendientes[nombre].append(arreglo)
+        self._filas_pendientes += largo
+        if self._filas_pendientes >= self.filas_por_lote:
+            self.vaciar()
+
+    def agregar(self, **valores):
+        self.agregar_lote(**{nombre: [valor] for nombre, valor in valores.items()})
+
+    def vaciar(self):
+        """Escribe las filas pendientes como una parte nueva."""
+        if not self._filas_pendientes:
+            return
+        datos = {nombre: np.concatenate(partes) for nombre, partes in self._pendientes.items()}
+        nombre_parte = os.path.join(self.ruta, f'parte-{self.partes:05d}{EXTENSIONES[self.formato]}')
+        temp_parte = nombre_parte + '.tmp'
+        if self.formato == 'parquet':
+            pq.write_table(pa.table(datos), temp_parte)
+        else:
+            pd.DataFrame(datos).to_csv(temp_parte, index=False, compression='gzip')
+        os.replace(temp_parte, nombre_parte)
+        self.partes += 1
+        self.filas_escritas += self._filas_pendientes
+        self._pendientes = {nombre: [] for nombre in self.columnas}
+        self._filas_pendientes = 0
+
+    def estado(self):
+        """Estado para un punto de control: partes completas y filas pendientes de escribir."""
+        return {
+            'partes': self.partes,
+            'filas_escritas': self.filas_escritas,
+            'pendientes': {nombre: np.concatenate(partes) if partes else np.empty(0, dtype=self.columnas[nombre])
+                           for nombre, partes in self._pendientes.items()},
+        }
+
+    def restaurar(self, estado):
+        """
+        Vuelve al estado guardado: borra las partes escritas después del punto de control
+        y recupera las filas que estaban pendientes.
+        """
+        self._borrar_partes_desde(estado['partes'])
+        self.partes = estado['partes']
+        self.filas_escritas = estado['filas_escritas']
+        self._pendientes = {nombre: [arreglo] for nombre, arreglo in estado['pendientes'].items()}
+        self._filas_pendientes = len(next(iter(estado['pendientes'].values()), []))
+
+    def cerrar(self):
+        self.vaciar()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+
+def leer_detalles(ruta):
+    """Carga en un DataFrame todas las partes escritas por EscritorColumnar en ruta."""
+    partes = sorted(glob.glob(os.path.join(ruta, 'parte-*.parquet')))
+    if partes:
+        return pd.concat([pd.read_parquet(parte) for parte in partes], ignore_index=True)
+    partes = sorted(glob.glob(os.path.join(ruta, 'parte-*.csv.gz')))
+    if not partes:
+        return pd.DataFrame()
+    return pd.concat([pd.read_csv(parte) for parte in partes], ignore_index=True)
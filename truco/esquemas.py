@@ -0,0 +1,204 @@
+"""
+Evaluación de varios esquemas de ponderaciones de cartas en una sola pasada.
+
+Un esquema es una tabla {carta: ponderación} como truco.nucleo.cartas; las variantes de la casa
+se escriben en un JSON con solo las cartas que cambian respecto del mazo clásico:
+
+    {"siete_oro_alto": {"7O": 12, "7E": 11}, "ases_parejos": {"1B": 14, "1C": 14, "1O": 14}}
+
+Con los K esquemas como columnas de una matriz W de (40, K), cada lote de manos codificado
+como matriz one-hot X (una fila por mano, un 1 por carta) se puntúa en todos los esquemas con
+un solo producto X @ W. Lo mismo da, con otra matriz, cuántas cartas de cada ponderación de
+cada esquema quitó la mano, y de ahí la distribución exacta de sumas del rival (calculada una
+vez por firma distinta del lote). El recorrido de las manos se hace una sola vez para todos
+los esquemas y el resultado es una tabla de resumen por esquema.
+
+Uso:
+    python -m truco.esquemas variantes.json --ronda 1 --manos 100000 [--reveladas 20] [--salida DIRECTORIO]
+"""
+import argparse
+import json
+import math
+import os
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from truco.cache_probabilidades import RONDAS
+from truco.colex import indices_de_rangos, muestrear_rangos
+from truco.estadisticas import Acumulador, agregar_por_clave, tabla_resumen
+from truco.metricas import Metricas
+from truco.nucleo import cartas
+from truco.poblacion import CARTAS_MANO, RONDAS_POBLACION, RUTA_GUARDADO
+from truco.vectorizado import distribuciones_sumas
+
+ESQUEMA_CLASICO = 'clasico'
+
+
+def completar_esquema(cambios, base=cartas):
+    """Esquema completo a partir de las cartas que cambian respecto de base; ValueError si no es válido."""
+    desconocidas = [carta for carta in cambios if carta not in base]
+    if desconocidas:
+        raise ValueError(f"cartas desconocidas: {', '.join(map(str, desconocidas))}")
+    invalidas = [carta for carta, peso in cambios.items() if not isinstance(peso, int) or peso < 0]
+    if invalidas:
+        raise ValueError(f"las ponderaciones deben ser enteros no negativos: {', '.join(invalidas)}")
+    return {**base, **cambios}
+
+
+def cargar_esquemas(ruta, base=cartas):
+    """
+    Lee un JSON {nombre: {carta: ponderación}} y devuelve {nombre: esquema completo}, con el
+    mazo clásico primero (como 'clasico') si el archivo no define un esquema con ese nombre.
+    """
+    with open(ruta, encoding='utf-8') as archivo:
+        datos = json.load(archivo)
+    if not isinstance(datos, dict) or not all(isinstance(cambios, dict) for cambios in datos.values()):
+        raise ValueError(f"'{ruta}' debe tener la forma {{nombre: {{carta: ponderación}}}}")
+    esquemas = {ESQUEMA_CLASICO: dict(base)}
+    for nombre, cambios in datos.items():
+        esquemas[nombre] = completar_esquema(cambios, base)
+    return esquemas
+
+
+def one_hot(indices, total_cartas):
+    """Matriz (filas, total_cartas) con un 1 en las posiciones de cada fila de indices."""
+    matriz = np.zeros((len(indices), total_cartas), dtype=np.int16)
+    np.put_along_axis(matriz, np.asarray(indices, dtype=np.intp), 1, axis=1)
+    return matriz
+
+
+class EvaluadorEsquemas:
+    """
+    Probabilidades de cada ronda para lotes de manos en todos los esquemas a la vez.
+    Las manos y las cartas reveladas son arreglos 2-D de posiciones dentro de mazo.
+    """
+
+    def __init__(self, esquemas, mazo=None):
+        self.nombres = list(esquemas)
+        self.mazo = list(mazo if mazo is not None else next(iter(esquemas.values())))
+        for nombre, esquema in esquemas.items():
+            if set(esquema) != set(self.mazo):
+                raise ValueError(f"el esquema '{nombre}' no tiene las mismas cartas que el mazo")
+        # pesos[carta, esquema]
+        self.pesos = np.array([[esquemas[nombre][carta] for nombre in self.nombres] for carta in self.mazo],
+                              dtype=np.int64)
+        # Columnas de pertenencia a cada ponderación de cada esquema, todas en una sola matriz:
+        # las del esquema e van de inicio_clases[e] a inicio_clases[e + 1]
+        self.pesos_clases = [np.unique(self.pesos[:, e]) for e in range(len(self.nombres))]
+        self.inicio_clases = np.concatenate(([0], np.cumsum([len(p) for p in self.pesos_clases])))
+        self.clases = np.concatenate([self.pesos[:, [e]] == pesos_clases[None, :]
+                                      for e, pesos_clases in enumerate(self.pesos_clases)], axis=1).astype(np.int16)
+        self.conteos_mazo = self.clases.sum(axis=0)
+
+    def puntuar(self, indices):
+        """Puntos de cada fila de indices en cada esquema, de forma (filas, esquemas)."""
+        return one_hot(indices, len(self.mazo)) @ self.pesos
+
+    def probabilidades(self, ronda, indices_mano, indices_reveladas=None):
+        """
+        (claves, probabilidades), ambas de forma (manos, esquemas): la clave de la ronda (PG, PG
+        reducido o PG super reducido) y la probabilidad exacta de la ronda en cada esquema.
+        """
+        cartas_rival, comparacion = RONDAS[ronda]
+        mano = one_hot(indices_mano, len(self.mazo))
+        quitadas = mano
+        claves = mano @ self.pesos
+        if indices_reveladas is not None and np.shape(indices_reveladas)[1]:
+            reveladas = one_hot(indices_reveladas, len(self.mazo))
+            quitadas = mano + reveladas
+            claves = claves - reveladas @ self.pesos
+        conteos = self.conteos_mazo - quitadas @ self.clases
+        total = math.comb(len(self.mazo) - int(quitadas[0].sum()), cartas_rival)
+        probabilidades = np.empty(claves.shape)
+        for e, pesos_clases in enumerate(self.pesos_clases):
+            conteos_esquema = conteos[:, self.inicio_clases[e]:self.inicio_clases[e + 1]]
+            # Muchas manos comparten firma: la distribución del rival se calcula una vez por firma
+            firmas, fila_de_firma = np.unique(conteos_esquema, axis=0, return_inverse=True)
+            restantes = distribuciones_sumas(firmas, pesos_clases, cartas_rival)
+            # menores[firma, t] = combinaciones del rival que suman menos que t
+            menores = np.zeros((len(firmas), restantes.shape[1] + 1), dtype=np.int64)
+            np.cumsum(restantes, axis=1, out=menores[:, 1:])
+            fila_de_firma = fila_de_firma.reshape(-1)
+            if comparacion == 'menor':
+                favorables = menores[fila_de_firma, np.clip(claves[:, e], 0, restantes.shape[1])]
+            else:
+                favorables = total - menores[fila_de_firma, np.clip(claves[:, e] + 1, 0, restantes.shape[1])]
+            probabilidades[:, e] = favorables / total
+        return claves, probabilidades
+
+
+def muestrear_lotes(ronda, manos, reveladas, rng, total_cartas=len(cartas), manos_por_lote=4096):
+    """
+    Genera lotes (indices_mano, indices_reveladas) con manos distintas uniformes entre todas las
+    de 9 cartas y, para las rondas 2 y 3, reveladas combinaciones del rival uniformes (con
+    reposición) entre las cartas que quedan, repitiendo cada mano reveladas veces seguidas.
+    """
+    cantidad_reveladas = RONDAS_POBLACION[ronda][0]
+    rangos = muestrear_rangos(total_cartas, CARTAS_MANO, manos, rng)
+    for inicio in range(0, len(rangos), manos_por_lote):
+        indices_mano = indices_de_rangos(rangos[inicio:inicio + manos_por_lote], total_cartas, CARTAS_MANO)
+        if not cantidad_reveladas:
+            yield indices_mano, None
+            continue
+        indices_mano = np.repeat(indices_mano, reveladas, axis=0)
+        libres = one_hot(indices_mano, total_cartas) == 0
+        restantes = np.nonzero(libres)[1].reshape(len(indices_mano), -1)
+        orden = rng.random(restantes.shape).argsort(axis=1)[:, :cantidad_reveladas]
+        yield indices_mano, np.take_along_axis(restantes, orden, axis=1)
+
+
+def resumir_esquemas(evaluador, ronda, lotes, metricas=None):
+    """Recorre los lotes una vez y acumula por esquema y por clave: {esquema: {clave: Acumulador}}."""
+    if metricas is None:
+        metricas = Metricas()
+    acumuladores = {nombre: defaultdict(Acumulador) for nombre in evaluador.nombres}
+    for indices_mano, indices_reveladas in lotes:
+        with metricas.etapa(f'esquemas_ronda_{ronda}'):
+            claves, probabilidades = evaluador.probabilidades(ronda, indices_mano, indices_reveladas)
+            for e, nombre in enumerate(evaluador.nombres):
+                agregar_por_clave(acumuladores[nombre], claves[:, e], probabilidades[:, e])
+        metricas.contar('filas', len(indices_mano))
+        metricas.progreso(lambda: (
+            f"Ronda {ronda}: {metricas.contadores['filas']:,} filas en {len(evaluador.nombres)} esquemas "
+            f"({metricas.por_segundo('filas'):,.0f}/s)"))
+    return acumuladores
+
+
+def guardar_resumenes(acumuladores, ronda, sufijo, ruta_guardado=RUTA_GUARDADO):
+    """Guarda un CSV de resumen por esquema; devuelve {esquema: nombre del archivo}."""
+    _, clave, nombre_ronda = RONDAS_POBLACION[ronda]
+    os.makedirs(ruta_guardado, exist_ok=True)
+    archivos = {}
+    for nombre, acumuladores_esquema in acumuladores.items():
+        nombre_archivo = os.path.join(ruta_guardado,
+                                      f'probabilidades_{nombre_ronda}_ronda_resumen_esquema_{nombre}_{sufijo}.csv')
+        pd.DataFrame(tabla_resumen(acumuladores_esquema, clave)).to_csv(nombre_archivo, index=False, encoding='utf-8')
+        archivos[nombre] = nombre_archivo
+    return archivos
+
+
+def principal(argumentos=None):
+    parser = argparse.ArgumentParser(description="Resúmenes de una ronda para varios esquemas de ponderaciones.")
+    parser.add_argument('esquemas', help="JSON {nombre: {carta: ponderación}} con las cartas que cambia cada variante")
+    parser.add_argument('--ronda', type=int, choices=(1, 2, 3), default=1)
+    parser.add_argument('--manos', type=int, default=10_000, help="manos de 9 cartas distintas a muestrear")
+    parser.add_argument('--reveladas', type=int, default=20,
+                        help="combinaciones reveladas por el rival a muestrear por mano (rondas 2 y 3)")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--salida', default=RUTA_GUARDADO, help="directorio de resultados")
+    parser.add_argument('--silencioso', action='store_true', help="no mostrar progreso ni mensajes")
+    args = parser.parse_args(argumentos)
+    metricas = Metricas(silencioso=args.silencioso)
+    evaluador = EvaluadorEsquemas(cargar_esquemas(args.esquemas), list(cartas))
+    lotes = muestrear_lotes(args.ronda, args.manos, args.reveladas, np.random.default_rng(args.semilla))
+    acumuladores = resumir_esquemas(evaluador, args.ronda, lotes, metricas)
+    sufijo = f'{args.manos}' if args.ronda == 1 else f'{args.manos}_{args.reveladas}'
+    for nombre, nombre_archivo in guardar_resumenes(acumuladores, args.ronda, sufijo, args.salida).items():
+        metricas.mostrar(f"Esquema '{nombre}': '{nombre_archivo}'")
+    metricas.mostrar(f"Tiempo total de cálculo: {metricas.transcurrido:.2f} segundos")
+
+
+if __name__ == '__main__':
+    principal()
@@ -0,0 +1,130 @@
+"""Estadísticas acumulables que se pueden combinar sin guardar cada probabilidad."""
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class Acumulador:
+    """
+    Lleva cantidad, suma, suma de cuadrados, mínimo y máximo de una serie de valores.
+    Dos acumuladores se combinan sumando sus campos, así que sirven para resúmenes
+    parciales que luego se fusionan.
+    """
+
+    __slots__ = ('cantidad', 'suma', 'suma_cuadrados', 'minimo', 'maximo')
+
+    def __init__(self, cantidad=0, suma=0.0, suma_cuadrados=0.0, minimo=math.inf, maximo=-math.inf):
+        self.cantidad = cantidad
+        self.suma = suma
+        self.suma_cuadrados = suma_cuadrados
+        self.minimo = minimo
+        self.maximo = maximo
+
+    def agregar(self, valor):
+        valor = float(valor)
+        self.cantidad += 1
+        self.suma += valor
+        self.suma_cuadrados += valor * valor
+        self.minimo = min(self.minimo, valor)
+        self.maximo = max(self.maximo, valor)
+
+    def agregar_lote(self, valores):
+        """Agrega un arreglo de NumPy de una sola vez."""
+        if len(valores) == 0:
+            return
+        self.cantidad += len(valores)
+        self.suma += float(valores.sum())
+        self.suma_cuadrados += float((valores * valores).sum())
+        self.minimo = min(self.minimo, float(valores.min()))
+        self.maximo = max(self.maximo, float(valores.max()))
+
+    def combinar(self, otro):
+        self.cantidad += otro.cantidad
+        self.suma += otro.suma
+        self.suma_cuadrados += otro.suma_cuadrados
+        self.minimo = min(self.minimo, otro.minimo)
+        self.maximo = max(self.maximo, otro.maximo)
+        return self
+
+    @property
+    def promedio(self):
+        return self.suma / self.cantidad if self.cantidad else math.nan
+
+    @property
+    def desviacion_std(self):
+        """Desviación estándar poblacional, igual que np.std."""
+        if not self.cantidad:
+            return math.nan
+        varianza = self.suma_cuadrados / self.cantidad - self.promedio ** 2
+        return math.sqrt(max(varianza, 0.0))
+
+    def a_dict(self):
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+    @classmethod
+    def desde_dict(cls, datos):
+        return cls(**datos)
+
+
+def agregar_por_clave(acumuladores, claves, valores):
+    """Agrega cada valor al acumulador de su clave; acumuladores suele ser un defaultdict(Acumulador)."""
+    claves = np.asarray(claves)
+    for clave in np.unique(claves):
+        acumuladores[clave.item()].agregar_lote(valores[claves == clave])
+
+
+def tabla_resumen(acumuladores, nombre_clave):
+    """Filas del resumen por clave (ordenadas), con las columnas de los CSV de resumen."""
+    resumen = []
+    for clave in sorted(acumuladores):
+        estadisticas = acumuladores[clave]
+        if estadisticas.cantidad:
+            resumen.append({
+                nombre_clave: clave,
+                'Cantidad': estadisticas.cantidad,
+                'Probabilidad_promedio': estadisticas.promedio,
+                'Probabilidad_min': estadisticas.minimo,
+                'Probabilidad_max': estadisticas.maximo,
+                'Desviacion_std': estadisticas.desviacion_std
+            })
+    return resumen
+
+
+def resumen_primera_ronda(estadisticas_por_pg):
+    """
+    Hoja Resumen del Excel de la primera ronda como DataFrame: una fila por PG a partir de
+    {pg: (cantidad, promedio, mínimo, máximo, desviación estándar)} y al final la fila de
+    Estadísticas Globales (total de combinaciones, promedio de los promedios y de los desvíos,
+    mínimo de los mínimos y máximo de los máximos).
+    """
+    df_resumen = pd.DataFrame([{
+        'Puntos': pg,
+        'Cantidad_Combinaciones': cantidad,
+        'Probabilidad_Promedio': promedio,
+        'Probabilidad_Min': minimo,
+        'Probabilidad_Max': maximo,
+        'Desviacion_Estandar': desviacion_std
+    } for pg, (cantidad, promedio, minimo, maximo, desviacion_std) in sorted(estadisticas_por_pg.items())])
+    estadisticas_globales = pd.DataFrame({
+        'Puntos': ['Estadísticas Globales'],
+        'Cantidad_Combinaciones': [df_resumen['Cantidad_Combinaciones'].sum()],
+        'Probabilidad_Promedio': [df_resumen['Probabilidad_Promedio'].mean()],
+        'Probabilidad_Min': [df_resumen['Probabilidad_Min'].min()],
+        'Probabilidad_Max': [df_resumen['Probabilidad_Max'].max()],
+        'Desviacion_Estandar': [df_resumen['Desviacion_Estandar'].mean()]
+    })
+    return pd.concat([df_resumen, estadisticas_globales], ignore_index=True)
+
+
+def tabla_resumen_ronda(ronda, acumuladores, nombre_clave):
+    """
+    DataFrame del resumen de una ronda a partir de sus acumuladores: para la ronda 1 con las
+    columnas y la fila global de la hoja Resumen de su script, para las demás con tabla_resumen.
+    """
+    if ronda == 1:
+        return resumen_primera_ronda({
+            pg: (estadisticas.cantidad, estadisticas.promedio, estadisticas.minimo, estadisticas.maximo,
+                 estadisticas.desviacion_std)
+            for pg, estadisticas in acumuladores.items() if estadisticas.cantidad})
+    return pd.DataFrame(tabla_resumen(acumuladores, nombre_clave))
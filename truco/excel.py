@@ -0,0 +1,44 @@
+"""
+Exportación a Excel en modo de solo escritura.
+
+openpyxl en modo write_only escribe cada fila directamente al archivo en lugar de
+mantener todas las celdas en memoria. Como los anchos de columna tienen que fijarse
+antes de la primera fila, se calculan con una pasada previa sobre los mismos datos,
+que es lineal y no necesita recorrer celdas de la hoja.
+"""
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+
+
+def _calcular_anchos(encabezados, filas):
+    anchos = [len(str(encabezado)) for encabezado in encabezados]
+    for fila in filas:
+        for i, valor in enumerate(fila):
+            largo = len(str(valor))
+            if largo > anchos[i]:
+                anchos[i] = largo
+    return anchos
+
+
+def escribir_libro_en_flujo(ruta, hojas):
+    """
+    Escribe un libro de Excel con una hoja por cada (nombre, encabezados, generar_filas).
+    generar_filas() debe devolver un iterable nuevo de filas cada vez que se llama:
+    se recorre una vez para calcular los anchos y otra para escribir.
+    """
+    libro = Workbook(write_only=True)
+    for nombre, encabezados, generar_filas in hojas:
+        hoja = libro.create_sheet(nombre)
+        for i, ancho in enumerate(_calcular_anchos(encabezados, generar_filas()), 1):
+            hoja.column_dimensions[get_column_letter(i)].width = ancho + 2
+        fila_encabezados = []
+        for encabezado in encabezados:
+            celda = WriteOnlyCell(hoja, value=encabezado)
+            celda.font = Font(bold=True)
+            fila_encabezados.append(celda)
+        hoja.append(fila_encabezados)
+        for fila in generar_filas():
+            hoja.append(fila)
+    libro.save(ruta)
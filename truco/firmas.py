@@ -0,0 +1,270 @@
+"""
+Enumeración de manos por firma de ponderaciones.
+
+Una firma indica cuántas cartas de cada ponderación tiene una mano. Como el mazo
+tiene solo 14 ponderaciones distintas, recorrer firmas (y contar cuántas manos
+reales representa cada una con productos de binomiales) es muchísimo más rápido
+que recorrer las 273 millones de combinaciones de 9 cartas.
+"""
+import math
+import random
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from itertools import accumulate, combinations, product
+from statistics import pstdev
+
+# Versión de los algoritmos que eligen las manos (uniforme, estratificado, Neyman). Forma parte de la
+# clave de truco.cache_manos: hay que subirla cada vez que cambie qué manos se eligen con una semilla
+VERSION_SELECCION = 2
+
+
+def agrupar_por_peso(cartas):
+    """Devuelve una lista de (peso, [cartas con ese peso]) ordenada por peso."""
+    clases = defaultdict(list)
+    for carta, peso in cartas.items():
+        clases[peso].append(carta)
+    return sorted(clases.items())
+
+
+def enumerar_firmas(clases, k):
+    """
+    Genera todas las firmas de k cartas como tuplas (firma, multiplicidad, suma),
+    donde firma[i] es la cantidad de cartas tomadas de clases[i] y multiplicidad
+    la cantidad de manos reales que comparten esa firma.
+    """
+    tamanos = [len(cartas_clase) for _, cartas_clase in clases]
+    # restantes[i] = cartas disponibles desde la clase i en adelante
+    restantes = list(accumulate(reversed(tamanos)))[::-1] + [0]
+    firma = [0] * len(clases)
+
+    def recorrer(i, faltan, multiplicidad, suma):
+        if faltan == 0:
+            yield tuple(firma), multiplicidad, suma
+            return
+        if i == len(clases) or restantes[i] < faltan:
+            return
+        peso = clases[i][0]
+        for j in range(min(tamanos[i], faltan) + 1):
+            firma[i] = j
+            yield from recorrer(i + 1, faltan - j, multiplicidad * math.comb(tamanos[i], j), suma + j * peso)
+        firma[i] = 0
+
+    yield from recorrer(0, k, 1, 0)
+
+
+def firmas_por_pg(cartas, k=9):
+    """Agrupa las firmas de k cartas por PG: {pg: [(firma, multiplicidad), ...]}."""
+    clases = agrupar_por_peso(cartas)
+    agrupadas = defaultdict(list)
+    for firma, multiplicidad, suma in enumerar_firmas(clases, k):
+        agrupadas[suma].append((firma, multiplicidad))
+    return clases, dict(agrupadas)
+
+
+def histograma_pg(cartas, k=9):
+    """Cantidad exacta de manos de k cartas para cada PG: {pg: cantidad}."""
+    _, agrupadas = firmas_por_pg(cartas, k)
+    return {pg: sum(multiplicidad for _, multiplicidad in firmas) for pg, firmas in agrupadas.items()}
+
+
+def _posiciones(cartas):
+    return {carta: i for i, carta in enumerate(cartas)}
+
+
+def manos_de_firma(cartas, clases, firma):
+    """Genera todas las manos reales (en el orden del mazo) que tienen la firma dada."""
+    posiciones = _posiciones(cartas)
+    opciones = [combinations(cartas_clase, j) for (_, cartas_clase), j in zip(clases, firma)]
+    for partes in product(*opciones):
+        yield tuple(sorted((carta for parte in partes for carta in parte), key=posiciones.__getitem__))
+
+
+def muestrear_manos_de_firmas(cartas, clases, firmas, cantidad, rng=random, excluir=frozenset()):
+    """
+    Devuelve cantidad manos distintas elegidas de manera uniforme entre todas las manos
+    que representan las firmas dadas. Si hay menos manos que cantidad, devuelve todas.
+    Las manos de excluir (un conjunto de manos de esas firmas, en el orden del mazo) no se eligen.
+    """
+    total = sum(multiplicidad for _, multiplicidad in firmas)
+    if total - len(excluir) <= cantidad:
+        return [mano for firma, _ in firmas for mano in manos_de_firma(cartas, clases, firma) if mano not in excluir]
+    posiciones = _posiciones(cartas)
+    acumulados = list(accumulate(multiplicidad for _, multiplicidad in firmas))
+    elegidas = {}
+    while len(elegidas) < cantidad:
+        # Elegir la firma con probabilidad proporcional a su multiplicidad y luego
+        # las cartas de cada clase al azar da una mano uniforme del PG
+        firma, _ = firmas[bisect_right(acumulados, rng.random() * total)]
+        mano = [carta
+                for (_, cartas_clase), j in zip(clases, firma)
+                if j
+                for carta in rng.sample(cartas_clase, j)]
+        mano = tuple(sorted(mano, key=posiciones.__getitem__))
+        if mano not in excluir:
+            elegidas.setdefault(mano, None)
+    return list(elegidas)
+
+
+def muestrear_manos_por_pg(cartas, k, max_combinaciones, rng=random, seleccionar=muestrear_manos_de_firmas):
+    """
+    Para cada PG devuelve hasta max_combinaciones manos de k cartas distintas y uniformes.
+    Para PG con menos manos que max_combinaciones devuelve todas.
+    seleccionar(cartas, clases, firmas, cantidad, rng) permite cambiar cómo se eligen las manos de cada PG.
+    """
+    clases, agrupadas = firmas_por_pg(cartas, k)
+    return {pg: seleccionar(cartas, clases, agrupadas[pg], max_combinaciones, rng)
+            for pg in sorted(agrupadas)}
+
+
+def ampliar_manos_por_pg(cartas, anteriores, max_combinaciones, rng=random, k=9):
+    """
+    Para cada PG, manos de k cartas distintas de las de anteriores ({pg: [manos]}) hasta completar
+    max_combinaciones entre anteriores y nuevas (todas las que falten si el PG tiene menos):
+    {pg: [manos nuevas]}. Si las anteriores eran una muestra uniforme de manos distintas del PG,
+    anteriores más nuevas también lo es.
+    """
+    clases, agrupadas = firmas_por_pg(cartas, k)
+    nuevas = {}
+    for pg in sorted(agrupadas):
+        previas = set(anteriores.get(pg, ()))
+        faltan = max_combinaciones - len(previas)
+        nuevas[pg] = muestrear_manos_de_firmas(cartas, clases, agrupadas[pg], faltan, rng, previas) if faltan > 0 else []
+    return nuevas
+
+
+# Las cartas que más mueven la probabilidad dentro de un PG: los 3, el 7 de oro, el 7 de espada,
+# el ancho de basto y el ancho de espada
+PESO_MINIMO_ALTAS = 10
+# Manos por estrato del piloto que estima el desvío de cada estrato en la asignación de Neyman
+MUESTRAS_PILOTO = 4
+
+
+def clave_estrato(clases, firma, peso_minimo=PESO_MINIMO_ALTAS):
+    """
+    Clave de estrato de una firma: cuántas cartas tiene con ponderación desde peso_minimo en
+    total y de cada una de esas ponderaciones. Ordenar por clave deja juntas las del mismo total.
+    """
+    altas = tuple(cantidad for (peso, _), cantidad in zip(clases, firma) if peso >= peso_minimo)
+    return sum(altas), altas
+
+
+def clave_estrato_mano(cartas, clases, mano, peso_minimo=PESO_MINIMO_ALTAS):
+    """Clave de estrato de una mano, la misma que clave_estrato de su firma."""
+    pesos = [cartas[carta] for carta in mano]
+    altas = tuple(pesos.count(peso) for peso, _ in clases if peso >= peso_minimo)
+    return sum(altas), altas
+
+
+def estratos_de_pg(clases, firmas, maximo, peso_minimo=PESO_MINIMO_ALTAS):
+    """
+    Divide las firmas de un PG en a lo sumo maximo estratos: primero por clave_estrato y, si hay
+    más claves que maximo, uniendo el estrato más chico con su vecino más chico hasta que alcancen
+    (así cada estrato puede recibir al menos una muestra y ninguno queda sin representar).
+    Devuelve ([[(firma, multiplicidad), ...] por estrato], {clave: índice del estrato}).
+    """
+    por_clave = defaultdict(list)
+    for firma, multiplicidad in firmas:
+        por_clave[clave_estrato(clases, firma, peso_minimo)].append((firma, multiplicidad))
+    # [claves, firmas, manos] por estrato, en orden de clave
+    estratos = [[[clave], firmas_clave, sum(multiplicidad for _, multiplicidad in firmas_clave)]
+                for clave, firmas_clave in sorted(por_clave.items())]
+    while len(estratos) > max(maximo, 1):
+        i = min(range(len(estratos)), key=lambda i: estratos[i][2])
+        vecinos = [j for j in (i - 1, i + 1) if 0 <= j < len(estratos)]
+        j = min(vecinos, key=lambda j: estratos[j][2])
+        primero, segundo = sorted((i, j))
+        claves, firmas_estrato, manos = estratos.pop(segundo)
+        estratos[primero][0] += claves
+        estratos[primero][1] += firmas_estrato
+        estratos[primero][2] += manos
+    estrato_de_clave = {clave: indice for indice, (claves, _, _) in enumerate(estratos) for clave in claves}
+    return [firmas_estrato for _, firmas_estrato, _ in estratos], estrato_de_clave
+
+
+def asignar_muestras(prioridades, capacidades, cantidad, minimos=None):
+    """
+    Reparte cantidad muestras entre estratos en proporción a prioridades (el tamaño del estrato
+    para la asignación proporcional, tamaño por desvío para la de Neyman), sin pasar la capacidad
+    de ninguno. Cada estrato parte de minimos[clave] muestras (por defecto una, de los más grandes
+    a los más chicos, para que ninguno quede sin representar); lo que no entra por la capacidad se
+    reparte entre el resto.
+    """
+    if minimos is None:
+        asignadas = dict.fromkeys(capacidades, 0)
+        restantes = cantidad
+        for clave in sorted(capacidades, key=lambda clave: -capacidades[clave]):
+            if restantes == 0:
+                break
+            asignadas[clave] = 1
+            restantes -= 1
+    else:
+        asignadas = dict(minimos)
+        restantes = cantidad - sum(asignadas.values())
+    while restantes > 0:
+        abiertos = [clave for clave in capacidades if asignadas[clave] < capacidades[clave]]
+        if not abiertos:
+            break
+        pesos = {clave: prioridades[clave] for clave in abiertos}
+        if sum(pesos.values()) <= 0:
+            pesos = {clave: capacidades[clave] for clave in abiertos}
+        total = sum(pesos.values())
+        cuotas = {clave: restantes * pesos[clave] / total for clave in abiertos}
+        extra = {clave: min(int(cuotas[clave]), capacidades[clave] - asignadas[clave]) for clave in abiertos}
+        if not any(extra.values()):
+            # Ninguna cuota llega a una muestra entera: una a cada uno de los restos más grandes
+            for clave in sorted(abiertos, key=lambda clave: -cuotas[clave])[:restantes]:
+                extra[clave] = 1
+        for clave, cantidad_extra in extra.items():
+            asignadas[clave] += cantidad_extra
+            restantes -= cantidad_extra
+    return asignadas
+
+
+def muestrear_manos_estratificado(cartas, clases, firmas, cantidad, rng=random, evaluar=None,
+                                  peso_minimo=PESO_MINIMO_ALTAS):
+    """
+    Como muestrear_manos_de_firmas, pero divide las manos del PG en a lo sumo cantidad estratos
+    según cuántas cartas altas tienen (ver estratos_de_pg) y elige dentro de cada estrato una
+    cantidad de manos uniformes fijada por asignar_muestras. Sin evaluar la asignación es
+    proporcional al tamaño de cada estrato; con evaluar(mano) -> probabilidad es la de Neyman
+    (tamaño por desvío), con el desvío estimado en un piloto de hasta MUESTRAS_PILOTO manos por
+    estrato que usa a lo sumo la mitad de cantidad. Las manos del piloto forman parte de la muestra;
+    si no alcanza para dos por estrato la asignación es proporcional.
+    Las estadísticas de la muestra se ponderan con pesos_estratificados.
+    """
+    if sum(multiplicidad for _, multiplicidad in firmas) <= cantidad:
+        return muestrear_manos_de_firmas(cartas, clases, firmas, cantidad, rng)
+    estratos, _ = estratos_de_pg(clases, firmas, cantidad, peso_minimo)
+    tamanos = {indice: sum(multiplicidad for _, multiplicidad in firmas_estrato)
+               for indice, firmas_estrato in enumerate(estratos)}
+    prioridades = tamanos
+    pilotos = dict.fromkeys(tamanos, ())
+    minimos = None
+    muestras_piloto = min(MUESTRAS_PILOTO, cantidad // (2 * len(estratos)))
+    if evaluar is not None and muestras_piloto >= 2:
+        prioridades = {}
+        for indice, firmas_estrato in enumerate(estratos):
+            pilotos[indice] = muestrear_manos_de_firmas(cartas, clases, firmas_estrato, muestras_piloto, rng)
+            probabilidades = [evaluar(mano) for mano in pilotos[indice]]
+            prioridades[indice] = tamanos[indice] * (pstdev(probabilidades) if len(probabilidades) > 1 else 0.0)
+        minimos = {indice: len(piloto) for indice, piloto in pilotos.items()}
+    asignadas = asignar_muestras(prioridades, tamanos, cantidad, minimos)
+    # Cada estrato: su piloto más manos nuevas distintas, una muestra uniforme de las manos del estrato
+    return [mano
+            for indice, firmas_estrato in enumerate(estratos)
+            for mano in list(pilotos[indice]) + muestrear_manos_de_firmas(
+                cartas, clases, firmas_estrato, asignadas[indice] - len(pilotos[indice]), rng, set(pilotos[indice]))]
+
+
+def pesos_estratificados(cartas, clases, firmas, manos, peso_minimo=PESO_MINIMO_ALTAS):
+    """
+    Peso de cada mano de una muestra estratificada de un PG (con los mismos estratos que
+    muestrear_manos_estratificado para esa cantidad de manos): manos del estrato en el PG sobre
+    manos del estrato en la muestra. Con estos pesos, los promedios de la muestra estiman los
+    de todas las manos del PG aunque los estratos no estén representados en proporción.
+    """
+    estratos, estrato_de_clave = estratos_de_pg(clases, firmas, len(manos), peso_minimo)
+    tamanos = [sum(multiplicidad for _, multiplicidad in firmas_estrato) for firmas_estrato in estratos]
+    indices = [estrato_de_clave[clave_estrato_mano(cartas, clases, mano, peso_minimo)] for mano in manos]
+    en_muestra = Counter(indices)
+    return [tamanos[indice] / en_muestra[indice] for indice in indices]
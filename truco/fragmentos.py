@@ -0,0 +1,140 @@
+"""
+Ejecución del pipeline repartida en fragmentos y combinación de los resultados parciales.
+
+Con --shard i/N cada máquina procesa solo los PG del fragmento i (el reparto es determinista
+y equilibra la cantidad de manos) y guarda un archivo parcial en JSON con, para cada ronda,
+cantidad, suma, suma de cuadrados, mínimo y máximo de las probabilidades por clave. Esos
+campos se suman entre fragmentos, así que combinarlos da el mismo resumen que una sola
+ejecución sobre todos los PG.
+
+Uso:
+    python -m truco.pipeline --max-9 100 --shard 1/4      (en cada máquina, de 1/4 a 4/4)
+    python -m truco.fragmentos "E:\\TRUCO\\probabilidades_pipeline_parcial_100_50_*de4.json"
+"""
+import argparse
+import glob
+import json
+import os
+import tempfile
+
+from truco.estadisticas import Acumulador, tabla_resumen_ronda
+
+VERSION_PARCIAL = 1
+
+
+def leer_fragmento(texto):
+    """Convierte 'i/N' en (i, N), con 1 <= i <= N; sirve como type de argparse."""
+    try:
+        fragmento, total = (int(parte) for parte in texto.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"se esperaba i/N, por ejemplo 2/4, y se recibió '{texto}'") from None
+    if not 1 <= fragmento <= total:
+        raise argparse.ArgumentTypeError(f"el fragmento debe estar entre 1 y {total}: '{texto}'")
+    return fragmento, total
+
+
+def repartir_pgs(manos_por_pg, total_fragmentos):
+    """
+    Reparte los PG en total_fragmentos listas con cantidades de manos parecidas: cada PG, de
+    más manos a menos, va al fragmento con menos manos hasta el momento. Solo depende de las
+    cantidades, así que todas las máquinas obtienen el mismo reparto.
+    """
+    fragmentos = [[] for _ in range(total_fragmentos)]
+    cargas = [0] * total_fragmentos
+    for pg in sorted(manos_por_pg, key=lambda pg: (-len(manos_por_pg[pg]), pg)):
+        destino = min(range(total_fragmentos), key=lambda i: (cargas[i], i))
+        fragmentos[destino].append(pg)
+        cargas[destino] += len(manos_por_pg[pg])
+    return [sorted(pgs) for pgs in fragmentos]
+
+
+def guardar_parcial(ruta, parametros, fragmento, pgs, rondas):
+    """
+    Guarda el resultado parcial de un fragmento. rondas es {ronda: (clave, nombre del archivo
+    de resumen, {valor de la clave: Acumulador})}.
+    """
+    datos = {
+        'version': VERSION_PARCIAL,
+        'parametros': parametros,
+        'fragmento': list(fragmento),
+        'pgs': list(pgs),
+        'rondas': {str(ronda): {'clave': clave,
+                                'archivo_resumen': archivo_resumen,
+                                'acumuladores': {str(valor): acumulador.a_dict()
+                                                 for valor, acumulador in sorted(acumuladores.items())}}
+                   for ronda, (clave, archivo_resumen, acumuladores) in rondas.items()},
+    }
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    temp_archivo = None
+    try:
+        with tempfile.NamedTemporaryFile('w', delete=False, suffix='.tmp', dir=directorio, encoding='utf-8') as tmp:
+            temp_archivo = tmp.name
+            json.dump(datos, tmp, indent=1)
+        os.replace(temp_archivo, ruta)
+    except BaseException:
+        if temp_archivo and os.path.exists(temp_archivo):
+            os.remove(temp_archivo)
+        raise
+
+
+def cargar_parcial(ruta):
+    with open(ruta, encoding='utf-8') as archivo:
+        datos = json.load(archivo)
+    if datos.get('version') != VERSION_PARCIAL:
+        raise ValueError(f"'{ruta}' no es un resultado parcial de esta versión")
+    for ronda in datos['rondas'].values():
+        ronda['acumuladores'] = {int(valor): Acumulador.desde_dict(campos)
+                                 for valor, campos in ronda['acumuladores'].items()}
+    return datos
+
+
+def combinar_parciales(rutas):
+    """
+    Combina los resultados parciales de todos los fragmentos de una misma ejecución.
+    Devuelve (parametros, {ronda: (clave, nombre del archivo de resumen, acumuladores)}).
+    Falla con ValueError si los parciales son de ejecuciones distintas, si falta algún
+    fragmento o si alguno está repetido.
+    """
+    if not rutas:
+        raise ValueError("No hay resultados parciales para combinar")
+    parciales = [cargar_parcial(ruta) for ruta in rutas]
+    parametros = parciales[0]['parametros']
+    total_fragmentos = parciales[0]['fragmento'][1]
+    vistos = {}
+    for ruta, parcial in zip(rutas, parciales):
+        if parcial['parametros'] != parametros or parcial['fragmento'][1] != total_fragmentos:
+            raise ValueError(f"'{ruta}' corresponde a otra ejecución que '{rutas[0]}'")
+        fragmento = parcial['fragmento'][0]
+        if fragmento in vistos:
+            raise ValueError(f"El fragmento {fragmento}/{total_fragmentos} está en '{vistos[fragmento]}' y en '{ruta}'")
+        vistos[fragmento] = ruta
+    faltan = sorted(set(range(1, total_fragmentos + 1)) - set(vistos))
+    if faltan:
+        raise ValueError(f"Faltan los fragmentos {', '.join(f'{i}/{total_fragmentos}' for i in faltan)}")
+
+    rondas = {}
+    for parcial in parciales:
+        for ronda, datos in parcial['rondas'].items():
+            _, _, acumuladores = rondas.setdefault(int(ronda), (datos['clave'], datos['archivo_resumen'], {}))
+            for valor, acumulador in datos['acumuladores'].items():
+                acumuladores.setdefault(valor, Acumulador()).combinar(acumulador)
+    return parametros, dict(sorted(rondas.items()))
+
+
+def principal(argumentos=None):
+    parser = argparse.ArgumentParser(description="Combina los resultados parciales de una ejecución en fragmentos.")
+    parser.add_argument('parciales', nargs='+', help="archivos parciales (se aceptan patrones como *.json)")
+    parser.add_argument('--salida', help="directorio de los resúmenes (por defecto, el del primer parcial)")
+    args = parser.parse_args(argumentos)
+    rutas = sorted({ruta for patron in args.parciales for ruta in (glob.glob(patron) or [patron])})
+    _, rondas = combinar_parciales(rutas)
+    salida = args.salida or os.path.dirname(os.path.abspath(rutas[0]))
+    os.makedirs(salida, exist_ok=True)
+    for ronda, (clave, archivo_resumen, acumuladores) in rondas.items():
+        nombre_archivo = os.path.join(salida, archivo_resumen)
+        tabla_resumen_ronda(ronda, acumuladores, clave).to_csv(nombre_archivo, index=False, encoding='utf-8')
+        print(f"Ronda {ronda}: '{nombre_archivo}' ({sum(a.cantidad for a in acumuladores.values()):,} filas)")
+
+
+if __name__ == '__main__':
+    principal()
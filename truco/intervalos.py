@@ -0,0 +1,73 @@
+"""
+Intervalos de confianza para proporciones y estimación secuencial por Monte Carlo.
+
+En lugar de fijar de antemano cuántas muestras usar, estimar_proporcion sortea por lotes y se
+detiene apenas el intervalo de Wilson es tan angosto como se pidió: las probabilidades cercanas
+a 0 o 1 se resuelven con pocas muestras y las dudosas reciben más, hasta un máximo.
+"""
+import math
+from functools import lru_cache
+from statistics import NormalDist
+
+
+@lru_cache(maxsize=None)
+def cuantil_normal(confianza):
+    """z tal que un intervalo de ±z desvíos cubre la fracción confianza de la normal."""
+    return NormalDist().inv_cdf(0.5 + confianza / 2)
+
+
+def intervalo_wilson(exitos, muestras, confianza=0.95):
+    """Intervalo de Wilson (inferior, superior) para exitos de muestras ensayos."""
+    if muestras == 0:
+        return 0.0, 1.0
+    z = cuantil_normal(confianza)
+    p = exitos / muestras
+    z2_n = z * z / muestras
+    centro = (p + z2_n / 2) / (1 + z2_n)
+    radio = z * math.sqrt(p * (1 - p) / muestras + z2_n / (4 * muestras)) / (1 + z2_n)
+    return max(0.0, centro - radio), min(1.0, centro + radio)
+
+
+def precision_alcanzada(probabilidad, inferior, superior, semiancho=None, error_relativo=None):
+    """
+    True si el intervalo cumple alguno de los objetivos pedidos: semiancho absoluto, o semiancho
+    relativo a la probabilidad más cercana a un extremo (min(p, 1 - p)).
+    """
+    mitad = (superior - inferior) / 2
+    if semiancho is not None and mitad <= semiancho:
+        return True
+    if error_relativo is not None and mitad <= error_relativo * min(probabilidad, 1 - probabilidad):
+        return True
+    return False
+
+
+def estimar_proporcion(sortear_exitos, max_muestras, semiancho=None, error_relativo=None, confianza=0.95, lote=50,
+                       exitos=0, muestras=0):
+    """
+    Estima una proporción sorteando muestras por lotes con sortear_exitos(cantidad), que devuelve
+    cuántos éxitos hubo entre cantidad muestras nuevas. El primer lote es de lote muestras y cada
+    uno siguiente duplica el total (así una probabilidad dudosa no se paga con muchos lotes chicos).
+    Se detiene al alcanzar la precisión pedida o max_muestras. Con exitos y muestras sigue una
+    estimación anterior (por ejemplo, al subir max_muestras) en lugar de empezar de cero; si esa
+    estimación se cortó por su máximo entre dos de los totales en los que se mira la precisión
+    (lote, 2 * lote, 4 * lote...), primero sortea hasta el siguiente, así que con los mismos
+    sorteos el resultado es el de empezar de cero con el max_muestras nuevo.
+    Devuelve (probabilidad, inferior, superior, muestras).
+    """
+    lotes = muestras // lote
+    if 0 < muestras < max_muestras and (muestras % lote or lotes & (lotes - 1)):
+        siguiente = lote
+        while siguiente <= muestras:
+            siguiente *= 2
+        cantidad = min(siguiente, max_muestras) - muestras
+        exitos += sortear_exitos(cantidad)
+        muestras += cantidad
+    inferior, superior = intervalo_wilson(exitos, muestras, confianza)
+    while muestras < max_muestras and not (
+            muestras and precision_alcanzada(exitos / muestras, inferior, superior, semiancho, error_relativo)):
+        cantidad = min(max(lote, muestras), max_muestras - muestras)
+        exitos += sortear_exitos(cantidad)
+        muestras += cantidad
+        inferior, superior = intervalo_wilson(exitos, muestras, confianza)
+    probabilidad = exitos / muestras if muestras else 0.0
+    return probabilidad, inferior, superior, muestras
@@ -0,0 +1,55 @@
+"""
+Representación de manos y mazos como máscaras de bits.
+
+Cada carta del mazo ocupa un bit (el de su posición en el diccionario de cartas), de modo
+que un subconjunto de las 40 cartas es un entero: quitar cartas es un AND, contar cartas
+es un popcount y comprobar si una carta está es un AND con su bit.
+"""
+
+
+class MazoBits:
+    """Traduce entre combinaciones de cartas y máscaras de bits para un mazo dado."""
+
+    def __init__(self, cartas):
+        self.cartas = tuple(cartas)
+        self._bits = {carta: 1 << i for i, carta in enumerate(self.cartas)}
+        self.completo = (1 << len(self.cartas)) - 1
+
+    def mascara(self, combinacion):
+        """Máscara con los bits de las cartas de combinacion."""
+        resultado = 0
+        for carta in combinacion:
+            resultado |= self._bits[carta]
+        return resultado
+
+    def contiene(self, mascara, carta):
+        return bool(mascara & self._bits[carta])
+
+    def cartas_de(self, mascara):
+        """Cartas presentes en la máscara, en el orden del mazo."""
+        return tuple(self.cartas[i] for i in indices(mascara))
+
+    def restantes(self, *combinaciones):
+        """Cartas del mazo que no aparecen en ninguna de las combinaciones, en el orden del mazo."""
+        quitadas = 0
+        for combinacion in combinaciones:
+            quitadas |= self.mascara(combinacion)
+        return self.cartas_de(quitar(self.completo, quitadas))
+
+
+def quitar(mascara, otra):
+    """Máscara con las cartas de mascara que no están en otra."""
+    return mascara & ~otra
+
+
+def contar(mascara):
+    """Cantidad de cartas en la máscara."""
+    return bin(mascara).count('1')
+
+
+def indices(mascara):
+    """Posiciones de los bits encendidos, de menor a mayor."""
+    while mascara:
+        bajo = mascara & -mascara
+        yield bajo.bit_length() - 1
+        mascara ^= bajo
@@ -0,0 +1,135 @@
+"""
+Métricas y progreso de bajo costo para los ciclos largos.
+
+En lugar de imprimir cada tantas iteraciones, los ciclos cuentan lo que procesan con contar()
+y piden mostrar el progreso con progreso(): el mensaje solo se arma y se muestra si pasó el
+intervalo desde el último, así que el costo por iteración es una lectura del reloj.
+Al terminar, resumen() y guardar_json() dan los contadores, el tiempo de cada etapa y
+cuántas unidades de cada contador se procesaron por segundo. Latencias guarda las últimas
+duraciones de una operación repetida (por ejemplo, cada consulta al servidor) para dar
+percentiles como p50 y p99.
+"""
+import json
+import math
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+
+def reportar_en_consola(texto):
+    """Muestra el progreso en una sola línea de la consola, que se va sobrescribiendo."""
+    print(f"\r{texto}", end='', flush=True)
+
+
+class Metricas:
+    """
+    Contadores, tiempos por etapa y progreso muestreado en el tiempo.
+
+    reportar(texto) recibe cada mensaje de progreso (por defecto se muestra en la consola);
+    permite mandarlo a un logger u otro destino. Con silencioso=True no se muestra nada,
+    pero se siguen contando y midiendo las etapas para el resumen.
+    """
+
+    def __init__(self, intervalo=1.0, silencioso=False, reportar=reportar_en_consola):
+        self.intervalo = intervalo
+        self.silencioso = silencioso
+        self.reportar = reportar
+        self.contadores = defaultdict(int)
+        self.etapas = defaultdict(float)
+        self._inicio = time.perf_counter()
+        self._ultimo_progreso = self._inicio
+        self._linea_abierta = False
+
+    def contar(self, nombre, cantidad=1):
+        self.contadores[nombre] += cantidad
+
+    @contextmanager
+    def etapa(self, nombre):
+        """Suma al tiempo de la etapa lo que tarda el bloque with."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas[nombre] += time.perf_counter() - inicio
+
+    def progreso(self, mensaje):
+        """
+        mensaje es una función sin argumentos que devuelve el texto; solo se llama si pasó
+        el intervalo desde el último progreso mostrado.
+        """
+        if self.silencioso:
+            return
+        ahora = time.perf_counter()
+        if ahora - self._ultimo_progreso < self.intervalo:
+            return
+        self._ultimo_progreso = ahora
+        self.reportar(mensaje())
+        self._linea_abierta = self.reportar is reportar_en_consola
+
+    def mostrar(self, texto):
+        """Muestra un mensaje puntual (no de progreso), salvo en modo silencioso."""
+        if self.silencioso:
+            return
+        if self._linea_abierta:
+            print()
+            self._linea_abierta = False
+        print(texto)
+
+    @property
+    def transcurrido(self):
+        return time.perf_counter() - self._inicio
+
+    def por_segundo(self, nombre):
+        transcurrido = self.transcurrido
+        return self.contadores[nombre] / transcurrido if transcurrido > 0 else 0.0
+
+    def resumen(self):
+        transcurrido = self.transcurrido
+        return {
+            'segundos_totales': transcurrido,
+            'contadores': dict(self.contadores),
+            'segundos_por_etapa': dict(self.etapas),
+            'por_segundo': {nombre: cantidad / transcurrido if transcurrido > 0 else 0.0
+                            for nombre, cantidad in self.contadores.items()},
+        }
+
+    def guardar_json(self, ruta):
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump(self.resumen(), archivo, indent=2, ensure_ascii=False)
+
+
+class Latencias:
+    """Las últimas capacidad duraciones medidas, en segundos, para calcular percentiles."""
+
+    def __init__(self, capacidad=10_000):
+        self._duraciones = deque(maxlen=capacidad)
+
+    def agregar(self, segundos):
+        self._duraciones.append(segundos)
+
+    @contextmanager
+    def medir(self):
+        """Agrega lo que tarda el bloque with."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.agregar(time.perf_counter() - inicio)
+
+    def percentil(self, porcentaje):
+        """Percentil por rango más cercano de las duraciones guardadas (nan si no hay ninguna)."""
+        if not self._duraciones:
+            return math.nan
+        ordenadas = sorted(self._duraciones)
+        return ordenadas[max(math.ceil(porcentaje / 100 * len(ordenadas)) - 1, 0)]
+
+    def resumen(self):
+        """Cantidad de duraciones y p50, p99 y máximo en milisegundos (None si no hay ninguna)."""
+        if not self._duraciones:
+            return {'cantidad': 0, 'p50_ms': None, 'p99_ms': None, 'maximo_ms': None}
+        return {
+            'cantidad': len(self._duraciones),
+            'p50_ms': self.percentil(50) * 1000,
+            'p99_ms': self.percentil(99) * 1000,
+            'maximo_ms': max(self._duraciones) * 1000,
+        }
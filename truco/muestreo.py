@@ -0,0 +1,53 @@
+"""Muestreo uniforme sobre flujos de combinaciones."""
+import math
+import random
+
+
+def _uniforme_abierta(rng):
+    """Número uniforme en el intervalo abierto (0, 1)."""
+    u = rng.random()
+    while u == 0.0:
+        u = rng.random()
+    return u
+
+
+class ReservorioPorClave:
+    """
+    Mantiene una muestra uniforme de hasta tamano elementos por clave sobre un flujo
+    recorrido una sola vez (Algoritmo L). La memoria ocupada es O(claves × tamano),
+    sin importar cuántos elementos pasen por el flujo.
+    """
+
+    def __init__(self, tamano, rng=random):
+        self.tamano = tamano
+        self.rng = rng
+        # clave -> [muestra, vistos, indice del próximo reemplazo, w]
+        self._estado = {}
+
+    def _saltar(self, estado):
+        estado[3] *= math.exp(math.log(_uniforme_abierta(self.rng)) / self.tamano)
+        salto = math.floor(math.log(_uniforme_abierta(self.rng)) / math.log1p(-estado[3]))
+        estado[2] += salto + 1
+
+    def agregar(self, clave, elemento):
+        estado = self._estado.get(clave)
+        if estado is None:
+            estado = self._estado[clave] = [[], 0, 0, 1.0]
+        estado[1] += 1
+        muestra = estado[0]
+        if len(muestra) < self.tamano:
+            muestra.append(elemento)
+            if len(muestra) == self.tamano:
+                estado[2] = estado[1]
+                self._saltar(estado)
+        elif estado[1] == estado[2]:
+            muestra[self.rng.randrange(self.tamano)] = elemento
+            self._saltar(estado)
+
+    def vistos(self):
+        """Cantidad de elementos recibidos por clave."""
+        return {clave: estado[1] for clave, estado in self._estado.items()}
+
+    def muestras(self):
+        """Muestra uniforme de cada clave: {clave: [elementos]}."""
+        return {clave: estado[0] for clave, estado in self._estado.items()}
@@ -0,0 +1,29 @@
+"""Definición del mazo y puntuación de manos, compartidas por los scripts y el paquete."""
+
+# Definición de las cartas y sus ponderaciones
+cartas = {
+    '4E': 1, '4O': 1, '4B': 1, '4C': 1,
+    '5E': 2, '5O': 2, '5B': 2, '5C': 2,
+    '6E': 3, '6O': 3, '6B': 3, '6C': 3,
+    '7B': 4, '7C': 4,
+    '10E': 5, '10O': 5, '10B': 5, '10C': 5,
+    '11E': 6, '11O': 6, '11B': 6, '11C': 6,
+    '12E': 7, '12O': 7, '12B': 7, '12C': 7,
+    '1C': 8, '1O': 8,
+    '2E': 9, '2O': 9, '2B': 9, '2C': 9,
+    '3E': 10, '3O': 10, '3B': 10, '3C': 10,
+    '7O': 11,
+    '7E': 12,
+    '1B': 13,
+    '1E': 14
+}
+
+
+def calcular_puntos(combinacion, ponderaciones=cartas):
+    """Suma de ponderaciones de la combinación; ponderaciones permite usar otro esquema (ver truco.esquemas)."""
+    return sum(ponderaciones[carta] for carta in combinacion)
+
+
+def formatear_combinacion(combinacion):
+    """Formatea una combinación de cartas para mostrarla de manera legible"""
+    return ' '.join(sorted(combinacion))
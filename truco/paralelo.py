@@ -0,0 +1,30 @@
+"""Ejecución de tareas independientes en un pool de procesos y semillas deterministas por tarea."""
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+
+def derivar_semilla(semilla_maestra, *claves):
+    """
+    Deriva una semilla de 64 bits para una tarea a partir de la semilla maestra y de la
+    clave de la tarea. No depende del orden en que se ejecuten las tareas ni del proceso.
+    """
+    datos = repr((semilla_maestra,) + claves).encode('utf-8')
+    return int.from_bytes(hashlib.sha256(datos).digest()[:8], 'little')
+
+
+def mapear_tareas(funcion, tareas, procesos=1):
+    """
+    Ejecuta funcion(*argumentos) para cada argumentos de tareas y genera los resultados en el
+    mismo orden que tareas. Con procesos <= 1 se ejecuta en serie; si no, en un
+    ProcessPoolExecutor con esa cantidad de procesos. Las tareas que sortean derivan su propio
+    generador de la semilla y de su clave (ver derivar_semilla), así que ambos modos dan
+    resultados idénticos. funcion debe poder importarse desde los procesos hijos.
+    """
+    if procesos <= 1:
+        for argumentos in tareas:
+            yield funcion(*argumentos)
+        return
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        futuros = [ejecutor.submit(funcion, *argumentos) for argumentos in tareas]
+        for futuro in futuros:
+            yield futuro.result()
@@ -0,0 +1,195 @@
+"""
+Análisis de las tres rondas sin preguntas interactivas.
+
+La muestra de 9 cartas por PG se toma (o se carga de la caché) una sola vez y cada mano pasa
+por las etapas de las rondas pedidas, en lugar de que cada script haga su propio recorrido.
+Los resúmenes de las rondas 2 y 3 tienen los mismos nombres y columnas que los de sus scripts; el
+de la ronda 1 es un CSV con las columnas y la fila de estadísticas globales de la hoja Resumen del
+Excel de su script.
+Con --shard i/N solo se procesa una parte de los PG y el resumen queda en un archivo parcial
+que se combina con los de las demás partes (ver truco.fragmentos).
+
+Uso:
+    python -m truco.pipeline --max-9 10 --max-6 50
+    python -m truco.pipeline --max-9 100 --rondas 2 3 --exacto --formato csv.gz
+    python -m truco.pipeline --max-9 100 --shard 2/4
+"""
+import argparse
+import os
+import time
+from collections import defaultdict
+
+from truco.cache_manos import obtener_manos_por_pg
+from truco.cache_probabilidades import CacheProbabilidades
+from truco.escritura import EscritorColumnar
+from truco.estadisticas import Acumulador, agregar_por_clave, tabla_resumen_ronda
+from truco.fragmentos import guardar_parcial, leer_fragmento, repartir_pgs
+from truco.metricas import Metricas
+from truco.nucleo import cartas
+from truco.rondas import (COLUMNAS_PRIMERA_RONDA, COLUMNAS_SEGUNDA_RONDA, COLUMNAS_TERCERA_RONDA, primera_ronda,
+                          segunda_ronda, sufijo_segunda_ronda, tercera_ronda)
+
+RUTA_GUARDADO = 'E:\\TRUCO'
+
+
+class Etapa:
+    """
+    Una ronda dentro del pipeline: calcula las filas de cada mano, las escribe por lotes
+    y acumula las estadísticas del resumen por la columna clave. nombre es el nombre de
+    los archivos de salida con {tipo} en lugar de 'resumen' o 'detalles'; sufijo_detalles
+    se agrega al directorio de detalles (lo usa cada fragmento para no pisar los de otros).
+    """
+
+    def __init__(self, ronda, calcular, columnas, clave, ruta_guardado, nombre, formato_detalles=None,
+                 sufijo_detalles=''):
+        self.ronda = ronda
+        self.nombre = f'ronda_{ronda}'
+        self.calcular = calcular
+        self.clave = clave
+        self.resultados = defaultdict(Acumulador)
+        self.archivo_resumen = nombre.format(tipo='resumen') + '.csv'
+        self.nombre_archivo_resumen = os.path.join(ruta_guardado, self.archivo_resumen)
+        self.nombre_archivo_detalles = os.path.join(ruta_guardado, nombre.format(tipo='detalles') + sufijo_detalles)
+        self.escritor_detalles = EscritorColumnar(self.nombre_archivo_detalles, columnas, formato=formato_detalles)
+
+    def procesar(self, pg, combinacion_9, metricas):
+        with metricas.etapa(self.nombre):
+            filas = self.calcular(pg, combinacion_9)
+            agregar_por_clave(self.resultados, filas[self.clave], filas['Probabilidad'])
+        with metricas.etapa('escritura_detalles'):
+            self.escritor_detalles.agregar_lote(**filas)
+        metricas.contar(f'filas_{self.nombre}', len(filas['Probabilidad']))
+        if 'Muestras' in filas:
+            metricas.contar(f'muestras_{self.nombre}', int(filas['Muestras'].sum()))
+
+    def cerrar(self):
+        self.escritor_detalles.cerrar()
+
+    def guardar_resumen(self):
+        tabla_resumen_ronda(self.ronda, self.resultados, self.clave).to_csv(
+            self.nombre_archivo_resumen, index=False, encoding='utf-8')
+
+
+def ejecutar(max_combinaciones_9=10, max_combinaciones_6=50, rondas=(1, 2, 3), semilla=0, exacto=False,
+             ruta_guardado=RUTA_GUARDADO, ruta_cache_probabilidades=None, formato_detalles=None, metricas=None,
+             ruta_metricas=None, semiancho=None, error_relativo=None, confianza=0.95, fragmento=None):
+    """
+    Corre las rondas pedidas sobre la misma muestra de 9 cartas por PG. Los sorteos de cada ronda
+    para cada mano salen de generadores derivados de la semilla y de la mano, así que los
+    resultados coinciden con los de su script.
+    El progreso se informa a intervalos de tiempo a través de metricas y el resumen de métricas
+    se guarda en JSON en ruta_metricas (por defecto, junto a los resultados).
+    semiancho, error_relativo y confianza controlan el muestreo secuencial de la segunda ronda
+    (ver truco.rondas.segunda_ronda).
+    Con fragmento=(i, N) solo se procesan los PG de la parte i de N (ver truco.fragmentos.repartir_pgs)
+    y, en lugar de los CSV de resumen, se guarda un archivo parcial para combinar con
+    truco.fragmentos. Como los sorteos no dependen de qué otras manos se procesan, el resultado
+    combinado es el mismo que el de una ejecución sin fragmentos, para cualquier N.
+    Devuelve {ronda: (archivo de resumen o parcial, directorio de detalles)}.
+    """
+    if metricas is None:
+        metricas = Metricas()
+    inicio_total = time.time()
+    os.makedirs(ruta_guardado, exist_ok=True)
+    with metricas.etapa('muestra_9_cartas'):
+        combinaciones_por_pg = obtener_manos_por_pg(cartas, max_combinaciones_9, semilla, metricas=metricas)
+    pgs = sorted(combinaciones_por_pg)
+    sufijo_fragmento = ''
+    if fragmento is not None:
+        pgs = repartir_pgs(combinaciones_por_pg, fragmento[1])[fragmento[0] - 1]
+        sufijo_fragmento = f'_fragmento{fragmento[0]}de{fragmento[1]}'
+    identificador = f'{max_combinaciones_9}_{max_combinaciones_6}{sufijo_fragmento}'
+    # Las probabilidades exactas de las rondas 1 y 2 comparten la caché (la ronda es parte de la clave)
+    cache_probabilidades = CacheProbabilidades(cartas, ruta_sqlite=ruta_cache_probabilidades)
+
+    etapas = {}
+    if 1 in rondas:
+        etapas[1] = Etapa(
+            1, lambda pg, combinacion_9: primera_ronda(pg, combinacion_9, cache_probabilidades),
+            COLUMNAS_PRIMERA_RONDA, 'PG_original', ruta_guardado,
+            f'probabilidades_primera_ronda_{{tipo}}_{max_combinaciones_9}', formato_detalles, sufijo_fragmento)
+    if 2 in rondas:
+        cache_segunda = cache_probabilidades if exacto else None
+        sufijo = sufijo_segunda_ronda(max_combinaciones_6, exacto, semiancho, error_relativo)
+        etapas[2] = Etapa(
+            2, lambda pg, combinacion_9: segunda_ronda(pg, combinacion_9, max_combinaciones_6, semilla,
+                                                       cache_segunda, semiancho, error_relativo, confianza),
+            COLUMNAS_SEGUNDA_RONDA, 'PG_reducido', ruta_guardado,
+            f'probabilidades_segunda_ronda_{{tipo}}_{max_combinaciones_9}_{sufijo}', formato_detalles, sufijo_fragmento)
+    if 3 in rondas:
+        etapas[3] = Etapa(
+            3, lambda pg, combinacion_9: tercera_ronda(pg, combinacion_9, max_combinaciones_6, semilla),
+            COLUMNAS_TERCERA_RONDA, 'PG_super_reducido', ruta_guardado,
+            f'probabilidades_tercera_ronda_{{tipo}}_{max_combinaciones_9}_{max_combinaciones_6}', formato_detalles,
+            sufijo_fragmento)
+
+    total_manos = sum(len(combinaciones_por_pg[pg]) for pg in pgs)
+    for pg in pgs:
+        for combinacion_9 in combinaciones_por_pg[pg]:
+            for etapa in etapas.values():
+                etapa.procesar(pg, combinacion_9, metricas)
+            metricas.contar('manos_9_cartas')
+            metricas.progreso(lambda: (
+                f"PG {pg} - manos procesadas: {metricas.contadores['manos_9_cartas']:,}/{total_manos:,} "
+                f"({metricas.por_segundo('manos_9_cartas'):,.1f}/s)"))
+
+    with metricas.etapa('escritura_detalles'):
+        for etapa in etapas.values():
+            etapa.cerrar()
+    if fragmento is None:
+        for etapa in etapas.values():
+            etapa.guardar_resumen()
+        archivos_resumen = {ronda: etapa.nombre_archivo_resumen for ronda, etapa in etapas.items()}
+    else:
+        ruta_parcial = os.path.join(ruta_guardado, f'probabilidades_pipeline_parcial_{identificador}.json')
+        parametros = {'max_combinaciones_9': max_combinaciones_9, 'max_combinaciones_6': max_combinaciones_6,
+                      'rondas': sorted(etapas), 'semilla': semilla, 'exacto': exacto, 'semiancho': semiancho,
+                      'error_relativo': error_relativo, 'confianza': confianza}
+        guardar_parcial(ruta_parcial, parametros, fragmento, pgs,
+                        {ronda: (etapa.clave, etapa.archivo_resumen, etapa.resultados) for ronda, etapa in etapas.items()})
+        archivos_resumen = dict.fromkeys(etapas, ruta_parcial)
+    cache_probabilidades.cerrar()
+    metricas.contar('cache_aciertos', cache_probabilidades.aciertos)
+    metricas.contar('cache_fallos', cache_probabilidades.fallos)
+    if ruta_metricas is None:
+        ruta_metricas = os.path.join(ruta_guardado, f'probabilidades_pipeline_metricas_{identificador}.json')
+    metricas.guardar_json(ruta_metricas)
+    for ronda, etapa in etapas.items():
+        metricas.mostrar(f"Ronda {ronda}: '{archivos_resumen[ronda]}' y '{etapa.nombre_archivo_detalles}' "
+                         f"({etapa.escritor_detalles.filas_escritas:,} filas)")
+    metricas.mostrar(f"Métricas: '{ruta_metricas}'")
+    metricas.mostrar(f"Tiempo total de cálculo: {time.time() - inicio_total:.2f} segundos")
+    return {ronda: (archivos_resumen[ronda], etapa.nombre_archivo_detalles) for ronda, etapa in etapas.items()}
+
+
+def principal(argumentos=None):
+    parser = argparse.ArgumentParser(description="Probabilidades de las tres rondas a partir de una sola muestra de manos.")
+    parser.add_argument('--max-9', type=int, default=10, dest='max_combinaciones_9',
+                        help="combinaciones de 9 cartas por PG (default 10)")
+    parser.add_argument('--max-6', type=int, default=50, dest='max_combinaciones_6',
+                        help="combinaciones de 6 cartas por mano en las rondas 2 y 3 (default 50)")
+    parser.add_argument('--rondas', type=int, nargs='+', choices=(1, 2, 3), default=[1, 2, 3])
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--exacto', action='store_true', help="probabilidades exactas en la segunda ronda")
+    parser.add_argument('--semiancho', type=float,
+                        help="segunda ronda: sortear hasta que el intervalo de confianza tenga este semiancho")
+    parser.add_argument('--error-relativo', type=float,
+                        help="segunda ronda: sortear hasta que el semiancho sea esta fracción de min(p, 1 - p)")
+    parser.add_argument('--confianza', type=float, default=0.95, help="nivel de los intervalos (default 0.95)")
+    parser.add_argument('--salida', default=RUTA_GUARDADO, help="directorio de resultados")
+    parser.add_argument('--cache-probabilidades', help="base SQLite para guardar las probabilidades exactas")
+    parser.add_argument('--formato', choices=('parquet', 'csv.gz'), help="formato de los detalles")
+    parser.add_argument('--silencioso', action='store_true', help="no mostrar progreso ni mensajes")
+    parser.add_argument('--intervalo', type=float, default=1.0, help="segundos entre mensajes de progreso (default 1)")
+    parser.add_argument('--metricas', dest='ruta_metricas', help="archivo JSON para el resumen de métricas")
+    parser.add_argument('--shard', type=leer_fragmento, dest='fragmento', metavar='i/N',
+                        help="procesar solo la parte i de N de los PG y guardar un resultado parcial")
+    args = parser.parse_args(argumentos)
+    ejecutar(args.max_combinaciones_9, args.max_combinaciones_6, tuple(args.rondas), args.semilla, args.exacto,
+             args.salida, args.cache_probabilidades, args.formato,
+             Metricas(intervalo=args.intervalo, silencioso=args.silencioso), args.ruta_metricas,
+             args.semiancho, args.error_relativo, args.confianza, args.fragmento)
+
+
+if __name__ == '__main__':
+    principal()
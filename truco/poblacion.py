@@ -0,0 +1,136 @@
+"""
+Resúmenes exactos sobre toda la población de manos, sin muestrear.
+
+Los resúmenes de los scripts promedian sobre una muestra de manos de 9 cartas. Acá se recorren
+todas las manos y todas las cartas que el rival puede revelar, agrupadas por firma de
+ponderaciones: la probabilidad de cada fila depende solo de cuántas cartas de cada ponderación
+salieron del mazo (mano y reveladas, 9 + 0, 3 o 6 cartas) y de la clave de la ronda.
+
+Para cada firma de las cartas quitadas, con la multiplicidad de manos reales que la comparten:
+    - las formas de elegir entre ellas las reveladas según su suma y dan la clave
+      (PG de la mano - suma de las reveladas = suma de las quitadas - 2 * y) y el peso de esa fila;
+    - la distribución de sumas de las cartas que le faltan al rival, tomadas del resto del
+      mazo, da la probabilidad exacta para esa clave.
+Las estadísticas de cada clave se acumulan ponderadas por esos pesos, así que Cantidad es la
+cantidad real de pares (mano, reveladas) y no una cantidad de muestras.
+
+Uso:
+    python -m truco.poblacion --rondas 2 3 [--salida DIRECTORIO]
+"""
+import argparse
+import math
+import os
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from truco.cache_probabilidades import RONDAS
+from truco.estadisticas import Acumulador, tabla_resumen
+from truco.firmas import agrupar_por_peso, enumerar_firmas
+from truco.metricas import Metricas
+from truco.nucleo import cartas
+from truco.vectorizado import distribuciones_sumas
+
+RUTA_GUARDADO = 'E:\\TRUCO'
+CARTAS_MANO = 9
+# ronda -> (cartas que reveló el rival, columna de la clave del resumen, nombre de la ronda en los archivos)
+RONDAS_POBLACION = {
+    1: (0, 'PG_original', 'primera'),
+    2: (3, 'PG_reducido', 'segunda'),
+    3: (6, 'PG_super_reducido', 'tercera'),
+}
+
+
+def resumen_poblacion(ronda, cartas=cartas, firmas_por_bloque=2048, metricas=None):
+    """
+    Estadísticas exactas de la probabilidad de la ronda sobre todos los pares (mano de 9 cartas,
+    cartas reveladas), por clave de la ronda: {clave: Acumulador}.
+    """
+    if metricas is None:
+        metricas = Metricas()
+    reveladas, _, _ = RONDAS_POBLACION[ronda]
+    cartas_rival, comparacion = RONDAS[ronda]
+    clases = agrupar_por_peso(cartas)
+    pesos_clases = np.array([peso for peso, _ in clases], dtype=np.int64)
+    tamanos = np.array([len(cartas_clase) for _, cartas_clase in clases], dtype=np.int64)
+    quitadas = CARTAS_MANO + reveladas
+    total_rival = math.comb(len(cartas) - quitadas, cartas_rival)
+
+    # Estadísticas por clave, en arreglos indexados por clave + desplazamiento
+    desplazamiento = 2 * reveladas * int(pesos_clases.max())
+    largo = quitadas * int(pesos_clases.max()) + desplazamiento + 1
+    cantidades = np.zeros(largo, dtype=np.int64)
+    sumas = np.zeros(largo)
+    sumas_cuadrados = np.zeros(largo)
+    minimos = np.full(largo, math.inf)
+    maximos = np.full(largo, -math.inf)
+
+    firmas = enumerar_firmas(clases, quitadas)
+    while True:
+        bloque = list(islice(firmas, firmas_por_bloque))
+        if not bloque:
+            break
+        with metricas.etapa(f'poblacion_ronda_{ronda}'):
+            conteos = np.array([firma for firma, _, _ in bloque], dtype=np.int64)
+            multiplicidades = np.array([multiplicidad for _, multiplicidad, _ in bloque], dtype=np.int64)
+            puntos_quitadas = np.array([suma for _, _, suma in bloque], dtype=np.int64)
+            # formas_reveladas[fila, y] = formas de elegir las reveladas entre las quitadas con suma y
+            formas_reveladas = distribuciones_sumas(conteos, pesos_clases, reveladas)
+            restantes = distribuciones_sumas(tamanos - conteos, pesos_clases, cartas_rival)
+            # menores[fila, t] = combinaciones del rival que suman menos que t
+            menores = np.zeros((len(bloque), restantes.shape[1] + 1), dtype=np.int64)
+            np.cumsum(restantes, axis=1, out=menores[:, 1:])
+            claves = puntos_quitadas[:, None] - 2 * np.arange(formas_reveladas.shape[1])
+            filas = np.arange(len(bloque))[:, None]
+            if comparacion == 'menor':
+                favorables = menores[filas, np.clip(claves, 0, restantes.shape[1])]
+            else:
+                favorables = total_rival - menores[filas, np.clip(claves + 1, 0, restantes.shape[1])]
+            probabilidades = favorables / total_rival
+            pesos = multiplicidades[:, None] * formas_reveladas
+            presentes = pesos > 0
+            indices = claves[presentes] + desplazamiento
+            probabilidades = probabilidades[presentes]
+            pesos = pesos[presentes]
+            cantidades += np.bincount(indices, weights=pesos, minlength=largo).astype(np.int64)
+            sumas += np.bincount(indices, weights=pesos * probabilidades, minlength=largo)
+            sumas_cuadrados += np.bincount(indices, weights=pesos * probabilidades ** 2, minlength=largo)
+            np.minimum.at(minimos, indices, probabilidades)
+            np.maximum.at(maximos, indices, probabilidades)
+        metricas.contar(f'firmas_ronda_{ronda}', len(bloque))
+        metricas.progreso(lambda: (
+            f"Ronda {ronda}: {metricas.contadores[f'firmas_ronda_{ronda}']:,} firmas de {quitadas} cartas "
+            f"({metricas.por_segundo(f'firmas_ronda_{ronda}'):,.0f}/s)"))
+
+    return {indice - desplazamiento: Acumulador(int(cantidades[indice]), float(sumas[indice]),
+                                                float(sumas_cuadrados[indice]), float(minimos[indice]),
+                                                float(maximos[indice]))
+            for indice in np.flatnonzero(cantidades).tolist()}
+
+
+def guardar_resumen_poblacion(ronda, ruta_guardado=RUTA_GUARDADO, metricas=None):
+    """Calcula el resumen exacto de la ronda y lo guarda en CSV; devuelve el nombre del archivo."""
+    _, clave, nombre_ronda = RONDAS_POBLACION[ronda]
+    acumuladores = resumen_poblacion(ronda, metricas=metricas)
+    os.makedirs(ruta_guardado, exist_ok=True)
+    nombre_archivo = os.path.join(ruta_guardado, f'probabilidades_{nombre_ronda}_ronda_resumen_poblacion.csv')
+    pd.DataFrame(tabla_resumen(acumuladores, clave)).to_csv(nombre_archivo, index=False, encoding='utf-8')
+    return nombre_archivo
+
+
+def principal(argumentos=None):
+    parser = argparse.ArgumentParser(description="Resúmenes exactos sobre todas las manos y cartas reveladas.")
+    parser.add_argument('--rondas', type=int, nargs='+', choices=(1, 2, 3), default=[2, 3])
+    parser.add_argument('--salida', default=RUTA_GUARDADO, help="directorio de resultados")
+    parser.add_argument('--silencioso', action='store_true', help="no mostrar progreso ni mensajes")
+    args = parser.parse_args(argumentos)
+    metricas = Metricas(silencioso=args.silencioso)
+    for ronda in args.rondas:
+        nombre_archivo = guardar_resumen_poblacion(ronda, args.salida, metricas)
+        metricas.mostrar(f"Ronda {ronda}: '{nombre_archivo}'")
+    metricas.mostrar(f"Tiempo total de cálculo: {metricas.transcurrido:.2f} segundos")
+
+
+if __name__ == '__main__':
+    principal()
@@ -0,0 +1,78 @@
+"""
+Puntos de control para reanudar análisis largos.
+
+El estado se guarda con pickle en un archivo temporal del mismo directorio y luego
+reemplaza al anterior, así que un corte en medio de la escritura deja intacto el último
+punto de control completo.
+"""
+import os
+import pickle
+import tempfile
+import time
+
+# Segundos entre puntos de control guardados por tiempo
+INTERVALO_PUNTO_CONTROL = 30.0
+
+
+def guardar_punto_control(ruta, parametros, estado):
+    """Guarda estado junto con los parámetros del análisis que lo produjo."""
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    temp_archivo = None
+    try:
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.tmp', dir=directorio) as tmp:
+            temp_archivo = tmp.name
+            pickle.dump({'parametros': parametros, 'estado': estado}, tmp, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_archivo, ruta)
+    except BaseException:
+        if temp_archivo and os.path.exists(temp_archivo):
+            os.remove(temp_archivo)
+        raise
+
+
+def cargar_punto_control(ruta, parametros):
+    """
+    Devuelve el estado guardado en ruta si existe y corresponde a los mismos parámetros;
+    si no, devuelve None.
+    """
+    if not os.path.exists(ruta):
+        return None
+    try:
+        with open(ruta, 'rb') as archivo:
+            datos = pickle.load(archivo)
+    except (OSError, pickle.UnpicklingError, EOFError) as e:
+        print(f"No se pudo leer el punto de control '{ruta}': {e}")
+        return None
+    if datos.get('parametros') != parametros:
+        print(f"El punto de control '{ruta}' corresponde a otros parámetros; se empieza desde cero.")
+        return None
+    return datos['estado']
+
+
+def eliminar_punto_control(ruta):
+    if os.path.exists(ruta):
+        os.remove(ruta)
+
+
+class PuntosControlPeriodicos:
+    """
+    Decide cuándo guardar un punto de control de un análisis que escribe detalles con escritor
+    (un EscritorColumnar): cada intervalo segundos y cada vez que el escritor cerró una parte por
+    su cuenta. Antes de guardar se escriben las filas pendientes, así que el estado del escritor
+    se reduce a cuántas partes y filas hay en disco en lugar de llevar todo el lote pendiente.
+    """
+
+    def __init__(self, escritor, intervalo=INTERVALO_PUNTO_CONTROL):
+        self.escritor = escritor
+        self.intervalo = intervalo
+        self._ultimo = time.monotonic()
+        self._partes = escritor.partes
+
+    def guardar_si_corresponde(self, ruta, parametros, obtener_estado):
+        """Guarda obtener_estado() si pasó el intervalo o hay una parte nueva; devuelve si guardó."""
+        if self.escritor.partes == self._partes and time.monotonic() - self._ultimo < self.intervalo:
+            return False
+        self.escritor.vaciar()
+        guardar_punto_control(ruta, parametros, obtener_estado())
+        self._ultimo = time.monotonic()
+        self._partes = self.escritor.partes
+        return True
@@ -0,0 +1,217 @@
+"""
+Cálculo de cada ronda para una mano de 9 cartas.
+
+Cada función recibe el PG y la combinación de 9 cartas y devuelve las filas de detalle de esa
+mano como un diccionario de columnas (arreglos del mismo largo), listo para
+EscritorColumnar.agregar_lote. Los scripts de cada ronda y el pipeline usan las mismas funciones.
+Cada combinación de cartas se guarda como un solo entero, su rango colexicográfico dentro del
+mazo completo (ver truco.colex.combinacion_de_rango para recuperar las cartas).
+"""
+import math
+
+import numpy as np
+
+from truco.colex import (GeneradorPorFila, SorteoSinReposicion, indices_de_rangos, muestrear_rangos,
+                         rango_de_combinacion, rangos_de_indices)
+from truco.intervalos import estimar_proporcion, intervalo_wilson
+from truco.mascaras import MazoBits, indices, quitar
+from truco.nucleo import calcular_puntos, cartas
+from truco.paralelo import derivar_semilla
+from truco.vectorizado import (contar_menores, contar_menores_por_clases, conteos_por_clase, indices_combinaciones,
+                               pesos_de, puntuar_lote)
+
+# Máscaras de bits sobre el mismo orden de cartas
+mazo_bits = MazoBits(cartas)
+# Posición de cada carta en el mazo, para los rangos de las combinaciones
+POSICIONES = {carta: i for i, carta in enumerate(cartas)}
+TOTAL_CARTAS = len(POSICIONES)
+# Ponderaciones distintas del mazo, en orden
+PESOS_CLASES = np.array(sorted(set(cartas.values())), dtype=np.int16)
+
+# Rangos: C(40, 9) y C(40, 6) entran en 32 bits y C(40, 3) en 16
+COLUMNAS_PRIMERA_RONDA = {
+    'PG_original': 'int8',
+    'Combinacion_9': 'uint32',
+    'Probabilidad': 'float64',
+}
+
+# IC_inferior e IC_superior: intervalo de Wilson de la probabilidad estimada; Muestras: manos de 6 cartas
+# sorteadas para estimarla (0 si la probabilidad es exacta, con IC igual a la probabilidad)
+COLUMNAS_SEGUNDA_RONDA = {
+    'PG_original': 'int8',
+    'Combinacion_9': 'uint32',
+    'Cartas_rival_3': 'uint16',
+    'PG_reducido': 'int8',
+    'Probabilidad': 'float64',
+    'IC_inferior': 'float64',
+    'IC_superior': 'float64',
+    'Muestras': 'uint32',
+}
+
+COLUMNAS_TERCERA_RONDA = {
+    'PG_original': 'int8',
+    'Combinacion_9': 'uint32',
+    'Cartas_rival_6': 'uint32',
+    'PG_super_reducido': 'int8',
+    'Probabilidad': 'float64',
+}
+
+
+def primera_ronda(pg, combinacion_9, cache_probabilidades):
+    """Probabilidad exacta de que 9 cartas del mazo restante sumen más que la combinación."""
+    probabilidad = cache_probabilidades.probabilidad(1, pesos_de(combinacion_9, cartas), calcular_puntos(combinacion_9))
+    return {
+        'PG_original': np.array([pg]),
+        'Combinacion_9': np.array([rango_de_combinacion(combinacion_9, POSICIONES)], dtype=np.uint32),
+        'Probabilidad': np.array([probabilidad]),
+    }
+
+
+def sufijo_segunda_ronda(max_combinaciones_6, exacto=False, semiancho=None, error_relativo=None):
+    """Parte del nombre de los archivos de la segunda ronda que identifica cómo se calcularon."""
+    if exacto:
+        return 'exacto'
+    sufijo = str(max_combinaciones_6)
+    if semiancho is not None:
+        sufijo += f'_semiancho{semiancho}'
+    if error_relativo is not None:
+        sufijo += f'_error{error_relativo}'
+    return sufijo
+
+
+def segunda_ronda(pg, combinacion_9, max_combinaciones_6, semilla=0, cache_probabilidades=None,
+                  semiancho=None, error_relativo=None, confianza=0.95, anteriores=None):
+    """
+    Para cada una de las combinaciones de 3 cartas que el rival puede revelar, probabilidad de que
+    sus otras 6 cartas sumen menos que el PG reducido. Con cache_probabilidades la probabilidad es
+    exacta; sin ella se estima con hasta max_combinaciones_6 manos de 6 cartas distintas sorteadas.
+    Las de cada combinación de 3 cartas salen de su propio generador, derivado de la semilla, de la
+    mano y de la combinación, así que no dependen de qué otras manos se procesen ni en qué orden, y
+    las sorteadas con un límite son las primeras de las sorteadas con uno mayor.
+    Con semiancho o error_relativo el sorteo es secuencial (ver truco.intervalos.estimar_proporcion):
+    se detiene en cuanto el intervalo de Wilson alcanza esa precisión, sin repetir manos entre lotes.
+    anteriores ({columna: arreglo} con Cartas_rival_3, Muestras y Probabilidad de las filas de esta
+    mano en una ejecución anterior con la misma semilla y un límite menor) sigue esa estimación: las
+    manos de 6 cartas ya sorteadas se vuelven a generar sin puntuarlas, solo se puntúan las que faltan
+    y sus éxitos se suman a los anteriores, con el mismo resultado que sortear todas de nuevo.
+    """
+    mascara_9 = mazo_bits.mascara(combinacion_9)
+    rango_9 = rango_de_combinacion(combinacion_9, POSICIONES)
+    mascara_rival = quitar(mazo_bits.completo, mascara_9)
+    posiciones_rival = np.fromiter(indices(mascara_rival), dtype=np.int8)
+    pesos_9 = pesos_de(combinacion_9, cartas)
+    pesos_rival = pesos_de(mazo_bits.cartas_de(mascara_rival), cartas)
+    # Todas las combinaciones de 3 cartas del rival se puntúan de una sola vez
+    indices_3 = indices_combinaciones(len(posiciones_rival), 3)
+    rangos_3 = rangos_de_indices(posiciones_rival[indices_3], TOTAL_CARTAS)
+    pgs_reducidos = pg - puntuar_lote(indices_3, pesos_rival)
+    total_combinaciones_3 = len(indices_3)
+    secuencial = semiancho is not None or error_relativo is not None
+    generadores = GeneradorPorFila(derivar_semilla(semilla, 2, rango_9)) if cache_probabilidades is None else None
+    muestras_anteriores = exitos_anteriores = np.zeros(total_combinaciones_3, dtype=np.int64)
+    if anteriores is not None:
+        # Filas anteriores en el orden de indices_3
+        orden = np.argsort(anteriores['Cartas_rival_3'])
+        filas = orden[np.searchsorted(anteriores['Cartas_rival_3'], rangos_3, sorter=orden)]
+        muestras_anteriores = anteriores['Muestras'][filas].astype(np.int64)
+        exitos_anteriores = np.rint(anteriores['Probabilidad'][filas] * muestras_anteriores).astype(np.int64)
+    probabilidades = np.empty(total_combinaciones_3)
+    inferiores = np.empty(total_combinaciones_3)
+    superiores = np.empty(total_combinaciones_3)
+    muestras = np.zeros(total_combinaciones_3, dtype=np.uint32)
+    for idx_3, (fila_3, pg_reducido) in enumerate(zip(indices_3, pgs_reducidos.tolist())):
+        if cache_probabilidades is not None:
+            pesos_quitados = np.concatenate((pesos_9, pesos_rival[fila_3]))
+            probabilidad = cache_probabilidades.probabilidad(2, pesos_quitados, pg_reducido)
+            inferior = superior = probabilidad
+        else:
+            pesos_super_reducido = np.delete(pesos_rival, fila_3)
+            n_super_reducido = len(pesos_super_reducido)
+            total_posibles_6 = math.comb(n_super_reducido, 6)
+            if total_posibles_6 <= max_combinaciones_6:
+                # Se recorren todas: la proporción es exacta
+                puntos_6 = puntuar_lote(indices_combinaciones(n_super_reducido, 6), pesos_super_reducido)
+                probabilidad = contar_menores(puntos_6, pg_reducido) / total_posibles_6
+                inferior = superior = probabilidad
+            else:
+                sorteo = SorteoSinReposicion(total_posibles_6, generadores.fila(idx_3))
+                # Las manos de una ejecución anterior se regeneran para no repetirlas
+                sorteadas, exitos = int(muestras_anteriores[idx_3]), int(exitos_anteriores[idx_3])
+                if sorteadas:
+                    sorteo.siguientes(sorteadas)
+
+                def sortear_exitos(cantidad):
+                    indices_6 = indices_de_rangos(sorteo.siguientes(cantidad), n_super_reducido, 6)
+                    return contar_menores(puntuar_lote(indices_6, pesos_super_reducido), pg_reducido)
+                if secuencial:
+                    probabilidad, inferior, superior, muestras[idx_3] = estimar_proporcion(
+                        sortear_exitos, max_combinaciones_6, semiancho, error_relativo, confianza,
+                        exitos=exitos, muestras=sorteadas)
+                else:
+                    cuenta_mayores = exitos + sortear_exitos(max_combinaciones_6 - sorteadas)
+                    probabilidad = cuenta_mayores / max_combinaciones_6
+                    inferior, superior = intervalo_wilson(cuenta_mayores, max_combinaciones_6, confianza)
+                    muestras[idx_3] = max_combinaciones_6
+        probabilidades[idx_3] = probabilidad
+        inferiores[idx_3] = inferior
+        superiores[idx_3] = superior
+    return {
+        'PG_original': np.full(total_combinaciones_3, pg),
+        'Combinacion_9': np.full(total_combinaciones_3, rango_9, dtype=np.uint32),
+        'Cartas_rival_3': rangos_3,
+        'PG_reducido': pgs_reducidos,
+        'Probabilidad': probabilidades,
+        'IC_inferior': inferiores,
+        'IC_superior': superiores,
+        'Muestras': muestras,
+    }
+
+
+def tercera_ronda(pg, combinacion_9, max_combinaciones_6, semilla=0, excluir=None):
+    """
+    Para hasta max_combinaciones_6 manos distintas de 6 cartas reveladas del rival (todas si son menos),
+    probabilidad exacta de que sus últimas 3 cartas sumen menos que el PG super reducido.
+    Las manos de 6 cartas se sortean con un generador derivado de la semilla y de la mano, así que
+    no dependen de qué otras manos se procesen ni en qué orden.
+    Todas las manos de 6 cartas se resuelven en un solo lote a partir de cuántas cartas de cada
+    ponderación quedan en las 25 restantes (ver contar_menores_por_clases).
+    Con excluir (rangos de Cartas_rival_6 ya calculados para esta mano) devuelve solo manos de 6
+    cartas nuevas, las que faltan para llegar a max_combinaciones_6 contando las excluidas, sorteadas
+    con otro generador derivado también de cuántas se excluyen.
+    """
+    mascara_9 = mazo_bits.mascara(combinacion_9)
+    rango_9 = rango_de_combinacion(combinacion_9, POSICIONES)
+    claves = (3, rango_9) if excluir is None else (3, rango_9, 'ampliacion', len(excluir))
+    rng = np.random.default_rng(derivar_semilla(semilla, *claves))
+    mascara_reducido = quitar(mazo_bits.completo, mascara_9)  # 31 cartas
+    posiciones_reducido = np.fromiter(indices(mascara_reducido), dtype=np.int8)
+    pesos_reducido = pesos_de(mazo_bits.cartas_de(mascara_reducido), cartas)
+    total_combinaciones_6 = math.comb(len(posiciones_reducido), 6)
+    if excluir is not None:
+        # Rangos de las manos excluidas entre las 31 cartas del rival
+        excluidos = rangos_de_indices(
+            posiciones_reducido.searchsorted(indices_de_rangos(excluir, TOTAL_CARTAS, 6)), len(posiciones_reducido))
+        if total_combinaciones_6 <= max_combinaciones_6:
+            rangos_6 = np.setdiff1d(np.arange(total_combinaciones_6), excluidos)
+        else:
+            rangos_6 = SorteoSinReposicion(total_combinaciones_6, rng, excluidos).siguientes(
+                max_combinaciones_6 - len(excluidos))
+        indices_6 = indices_de_rangos(rangos_6, len(posiciones_reducido), 6)
+    elif total_combinaciones_6 <= max_combinaciones_6:
+        indices_6 = indices_combinaciones(len(posiciones_reducido), 6)
+    else:
+        indices_6 = indices_de_rangos(muestrear_rangos(len(posiciones_reducido), 6, max_combinaciones_6, rng),
+                                      len(posiciones_reducido), 6)
+    pgs_super_reducidos = pg - puntuar_lote(indices_6, pesos_reducido)
+    # Cartas de cada ponderación entre las 25 que quedan después de cada mano de 6 cartas
+    conteos_25 = (conteos_por_clase(pesos_reducido[None, :], PESOS_CLASES)
+                  - conteos_por_clase(pesos_reducido[indices_6], PESOS_CLASES))
+    menores = contar_menores_por_clases(conteos_25, PESOS_CLASES, 3, pgs_super_reducidos)
+    probabilidades = menores / math.comb(len(posiciones_reducido) - 6, 3)  # de 2300 combinaciones
+    return {
+        'PG_original': np.full(len(indices_6), pg),
+        'Combinacion_9': np.full(len(indices_6), rango_9, dtype=np.uint32),
+        'Cartas_rival_6': rangos_de_indices(posiciones_reducido[indices_6], TOTAL_CARTAS),
+        'PG_super_reducido': pgs_super_reducidos,
+        'Probabilidad': probabilidades,
+    }
@@ -0,0 +1,202 @@
+"""
+Servidor HTTP local que responde probabilidades por lotes sin volver a arrancar un script.
+
+El mazo, las tablas del conteo vectorizado y la caché de probabilidades se cargan una sola vez
+y quedan calientes entre consultas. Cada consulta es una mano de 9 cartas y las cartas que el
+rival ya reveló (0, 3 o 6); la respuesta es la misma probabilidad que la columna Probabilidad
+de la ronda correspondiente:
+
+    0 reveladas (ronda 1): que 9 cartas del mazo restante sumen más que la mano.
+    3 reveladas (ronda 2): que las otras 6 cartas del rival sumen menos que el PG reducido.
+    6 reveladas (ronda 3): que las últimas 3 cartas del rival sumen menos que el PG super reducido.
+
+Las consultas de la ronda 3 de un lote se resuelven juntas con contar_menores_por_clases. Las de
+las rondas 1 y 2 se agrupan por (firma de ponderaciones, umbral): los grupos que ya están en
+CacheProbabilidades salen de ahí y el resto se resuelve en una sola pasada de distribuciones_sumas
+sobre las firmas distintas, que después se guarda en la caché.
+
+Uso:
+    python -m truco.servidor --puerto 8765 [--cache-probabilidades probabilidades.sqlite]
+
+    POST /probabilidades  {"consultas": [{"mano": ["1E", "7E", ...], "reveladas": ["4B", "5C", "3O"]}, ...]}
+        -> {"resultados": [{"ronda": 2, "probabilidad": 0.83}, ...]}
+    GET /metricas         consultas atendidas, latencias p50/p99 y aciertos de la caché
+"""
+import argparse
+import json
+import math
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import numpy as np
+
+from truco.cache_probabilidades import RONDAS, CacheProbabilidades
+from truco.metricas import Latencias, Metricas
+from truco.nucleo import calcular_puntos, cartas
+from truco.vectorizado import contar_menores_por_clases, conteos_por_clase, distribuciones_sumas, pesos_de
+
+# Cantidad de cartas reveladas por el rival -> ronda
+RONDA_POR_REVELADAS = {0: 1, 3: 2, 6: 3}
+MAX_CONSULTAS_POR_LOTE = 100_000
+
+
+class EvaluadorConsultas:
+    """Resuelve lotes de consultas con el mazo y la caché de probabilidades ya cargados."""
+
+    def __init__(self, cartas, cache_probabilidades):
+        self.cartas = cartas
+        self.cache_probabilidades = cache_probabilidades
+        self.pesos_clases = np.array(sorted(set(cartas.values())), dtype=np.int16)
+        self.conteos_mazo = conteos_por_clase(pesos_de(cartas, cartas)[None, :], self.pesos_clases)[0]
+
+    def _validar(self, consulta):
+        try:
+            mano, reveladas = list(consulta['mano']), list(consulta.get('reveladas', []))
+        except (KeyError, TypeError, AttributeError):
+            raise ValueError("cada consulta debe ser un objeto con 'mano' y opcionalmente 'reveladas'") from None
+        if len(mano) != 9:
+            raise ValueError(f"la mano debe tener 9 cartas y tiene {len(mano)}")
+        if len(reveladas) not in RONDA_POR_REVELADAS:
+            raise ValueError(f"el rival revela 0, 3 o 6 cartas, no {len(reveladas)}")
+        desconocidas = [carta for carta in mano + reveladas if carta not in self.cartas]
+        if desconocidas:
+            raise ValueError(f"cartas desconocidas: {', '.join(map(str, desconocidas))}")
+        if len(set(mano + reveladas)) != len(mano) + len(reveladas):
+            raise ValueError("hay cartas repetidas entre la mano y las reveladas")
+        return mano, reveladas
+
+    def evaluar(self, consultas):
+        """Lista de {'ronda', 'probabilidad'} en el mismo orden que consultas; ValueError si alguna es inválida."""
+        validadas = [self._validar(consulta) for consulta in consultas]
+        resultados = [None] * len(validadas)
+        por_ronda = {ronda: [] for ronda in RONDA_POR_REVELADAS.values()}
+        for i, (mano, reveladas) in enumerate(validadas):
+            por_ronda[RONDA_POR_REVELADAS[len(reveladas)]].append(i)
+        for ronda, indices in por_ronda.items():
+            if not indices:
+                continue
+            consultas_ronda = [validadas[i] for i in indices]
+            if ronda == 3:
+                probabilidades = self._tercera_ronda(consultas_ronda)
+            else:
+                probabilidades = self._ronda_por_firmas(ronda, consultas_ronda)
+            for i, probabilidad in zip(indices, probabilidades):
+                resultados[i] = {'ronda': ronda, 'probabilidad': probabilidad}
+        return resultados
+
+    def _ronda_por_firmas(self, ronda, consultas):
+        claves = [(CacheProbabilidades.firma(pesos_de(mano + reveladas, self.cartas)),
+                   calcular_puntos(mano) - calcular_puntos(reveladas))
+                  for mano, reveladas in consultas]
+        probabilidades = {}
+        faltantes = []
+        for clave in dict.fromkeys(claves):
+            probabilidad = self.cache_probabilidades.buscar(ronda, *clave)
+            if probabilidad is None:
+                faltantes.append(clave)
+            else:
+                probabilidades[clave] = probabilidad
+        if faltantes:
+            k, comparacion = RONDAS[ronda]
+            fila_por_firma = {firma: fila for fila, firma in enumerate(dict.fromkeys(firma for firma, _ in faltantes))}
+            quitadas = np.array(list(fila_por_firma), dtype=np.int16)
+            conteos = self.conteos_mazo - conteos_por_clase(quitadas, self.pesos_clases)
+            # menores_que[fila, s] = combinaciones de k cartas de esa firma que suman menos que s
+            distribuciones = distribuciones_sumas(conteos, self.pesos_clases, k)
+            menores_que = np.zeros((len(distribuciones), distribuciones.shape[1] + 1), dtype=np.int64)
+            np.cumsum(distribuciones, axis=1, out=menores_que[:, 1:])
+            filas = np.array([fila_por_firma[firma] for firma, _ in faltantes])
+            umbrales = np.array([umbral for _, umbral in faltantes])
+            total = math.comb(len(self.cartas) - quitadas.shape[1], k)
+            if comparacion == 'mayor':
+                favorables = total - menores_que[filas, np.clip(umbrales + 1, 0, menores_que.shape[1] - 1)]
+            else:
+                favorables = menores_que[filas, np.clip(umbrales, 0, menores_que.shape[1] - 1)]
+            for (firma, umbral), cantidad in zip(faltantes, favorables.tolist()):
+                probabilidades[firma, umbral] = cantidad / total
+                self.cache_probabilidades.guardar(ronda, firma, umbral, cantidad / total)
+        return [probabilidades[clave] for clave in claves]
+
+    def _tercera_ronda(self, consultas):
+        quitadas = np.array([pesos_de(mano + reveladas, self.cartas) for mano, reveladas in consultas])
+        conteos_25 = self.conteos_mazo - conteos_por_clase(quitadas, self.pesos_clases)
+        umbrales = np.array([calcular_puntos(mano) - calcular_puntos(reveladas) for mano, reveladas in consultas])
+        menores = contar_menores_por_clases(conteos_25, self.pesos_clases, 3, umbrales)
+        return (menores / math.comb(len(self.cartas) - 15, 3)).tolist()
+
+
+class ManejadorConsultas(BaseHTTPRequestHandler):
+    """Atiende POST /probabilidades y GET /metricas; el servidor tiene evaluador, metricas y latencias."""
+
+    def _responder(self, estado, datos):
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode('utf-8')
+        self.send_response(estado)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_GET(self):
+        if self.path != '/metricas':
+            self._responder(404, {'error': f"ruta desconocida: {self.path}"})
+            return
+        servidor = self.server
+        resumen = servidor.metricas.resumen()
+        resumen['latencias_lote'] = servidor.latencias.resumen()
+        resumen['cache_aciertos'] = servidor.evaluador.cache_probabilidades.aciertos
+        resumen['cache_fallos'] = servidor.evaluador.cache_probabilidades.fallos
+        self._responder(200, resumen)
+
+    def do_POST(self):
+        if self.path != '/probabilidades':
+            self._responder(404, {'error': f"ruta desconocida: {self.path}"})
+            return
+        servidor = self.server
+        with servidor.latencias.medir():
+            try:
+                datos = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                consultas = datos.get('consultas') if isinstance(datos, dict) else None
+                if not isinstance(consultas, list) or len(consultas) > MAX_CONSULTAS_POR_LOTE:
+                    raise ValueError(f"'consultas' debe ser una lista de hasta {MAX_CONSULTAS_POR_LOTE:,} consultas")
+                with servidor.metricas.etapa('evaluacion'):
+                    resultados = servidor.evaluador.evaluar(consultas)
+            except (ValueError, TypeError) as e:
+                servidor.metricas.contar('lotes_rechazados')
+                self._responder(400, {'error': str(e)})
+                return
+            self._responder(200, {'resultados': resultados})
+        servidor.metricas.contar('lotes')
+        servidor.metricas.contar('consultas', len(resultados))
+
+    def log_message(self, formato, *argumentos):
+        # Sin una línea por consulta: el seguimiento está en /metricas
+        pass
+
+
+def crear_servidor(host='127.0.0.1', puerto=8765, ruta_cache_probabilidades=None):
+    """Servidor listo para serve_forever(); atiende de a un lote por vez (la caché SQLite no admite hilos)."""
+    servidor = HTTPServer((host, puerto), ManejadorConsultas)
+    servidor.evaluador = EvaluadorConsultas(cartas, CacheProbabilidades(cartas, ruta_sqlite=ruta_cache_probabilidades))
+    servidor.metricas = Metricas(silencioso=True)
+    servidor.latencias = Latencias()
+    return servidor
+
+
+def principal(argumentos=None):
+    parser = argparse.ArgumentParser(description="Servidor local de probabilidades por lotes.")
+    parser.add_argument('--host', default='127.0.0.1', help="dirección en la que escuchar (default 127.0.0.1)")
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--cache-probabilidades', help="base SQLite para guardar las probabilidades exactas")
+    args = parser.parse_args(argumentos)
+    servidor = crear_servidor(args.host, args.puerto, args.cache_probabilidades)
+    print(f"Escuchando en http://{args.host}:{args.puerto} (Ctrl+C para terminar)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servidor.evaluador.cache_probabilidades.cerrar()
+
+
+if __name__ == '__main__':
+    principal()
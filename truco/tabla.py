@@ -0,0 +1,258 @@
+"""
+Tabla precalculada de probabilidades para consultas en O(1).
+
+La construcción recorre, para cada ronda, todas las firmas de cartas quitadas del mazo
+(cuántas cartas de cada ponderación ya salieron) y guarda para cada una cuántas
+combinaciones del rival suman menos que cada umbral. El archivo resultante se abre con
+mmap y cada consulta es un cálculo de rango de 14 pasos más una lectura: no hace falta
+importar pandas ni NumPy para consultar.
+
+Formato: 8 bytes mágicos, largo de la cabecera (uint32), cabecera JSON y los bloques de
+cada ronda (enteros sin signo little-endian, una fila por firma).
+
+Uso:
+    python -m truco.tabla construir tabla_probabilidades.bin
+    python -m truco.tabla consultar tabla_probabilidades.bin 2 30 9 12 14 ...
+"""
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+from truco.firmas import agrupar_por_peso
+
+MAGICO = b'TRUCOTB1'
+
+# ronda -> (cartas quitadas del mazo, cartas que elige el rival del mazo restante)
+RONDAS_TABLA = {
+    1: (9, 9),
+    2: (12, 6),
+    3: (15, 3),
+}
+
+
+def _completaciones(multiplicidades, quitadas):
+    """completaciones[i][r] = formas de repartir r cartas quitadas entre las clases i en adelante."""
+    n = len(multiplicidades)
+    completaciones = [[0] * (quitadas + 1) for _ in range(n + 1)]
+    completaciones[n][0] = 1
+    for i in range(n - 1, -1, -1):
+        for r in range(quitadas + 1):
+            completaciones[i][r] = sum(completaciones[i + 1][r - j] for j in range(min(multiplicidades[i], r) + 1))
+    return completaciones
+
+
+def _desplazamientos(multiplicidades, quitadas):
+    """
+    desplazamientos[i][r][c] = cantidad de firmas (en orden lexicográfico) que quedan antes
+    por tomar c cartas de la clase i cuando faltan r. El rango de una firma es la suma de
+    sus desplazamientos, así que se calcula en tantos pasos como clases hay.
+    """
+    completaciones = _completaciones(multiplicidades, quitadas)
+    desplazamientos = []
+    for i, multiplicidad in enumerate(multiplicidades):
+        por_restantes = []
+        for r in range(quitadas + 1):
+            acumulado, fila = 0, []
+            for c in range(multiplicidad + 1):
+                fila.append(acumulado)
+                if c <= r:
+                    acumulado += completaciones[i + 1][r - c]
+            por_restantes.append(fila)
+        desplazamientos.append(por_restantes)
+    return desplazamientos, completaciones[0][quitadas]
+
+
+def rango_firma(desplazamientos, firma):
+    """Posición de la firma dentro del orden lexicográfico de todas las firmas del mismo tamaño."""
+    restantes = sum(firma)
+    rango = 0
+    for i, c in enumerate(firma):
+        rango += desplazamientos[i][restantes][c]
+        restantes -= c
+    return rango
+
+
+def _filas_ronda(pesos, multiplicidades, quitadas, k, columnas):
+    """
+    Genera, en orden lexicográfico de firma, la fila acumulada de cada firma de cartas quitadas:
+    fila[t] = combinaciones de k cartas del mazo restante que suman menos que t.
+    Recorre las firmas en profundidad y reutiliza el producto de polinomios de las clases ya fijadas.
+    """
+    import numpy as np
+
+    n = len(pesos)
+    suma_maxima = columnas - 2
+    capacidad = [sum(multiplicidades[i:]) for i in range(n + 1)]
+
+    def recorrer(i, faltan, polinomio):
+        if i == n:
+            fila = np.zeros(columnas, dtype=np.int64)
+            np.cumsum(polinomio[k], out=fila[1:])
+            yield fila
+            return
+        peso = pesos[i]
+        for c in range(max(0, faltan - capacidad[i + 1]), min(multiplicidades[i], faltan) + 1):
+            # Las cartas que quedan de la clase i multiplican por sum_j C(r, j) y^j x^(j·peso)
+            r = multiplicidades[i] - c
+            nuevo = polinomio.copy()
+            for j in range(1, min(r, k) + 1):
+                desplazamiento = j * peso
+                if desplazamiento > suma_maxima:
+                    break
+                nuevo[j:, desplazamiento:] += math.comb(r, j) * polinomio[:k + 1 - j, :suma_maxima + 1 - desplazamiento]
+            yield from recorrer(i + 1, faltan - c, nuevo)
+
+    inicial = np.zeros((k + 1, suma_maxima + 1), dtype=np.int64)
+    inicial[0, 0] = 1
+    yield from recorrer(0, quitadas, inicial)
+
+
+def construir_tabla(cartas, ruta, rondas=RONDAS_TABLA, filas_por_bloque=65536):
+    """Precalcula la tabla completa de las rondas dadas y la guarda en ruta de forma atómica."""
+    import numpy as np
+
+    clases = agrupar_por_peso(cartas)
+    pesos = [peso for peso, _ in clases]
+    multiplicidades = [len(cartas_clase) for _, cartas_clase in clases]
+    total_cartas = sum(multiplicidades)
+    pesos_ordenados = sorted((peso for peso, multiplicidad in zip(pesos, multiplicidades)
+                              for _ in range(multiplicidad)), reverse=True)
+
+    cabecera = {'pesos': pesos, 'multiplicidades': multiplicidades, 'rondas': {}}
+    desplazamiento_datos = 0
+    for ronda, (quitadas, k) in sorted(rondas.items()):
+        desplazamientos, filas = _desplazamientos(multiplicidades, quitadas)
+        total = math.comb(total_cartas - quitadas, k)
+        # Umbrales de 0 a suma máxima + 1; los demás se recortan al consultar
+        columnas = sum(pesos_ordenados[:k]) + 2
+        tipo = 'H' if total < 2 ** 16 else 'I'
+        cabecera['rondas'][str(ronda)] = {
+            'quitadas': quitadas, 'k': k, 'total': total, 'filas': filas, 'columnas': columnas,
+            'tipo': tipo, 'desplazamiento': desplazamiento_datos, 'desplazamientos': desplazamientos,
+        }
+        desplazamiento_datos += filas * columnas * struct.calcsize(tipo)
+
+    texto_cabecera = json.dumps(cabecera).encode('utf-8')
+    inicio_datos = len(MAGICO) + 4 + len(texto_cabecera)
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    temp_archivo = None
+    try:
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.bin', dir=directorio) as tmp:
+            temp_archivo = tmp.name
+            tmp.write(MAGICO)
+            tmp.write(struct.pack('<I', len(texto_cabecera)))
+            tmp.write(texto_cabecera)
+            for ronda, datos in sorted(cabecera['rondas'].items(), key=lambda item: int(item[0])):
+                inicio = time.time()
+                print(f"Construyendo ronda {ronda}: {datos['filas']:,} firmas...")
+                dtype = np.dtype('<u2' if datos['tipo'] == 'H' else '<u4')
+                bloque = []
+                for fila in _filas_ronda(pesos, multiplicidades, datos['quitadas'], datos['k'], datos['columnas']):
+                    bloque.append(fila)
+                    if len(bloque) == filas_por_bloque:
+                        tmp.write(np.asarray(bloque).astype(dtype).tobytes())
+                        bloque = []
+                if bloque:
+                    tmp.write(np.asarray(bloque).astype(dtype).tobytes())
+                print(f"  Ronda {ronda} completada en {time.time() - inicio:.2f}s")
+        assert os.path.getsize(temp_archivo) == inicio_datos + desplazamiento_datos
+        os.replace(temp_archivo, ruta)
+    except BaseException:
+        if temp_archivo and os.path.exists(temp_archivo):
+            os.remove(temp_archivo)
+        raise
+    return ruta
+
+
+class TablaProbabilidades:
+    """Consulta la tabla construida por construir_tabla mediante mmap, en tiempo constante."""
+
+    def __init__(self, ruta):
+        self._archivo = open(ruta, 'rb')
+        self._mapa = mmap.mmap(self._archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mapa[:len(MAGICO)] != MAGICO:
+            self.cerrar()
+            raise ValueError(f"'{ruta}' no es una tabla de probabilidades válida")
+        largo = struct.unpack_from('<I', self._mapa, len(MAGICO))[0]
+        inicio = len(MAGICO) + 4
+        cabecera = json.loads(self._mapa[inicio:inicio + largo].decode('utf-8'))
+        inicio_datos = inicio + largo
+        self.pesos = cabecera['pesos']
+        self.multiplicidades = cabecera['multiplicidades']
+        self._clase_de_peso = {peso: i for i, peso in enumerate(self.pesos)}
+        self.rondas = {}
+        for ronda, datos in cabecera['rondas'].items():
+            datos['formato'] = '<' + datos['tipo']
+            datos['tamano'] = struct.calcsize(datos['formato'])
+            datos['inicio'] = inicio_datos + datos['desplazamiento']
+            self.rondas[int(ronda)] = datos
+
+    def firma_de_pesos(self, pesos_quitados):
+        """Convierte las ponderaciones de las cartas quitadas en la firma que usa la tabla."""
+        firma = [0] * len(self.pesos)
+        for peso in pesos_quitados:
+            firma[self._clase_de_peso[int(peso)]] += 1
+        return firma
+
+    def menores(self, ronda, umbral, firma):
+        """Combinaciones del rival (sobre el total de la ronda) que suman menos que umbral."""
+        datos = self.rondas[ronda]
+        if sum(firma) != datos['quitadas'] or any(c > m for c, m in zip(firma, self.multiplicidades)):
+            raise ValueError(f"La firma {list(firma)} no corresponde a la ronda {ronda}")
+        umbral = min(max(int(umbral), 0), datos['columnas'] - 1)
+        fila = rango_firma(datos['desplazamientos'], firma)
+        posicion = datos['inicio'] + (fila * datos['columnas'] + umbral) * datos['tamano']
+        return struct.unpack_from(datos['formato'], self._mapa, posicion)[0]
+
+    def probabilidad(self, ronda, umbral, firma):
+        """
+        Probabilidad de ganar con la misma convención que los scripts de cada ronda:
+        ronda 1, que el rival sume más que umbral (mi PG); rondas 2 y 3, que las cartas
+        que faltan del rival sumen menos que umbral (PG reducido o super reducido).
+        """
+        total = self.rondas[ronda]['total']
+        if ronda == 1:
+            return (total - self.menores(ronda, int(umbral) + 1, firma)) / total
+        return self.menores(ronda, umbral, firma) / total
+
+    def probabilidad_por_pesos(self, ronda, umbral, pesos_quitados):
+        return self.probabilidad(ronda, umbral, self.firma_de_pesos(pesos_quitados))
+
+    def cerrar(self):
+        self._mapa.close()
+        self._archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+
+def _principal():
+    parser = argparse.ArgumentParser(description="Tabla precalculada de probabilidades del truco")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    construir = subcomandos.add_parser('construir', help="Precalcula la tabla completa de las tres rondas")
+    construir.add_argument('ruta')
+    consultar = subcomandos.add_parser('consultar', help="Consulta una probabilidad")
+    consultar.add_argument('ruta')
+    consultar.add_argument('ronda', type=int, choices=sorted(RONDAS_TABLA))
+    consultar.add_argument('umbral', type=int, help="PG, PG reducido o PG super reducido")
+    consultar.add_argument('pesos', type=int, nargs='+', help="Ponderaciones de las cartas quitadas del mazo")
+    argumentos = parser.parse_args()
+    if argumentos.comando == 'construir':
+        from truco.nucleo import cartas
+        construir_tabla(cartas, argumentos.ruta)
+        print(f"Tabla guardada en '{argumentos.ruta}'")
+    else:
+        with TablaProbabilidades(argumentos.ruta) as tabla:
+            print(f"{tabla.probabilidad_por_pesos(argumentos.ronda, argumentos.umbral, argumentos.pesos):.6f}")
+
+
+if __name__ == '__main__':
+    _principal()
@@ -0,0 +1,126 @@
+"""
+Puntuación vectorizada de combinaciones con NumPy.
+
+Las cartas se codifican como índices enteros (su posición en el mazo) y un lote de
+combinaciones es un arreglo 2-D de índices, de modo que puntuar todo el lote es un
+solo pesos[indices].sum(axis=1) en lugar de un bucle de Python por carta.
+"""
+import math
+from functools import lru_cache
+from itertools import combinations, combinations_with_replacement
+
+import numpy as np
+
+
+def pesos_de(mazo, cartas):
+    """Arreglo con la ponderación de cada carta de mazo, en el mismo orden."""
+    return np.fromiter((cartas[carta] for carta in mazo), dtype=np.int16, count=len(mazo))
+
+
+def codificar(combinaciones, mazo):
+    """Convierte combinaciones de cartas en un arreglo 2-D con sus índices dentro de mazo."""
+    posiciones = {carta: i for i, carta in enumerate(mazo)}
+    return np.array([[posiciones[carta] for carta in combinacion] for combinacion in combinaciones], dtype=np.int8)
+
+
+def decodificar(indices, mazo):
+    """Operación inversa de codificar para una sola fila de índices."""
+    return tuple(mazo[i] for i in indices)
+
+
+@lru_cache(maxsize=None)
+def indices_combinaciones(n, k):
+    """Todas las combinaciones de k posiciones entre n, como arreglo de forma (C(n, k), k)."""
+    indices = np.array(list(combinations(range(n), k)), dtype=np.int8).reshape(-1, k)
+    indices.setflags(write=False)
+    return indices
+
+
+def puntuar_lote(indices, pesos):
+    """Suma de ponderaciones de cada fila de indices."""
+    return pesos[indices].sum(axis=1)
+
+
+def contar_menores(puntos, umbral):
+    """Cantidad de puntajes estrictamente menores que umbral."""
+    return int(np.count_nonzero(puntos < umbral))
+
+
+def contar_mayores(puntos, umbral):
+    """Cantidad de puntajes estrictamente mayores que umbral."""
+    return int(np.count_nonzero(puntos > umbral))
+
+
+def conteos_por_clase(pesos, pesos_clases):
+    """
+    Cuántas cartas de cada ponderación de pesos_clases hay en cada fila de pesos (2-D),
+    como arreglo de forma (filas, clases).
+    """
+    return (pesos[:, :, None] == pesos_clases).sum(axis=1, dtype=np.int16)
+
+
+@lru_cache(maxsize=None)
+def _tomas_por_clase(clases, k):
+    """
+    Para cada multiconjunto de k clases, qué clases toma y cuántas cartas de cada una, como dos
+    arreglos de forma (multiconjuntos, k). Las posiciones que sobran toman 0 cartas de la clase 0.
+    """
+    multiconjuntos = list(combinations_with_replacement(range(clases), k))
+    clases_tomadas = np.zeros((len(multiconjuntos), k), dtype=np.intp)
+    cantidades = np.zeros((len(multiconjuntos), k), dtype=np.intp)
+    for fila, multiconjunto in enumerate(multiconjuntos):
+        for posicion, clase in enumerate(sorted(set(multiconjunto))):
+            clases_tomadas[fila, posicion] = clase
+            cantidades[fila, posicion] = multiconjunto.count(clase)
+    for arreglo in (clases_tomadas, cantidades):
+        arreglo.setflags(write=False)
+    return clases_tomadas, cantidades
+
+
+def contar_menores_por_clases(conteos, pesos_clases, k, umbrales, filas_por_bloque=8192):
+    """
+    Para cada fila de conteos (cartas disponibles de cada clase), cuántas combinaciones de k cartas
+    suman estrictamente menos que el umbral de esa fila. Recorre los multiconjuntos de k clases
+    (560 para 3 cartas de 14 clases) en lugar de las combinaciones de cartas: cada uno aporta el
+    producto de C(disponibles, tomadas) de sus clases. Las filas se resuelven por bloques de
+    filas_por_bloque para acotar la memoria.
+    """
+    clases_tomadas, cantidades = _tomas_por_clase(len(pesos_clases), k)
+    sumas = (np.asarray(pesos_clases, dtype=np.int64)[clases_tomadas] * cantidades).sum(axis=1)
+    maximo = int(conteos.max(initial=0))
+    binomiales = np.array([[math.comb(n, j) for j in range(k + 1)] for n in range(maximo + 1)], dtype=np.int64)
+    umbrales = np.broadcast_to(np.asarray(umbrales), (len(conteos),))
+    resultado = np.empty(len(conteos), dtype=np.int64)
+    for inicio in range(0, len(conteos), filas_por_bloque):
+        bloque = conteos[inicio:inicio + filas_por_bloque]
+        # formas[fila, multiconjunto] = producto de C(conteos[fila, clase], tomadas) sobre las clases que toma
+        formas = binomiales[bloque[:, clases_tomadas[:, 0]], cantidades[:, 0]]
+        for posicion in range(1, k):
+            formas *= binomiales[bloque[:, clases_tomadas[:, posicion]], cantidades[:, posicion]]
+        menores = sumas < umbrales[inicio:inicio + filas_por_bloque, None]
+        resultado[inicio:inicio + filas_por_bloque] = np.where(menores, formas, 0).sum(axis=1)
+    return resultado
+
+
+def distribuciones_sumas(conteos, pesos_clases, k):
+    """
+    Versión por lotes de truco.conteo.distribucion_sumas: para cada fila de conteos (cartas
+    disponibles de cada clase, con pesos_clases en orden creciente) cuántos subconjuntos de k
+    cartas alcanzan cada suma, como arreglo de forma (filas, k * max(pesos_clases) + 1).
+    """
+    pesos_clases = [int(peso) for peso in pesos_clases]
+    maximo = int(conteos.max(initial=0))
+    binomiales = np.array([[math.comb(n, j) for j in range(k + 1)] for n in range(maximo + 1)], dtype=np.int64)
+    # tabla[fila, j, suma] = formas de elegir j cartas que suman eso entre las clases ya recorridas
+    tabla = np.zeros((len(conteos), k + 1, k * max(pesos_clases, default=0) + 1), dtype=np.int64)
+    tabla[:, 0, 0] = 1
+    for clase, peso in enumerate(pesos_clases):
+        # Con las clases en orden creciente, j cartas suman a lo sumo j * peso
+        tope = k * peso + 1
+        nueva = tabla[:, :, :tope].copy()
+        for j in range(1, min(maximo, k) + 1):
+            formas = binomiales[conteos[:, clase], j]
+            if formas.any():
+                nueva[:, j:, j * peso:] += formas[:, None, None] * tabla[:, :k + 1 - j, :tope - j * peso]
+        tabla[:, :, :tope] = nueva
+    return tabla[:, k, :]